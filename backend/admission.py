@@ -0,0 +1,172 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+from percentiles import percentile_ms
+
+
+class AdmissionRejected(Exception):
+    """A request was turned away instead of queueing behind an overload"""
+
+    def __init__(self, message: str, status_code: int, retry_after: float):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class AdmissionTicket:
+    """An admitted request's slot; release() is safe to call more than once"""
+
+    __slots__ = ("_controller", "_admitted_at", "wait_seconds", "_released")
+
+    def __init__(self, controller: "AdmissionController", wait_seconds: float):
+        self._controller = controller
+        self._admitted_at = time.perf_counter()
+        self.wait_seconds = wait_seconds
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._controller._release(time.perf_counter() - self._admitted_at)
+
+    async def __aenter__(self) -> "AdmissionTicket":
+        return self
+
+    async def __aexit__(self, *_exc):
+        self.release()
+
+
+class AdmissionController:
+    """
+    Bounds concurrent queries with a FIFO wait queue in front.
+
+    Up to max_in_flight requests run at once; up to max_queue more wait for
+    a slot, each for at most queue_timeout_seconds. Beyond that a request
+    is rejected at once (429) rather than joining a queue it would time
+    out in; one that waits past its deadline gets 503. Both carry a
+    Retry-After estimated from the queue length and recent service times.
+
+    capacity_fn, if given, caps max_in_flight with a live limit (the LLM
+    concurrency limiter's), so requests the downstream limit can't take
+    wait here instead of being rejected there. Must be used from a single
+    event loop.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 64,
+        max_queue: int = 128,
+        queue_timeout_seconds: float = 5.0,
+        sample_size: int = 500,
+        capacity_fn: Optional[Callable[[], int]] = None,
+    ):
+        self.max_in_flight = max_in_flight
+        self.capacity_fn = capacity_fn
+        self.max_queue = max_queue
+        self.queue_timeout_seconds = queue_timeout_seconds
+
+        self._in_flight = 0
+        self._waiters: deque = deque()
+        self._service_seconds = 1.0  # EWMA of how long admitted requests run
+        self._queue_waits = deque(maxlen=sample_size)
+        self._stats = {
+            "admitted": 0,
+            "queued": 0,
+            "rejected_queue_full": 0,
+            "rejected_queue_timeout": 0,
+            "max_queue_depth": 0,
+        }
+
+    async def acquire(self) -> AdmissionTicket:
+        """Wait for a slot; raises AdmissionRejected under overload"""
+        if self._in_flight < self.capacity() and not self._waiters:
+            self._in_flight += 1
+            return self._admit(0.0)
+
+        if len(self._waiters) >= self.max_queue:
+            self._stats["rejected_queue_full"] += 1
+            raise AdmissionRejected(
+                "The server is busy; please retry shortly.", 429, self.retry_after()
+            )
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._stats["queued"] += 1
+        self._stats["max_queue_depth"] = max(
+            self._stats["max_queue_depth"], len(self._waiters)
+        )
+        started = time.perf_counter()
+        try:
+            async with asyncio.timeout(self.queue_timeout_seconds):
+                await waiter
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # Granted a slot just as the wait ended: hand it on
+                self._release(0.0, sample=False)
+            else:
+                waiter.cancel()
+                self._remove_waiter(waiter)
+            if isinstance(e, TimeoutError):
+                self._stats["rejected_queue_timeout"] += 1
+                raise AdmissionRejected(
+                    "The server is overloaded; please retry shortly.",
+                    503,
+                    self.retry_after(),
+                ) from None
+            raise
+
+        wait_seconds = time.perf_counter() - started
+        self._queue_waits.append(wait_seconds)
+        return self._admit(wait_seconds)
+
+    def capacity(self) -> int:
+        """Requests allowed to run at once right now"""
+        if self.capacity_fn is None:
+            return self.max_in_flight
+        return min(self.max_in_flight, self.capacity_fn())
+
+    def retry_after(self) -> float:
+        """Seconds until the current queue has likely drained"""
+        backlog = len(self._waiters) + self._in_flight
+        drain_seconds = backlog * self._service_seconds / max(self.capacity(), 1)
+        return min(max(drain_seconds, 1.0), 30.0)
+
+    def _admit(self, wait_seconds: float) -> AdmissionTicket:
+        self._stats["admitted"] += 1
+        return AdmissionTicket(self, wait_seconds)
+
+    def _release(self, service_seconds: float, sample: bool = True):
+        if sample:
+            self._service_seconds += 0.1 * (service_seconds - self._service_seconds)
+        # Hand free slots to the oldest live waiters; if the capacity shrank
+        # meanwhile, slots are retired instead
+        self._in_flight -= 1
+        while self._waiters and self._in_flight < self.capacity():
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self._in_flight += 1
+
+    def _remove_waiter(self, waiter):
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Slot and queue occupancy, rejection counters and queue-wait percentiles"""
+        samples = sorted(self._queue_waits)
+        return {
+            **self._stats,
+            "in_flight": self._in_flight,
+            "queue_depth": len(self._waiters),
+            "max_in_flight": self.max_in_flight,
+            "capacity": self.capacity(),
+            "max_queue": self.max_queue,
+            "queue_timeout_seconds": self.queue_timeout_seconds,
+            "avg_service_ms": round(self._service_seconds * 1000, 1),
+            "queue_wait_p50_ms": percentile_ms(samples, 0.5),
+            "queue_wait_p95_ms": percentile_ms(samples, 0.95),
+        }
@@ -1,6 +1,37 @@
-from typing import List, Optional
+import asyncio
+import contextvars
+import functools
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, List, Optional, Tuple
 
 import anthropic
+import httpx
+from deadline import Deadline, DeadlineExceeded
+from hedging import HedgePolicy, ahedged_call, hedged_call
+from metrics import LLM_TOKENS, llm_round
+from model_tiering import ModelTier, ModelTierRouter
+from resilience import LLMGuard, LLMUnavailableError
+from token_budget import RequestTokenUsage, TokenBudget, estimate_tokens
+
+
+@dataclass
+class GenerationContext:
+    """Per-request state threaded through one response generation"""
+
+    token_usage: RequestTokenUsage
+    model_tier: Optional[ModelTier] = None
+    deadline: Optional[Deadline] = None
+    started: float = field(default_factory=time.perf_counter)
+    llm_calls: int = 0
+
+    def next_round(self) -> int:
+        """Index of the LLM call about to be made within this request"""
+        self.llm_calls += 1
+        return self.llm_calls - 1
 
 
 class AIGenerator:
@@ -16,7 +47,7 @@ Search Tool Usage:
 - Use tools **only** for course-specific questions
 - Use `search_course_content` for questions about specific lesson/content details
 - Use `get_course_outline` for syllabus, outline, lesson-list, or curriculum-structure questions
-- Use at most one tool call per round, with up to 2 rounds total when needed
+- Use up to 2 rounds total when needed; independent lookups (e.g. a content search and an outline) may be requested together in one round
 - Synthesize tool results into accurate, fact-based responses
 - If a tool yields no results, state this clearly without offering alternatives
 - After using tools, provide a final direct answer to the user's question
@@ -38,16 +69,95 @@ All responses must be:
 Provide only the direct answer to what was asked.
 """
 
+    # The system prompt is sent as a single cached block. Requests render
+    # tools before system, so this one breakpoint caches tools + system as a
+    # byte-identical prefix; per-request history goes into messages instead.
+    SYSTEM_BLOCKS = [
+        {"type": "text", "text": SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}
+    ]
+
     def __init__(
-        self, api_key: str, model: str, timeout_seconds: float, max_retries: int
+        self,
+        api_key: str,
+        model: str,
+        timeout_seconds: float,
+        max_retries: int,
+        max_tokens: int = 800,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry_seconds: float = 30.0,
+        tool_max_workers: int = 8,
+        tool_timeout_seconds: float = 10.0,
+        token_budget: Optional[TokenBudget] = None,
+        client=None,
+        async_client=None,
+        llm_guard: Optional[LLMGuard] = None,
+        hedge_policy: Optional[HedgePolicy] = None,
+        hedge_max_workers: int = 16,
+        model_router: Optional[ModelTierRouter] = None,
     ):
-        self.client = anthropic.Anthropic(
-            api_key=api_key, timeout=timeout_seconds, max_retries=max_retries
+        # Retries are budgeted and jittered by the guard, not by the SDK, so
+        # queued requests don't all retry in lockstep during a brownout
+        self.llm_guard = llm_guard or LLMGuard(max_retries=max_retries)
+
+        # Prebuilt clients (e.g. the offline fake backend) replace the SDK ones
+        self.client = client or anthropic.Anthropic(
+            api_key=api_key, timeout=timeout_seconds, max_retries=0
+        )
+        # Shared async client: every in-flight chat waits on the provider over
+        # one tuned connection pool instead of holding an OS thread
+        self.async_client = async_client or anthropic.AsyncAnthropic(
+            api_key=api_key,
+            timeout=timeout_seconds,
+            max_retries=0,
+            http_client=anthropic.DefaultAsyncHttpxClient(
+                timeout=timeout_seconds,
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_keepalive_connections,
+                    keepalive_expiry=keepalive_expiry_seconds,
+                ),
+            ),
         )
         self.model = model
+        self.timeout_seconds = timeout_seconds
+
+        # Tool calls within one round run concurrently on this bounded pool
+        self.tool_executor = ThreadPoolExecutor(
+            max_workers=tool_max_workers, thread_name_prefix="tool"
+        )
+        self.tool_timeout_seconds = tool_timeout_seconds
+
+        # Optional hedging: slow calls get a duplicate request, first one wins
+        self.hedge_policy = hedge_policy
+        self.hedge_executor = None
+        if hedge_policy is not None:
+            self.hedge_executor = ThreadPoolExecutor(
+                max_workers=hedge_max_workers, thread_name_prefix="llm-hedge"
+            )
+
+        # Optional complexity-based choice between a fast and the main model
+        self.model_router = model_router
+
+        # Bounds prompt size by trimming history and tool results
+        self.token_budget = token_budget or TokenBudget()
 
         # Pre-build base API parameters
-        self.base_params = {"model": self.model, "temperature": 0, "max_tokens": 800}
+        self.base_params = {
+            "model": self.model,
+            "temperature": 0,
+            "max_tokens": max_tokens,
+        }
+
+        # Cumulative token usage, including prompt-cache reads and writes
+        self._usage_lock = threading.Lock()
+        self.usage_stats = {
+            "requests": 0,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "cache_creation_input_tokens": 0,
+            "cache_read_input_tokens": 0,
+        }
 
     def generate_response(
         self,
@@ -55,6 +165,9 @@ Provide only the direct answer to what was asked.
         conversation_history: Optional[str] = None,
         tools: Optional[List] = None,
         tool_manager=None,
+        user_query: Optional[str] = None,
+        tool_context=None,
+        deadline: Optional[Deadline] = None,
     ) -> str:
         """
         Generate AI response with optional tool usage and conversation context.
@@ -64,83 +177,585 @@ Provide only the direct answer to what was asked.
             conversation_history: Previous messages for context
             tools: Available tools the AI can use
             tool_manager: Manager to execute tools
+            user_query: Raw user question for model tiering (defaults to query)
+            tool_context: Per-request context collecting sources and tool calls
+            deadline: Request time budget; bounds every provider and tool call
 
         Returns:
             Generated response as string
         """
+        context = self._start_generation(
+            user_query or query, conversation_history, deadline
+        )
+        system_content = self.SYSTEM_BLOCKS
+        messages = self._build_initial_messages(
+            query, self.token_budget.fit_history(conversation_history)
+        )
+        tools_enabled = bool(tools and tool_manager)
+
+        try:
+            if not tools_enabled:
+                response = self._create_response(
+                    messages, system_content, None, context
+                )
+                return self._extract_text_response(response)
+
+            completed_tool_rounds = 0
+            while completed_tool_rounds < self.MAX_TOOL_ROUNDS:
+                response = self._create_response(
+                    messages, system_content, tools, context
+                )
+                tool_calls = self._get_tool_calls(response)
+
+                if not tool_calls:
+                    return self._extract_text_response(response)
+
+                messages.append({"role": "assistant", "content": response.content})
+
+                try:
+                    tool_results = self._execute_tool_calls(
+                        tool_calls, tool_manager, tool_context, context.deadline
+                    )
+                except DeadlineExceeded:
+                    # Out of time is not a retrieval issue worth answering with
+                    raise
+                except Exception:
+                    return self.TOOL_FAILURE_FALLBACK
+
+                if self._is_outline_only(tool_calls):
+                    return str(tool_results[0]["content"])
+
+                messages.append(self._tool_results_message(tool_results))
+                completed_tool_rounds += 1
+
+            final_response = self._create_response(
+                messages, system_content, None, context
+            )
+            return self._extract_text_response(final_response)
+        finally:
+            self._finish_generation(context)
+
+    async def agenerate_response(
+        self,
+        query: str,
+        conversation_history: Optional[str] = None,
+        tools: Optional[List] = None,
+        tool_manager=None,
+        user_query: Optional[str] = None,
+        tool_context=None,
+        deadline: Optional[Deadline] = None,
+    ) -> str:
+        """
+        Async variant of generate_response using the shared AsyncAnthropic client.
+
+        Provider calls are awaited on the event loop; only blocking tools
+        (embedding + vector search) are offloaded to a worker thread.
+
+        Args:
+            query: The user's question or request
+            conversation_history: Previous messages for context
+            tools: Available tools the AI can use
+            tool_manager: Manager to execute tools
+            user_query: Raw user question for model tiering (defaults to query)
+            tool_context: Per-request context collecting sources and tool calls
+            deadline: Request time budget; bounds every provider and tool call
 
-        # Build system content efficiently - avoid string ops when possible
-        system_content = (
-            f"{self.SYSTEM_PROMPT}\n\nPrevious conversation:\n{conversation_history}"
-            if conversation_history
-            else self.SYSTEM_PROMPT
+        Returns:
+            Generated response as string
+        """
+        context = self._start_generation(
+            user_query or query, conversation_history, deadline
         )
+        system_content = self.SYSTEM_BLOCKS
+        messages = self._build_initial_messages(
+            query, self.token_budget.fit_history(conversation_history)
+        )
+        tools_enabled = bool(tools and tool_manager)
+
+        try:
+            if not tools_enabled:
+                response = await self._acreate_response(
+                    messages, system_content, None, context
+                )
+                return self._extract_text_response(response)
+
+            completed_tool_rounds = 0
+            while completed_tool_rounds < self.MAX_TOOL_ROUNDS:
+                response = await self._acreate_response(
+                    messages, system_content, tools, context
+                )
+                tool_calls = self._get_tool_calls(response)
+
+                if not tool_calls:
+                    return self._extract_text_response(response)
 
-        messages = [{"role": "user", "content": query}]
+                messages.append({"role": "assistant", "content": response.content})
+
+                try:
+                    tool_results = await self._aexecute_tool_calls(
+                        tool_calls, tool_manager, tool_context, context.deadline
+                    )
+                except DeadlineExceeded:
+                    # Out of time is not a retrieval issue worth answering with
+                    raise
+                except Exception:
+                    return self.TOOL_FAILURE_FALLBACK
+
+                if self._is_outline_only(tool_calls):
+                    return str(tool_results[0]["content"])
+
+                messages.append(self._tool_results_message(tool_results))
+                completed_tool_rounds += 1
+
+            final_response = await self._acreate_response(
+                messages, system_content, None, context
+            )
+            return self._extract_text_response(final_response)
+        finally:
+            self._finish_generation(context)
+
+    async def astream_response(
+        self,
+        query: str,
+        conversation_history: Optional[str] = None,
+        tools: Optional[List] = None,
+        tool_manager=None,
+        user_query: Optional[str] = None,
+        tool_context=None,
+        deadline: Optional[Deadline] = None,
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Stream a response through the Messages streaming API.
+
+        Runs the same tool loop as agenerate_response, but every round is
+        streamed so answer text reaches the caller token by token.
+
+        Yields:
+            ("text", str) for each text delta, and ("tool_results", list of
+            tool names) after each executed tool round
+        """
+        context = self._start_generation(
+            user_query or query, conversation_history, deadline
+        )
+        system_content = self.SYSTEM_BLOCKS
+        messages = self._build_initial_messages(
+            query, self.token_budget.fit_history(conversation_history)
+        )
         tools_enabled = bool(tools and tool_manager)
 
-        if not tools_enabled:
-            response = self._create_response(messages, system_content)
-            return self._extract_text_response(response)
+        try:
+            completed_tool_rounds = 0
+            while True:
+                round_tools = (
+                    tools
+                    if tools_enabled and completed_tool_rounds < self.MAX_TOOL_ROUNDS
+                    else None
+                )
 
-        completed_tool_rounds = 0
-        while completed_tool_rounds < self.MAX_TOOL_ROUNDS:
-            response = self._create_response(messages, system_content, tools)
-            tool_calls = [
-                block
-                for block in response.content
-                if getattr(block, "type", None) == "tool_use"
-            ]
+                response = None
+                async for event_type, payload in self._astream_round(
+                    messages, system_content, round_tools, context
+                ):
+                    if event_type == "text":
+                        yield "text", payload
+                    else:
+                        response = payload
 
-            if not tool_calls:
-                return self._extract_text_response(response)
+                tool_calls = self._get_tool_calls(response) if round_tools else []
+                if not tool_calls:
+                    return
 
-            messages.append({"role": "assistant", "content": response.content})
+                messages.append({"role": "assistant", "content": response.content})
 
-            try:
-                tool_results = self._execute_tool_calls(tool_calls, tool_manager)
-            except Exception:
-                return self.TOOL_FAILURE_FALLBACK
+                try:
+                    tool_results = await self._aexecute_tool_calls(
+                        tool_calls, tool_manager, tool_context, context.deadline
+                    )
+                except DeadlineExceeded:
+                    # Out of time is not a retrieval issue worth answering with
+                    raise
+                except Exception:
+                    yield "text", self.TOOL_FAILURE_FALLBACK
+                    return
 
-            # Preserve exact anchor tags emitted by the outline tool so lesson
-            # "(Link)" URLs remain clickable and open in new tabs.
-            if len(tool_calls) == 1 and tool_calls[0].name == "get_course_outline":
-                return str(tool_results[0]["content"])
+                yield "tool_results", [tool_call.name for tool_call in tool_calls]
 
-            messages.append({"role": "user", "content": tool_results})
-            completed_tool_rounds += 1
+                if self._is_outline_only(tool_calls):
+                    yield "text", str(tool_results[0]["content"])
+                    return
 
-        final_response = self._create_response(messages, system_content)
-        return self._extract_text_response(final_response)
+                messages.append(self._tool_results_message(tool_results))
+                completed_tool_rounds += 1
+        finally:
+            self._finish_generation(context)
 
-    def _create_response(
-        self, messages, system_content: str, tools: Optional[List] = None
+    async def aclose(self):
+        """Close the shared async HTTP connection pool and worker executors"""
+        await self.async_client.close()
+        self.tool_executor.shutdown(wait=False, cancel_futures=True)
+        if self.hedge_executor is not None:
+            self.hedge_executor.shutdown(wait=False, cancel_futures=True)
+
+    def _build_initial_messages(
+        self, query: str, conversation_history: Optional[str]
+    ) -> List[dict]:
+        # History travels with the user turn so the system prefix stays cacheable
+        if not conversation_history:
+            return [{"role": "user", "content": query}]
+
+        return [
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": f"Previous conversation:\n{conversation_history}",
+                    },
+                    {"type": "text", "text": query},
+                ],
+            }
+        ]
+
+    def _start_generation(
+        self,
+        query: str,
+        conversation_history: Optional[str],
+        deadline: Optional[Deadline] = None,
+    ) -> GenerationContext:
+        model_tier = None
+        if self.model_router is not None:
+            model_tier = self.model_router.select(query, conversation_history)
+        return GenerationContext(
+            token_usage=self.token_budget.start_request(),
+            model_tier=model_tier,
+            deadline=deadline,
+        )
+
+    def _finish_generation(self, context: GenerationContext):
+        self.token_budget.finish_request(context.token_usage)
+        if context.model_tier is not None:
+            self.model_router.record_latency(
+                context.model_tier, time.perf_counter() - context.started
+            )
+
+    def _tool_results_message(self, tool_results) -> dict:
+        # Tool results are the part of the prompt that grows each round
+        return {
+            "role": "user",
+            "content": self.token_budget.fit_tool_results(tool_results),
+        }
+
+    def _build_api_params(
+        self,
+        messages,
+        system_content: List[dict],
+        tools: Optional[List] = None,
+        context: Optional[GenerationContext] = None,
     ):
+        fixed_tokens = estimate_tokens(self.SYSTEM_PROMPT)
+        if tools:
+            fixed_tokens += estimate_tokens(json.dumps(tools))
+        input_tokens = self.token_budget.fit_messages(messages, fixed_tokens)
+        if context is not None:
+            context.token_usage.calls.append(input_tokens)
+
         api_params = {
             **self.base_params,
             "messages": messages,
             "system": system_content,
         }
+        if context is not None and context.model_tier is not None:
+            api_params["model"] = context.model_tier.model
+            api_params["max_tokens"] = context.model_tier.max_tokens
 
         if tools:
             api_params["tools"] = tools
             api_params["tool_choice"] = {"type": "auto"}
 
-        return self.client.messages.create(**api_params)
+        return api_params
 
-    def _execute_tool_calls(self, tool_calls, tool_manager):
-        tool_results = []
-        for tool_call in tool_calls:
-            tool_result = tool_manager.execute_tool(tool_call.name, **tool_call.input)
-            tool_results.append(
-                {
-                    "type": "tool_result",
-                    "tool_use_id": tool_call.id,
-                    "content": tool_result,
-                }
+    def _create_response(
+        self,
+        messages,
+        system_content: List[dict],
+        tools: Optional[List] = None,
+        context: Optional[GenerationContext] = None,
+    ):
+        api_params = self._build_api_params(messages, system_content, tools, context)
+        create = functools.partial(
+            self.llm_guard.call,
+            self._bind_request(self.client.messages.create, api_params, context),
+        )
+        with llm_round(api_params["model"], "sync") as current_round:
+            if self.hedge_policy is None:
+                response = create()
+            else:
+                response = hedged_call(
+                    self.hedge_policy,
+                    context.next_round() if context else 0,
+                    create,
+                    self.hedge_executor,
+                    # The losing request is still billed
+                    on_late_result=self._record_usage,
+                )
+            current_round.response = response
+        self._record_usage(response)
+        return response
+
+    async def _acreate_response(
+        self,
+        messages,
+        system_content: List[dict],
+        tools: Optional[List] = None,
+        context: Optional[GenerationContext] = None,
+    ):
+        api_params = self._build_api_params(messages, system_content, tools, context)
+        create = functools.partial(
+            self.llm_guard.acall,
+            self._bind_request(self.async_client.messages.create, api_params, context),
+        )
+        with llm_round(api_params["model"], "async") as current_round:
+            if self.hedge_policy is None:
+                response = await create()
+            else:
+                response = await ahedged_call(
+                    self.hedge_policy, context.next_round() if context else 0, create
+                )
+            current_round.response = response
+        self._record_usage(response)
+        return response
+
+    async def _astream_round(
+        self,
+        messages,
+        system_content: List[dict],
+        tools: Optional[List] = None,
+        context: Optional[GenerationContext] = None,
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        api_params = self._build_api_params(messages, system_content, tools, context)
+        self.llm_guard.retry_budget.record_request()
+        # The round's time includes the caller consuming the streamed text
+        with llm_round(api_params["model"], "stream") as current_round:
+            attempt = 0
+            while True:
+                streamed_text = False
+                try:
+                    with self.llm_guard.slot():
+                        async with self._bind_request(
+                            self.async_client.messages.stream, api_params, context
+                        )() as stream:
+                            async for text in stream.text_stream:
+                                streamed_text = True
+                                yield "text", text
+                            final_message = await stream.get_final_message()
+                    current_round.response = final_message
+                    break
+                except LLMUnavailableError:
+                    raise
+                except Exception as e:
+                    # Text already sent to the client can't be taken back
+                    delay = (
+                        None
+                        if streamed_text
+                        else self.llm_guard.retry_delay(attempt, e)
+                    )
+                    if delay is None:
+                        raise
+                await asyncio.sleep(delay)
+                attempt += 1
+        self._record_usage(final_message)
+        yield "message", final_message
+
+    def _bind_request(self, send, api_params: dict, context):
+        """
+        A provider call for one attempt. Under a deadline, every attempt
+        (retry or hedge) first checks the budget and then gets a timeout
+        capped at the time left, so abandoned requests stop calling out.
+        """
+        deadline = context.deadline if context is not None else None
+        if deadline is None:
+            return functools.partial(send, **api_params)
+
+        def send_within_deadline():
+            timeout = deadline.timeout(self.timeout_seconds, "LLM call")
+            return send(**api_params, timeout=timeout)
+
+        return send_within_deadline
+
+    def _record_usage(self, response):
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+
+        with self._usage_lock:
+            self.usage_stats["requests"] += 1
+            for key in (
+                "input_tokens",
+                "output_tokens",
+                "cache_creation_input_tokens",
+                "cache_read_input_tokens",
+            ):
+                self.usage_stats[key] += getattr(usage, key, None) or 0
+
+        model = getattr(response, "model", None) or self.model
+        for kind in ("input", "output"):
+            tokens = getattr(usage, f"{kind}_tokens", None) or 0
+            if tokens:
+                LLM_TOKENS.inc(tokens, model=model, kind=kind)
+
+    def get_model_tier_stats(self) -> dict:
+        """Get per-tier request counts and generation latency"""
+        if self.model_router is None:
+            return {"enabled": False, "model": self.model}
+        return {"enabled": True, **self.model_router.get_stats()}
+
+    def get_hedging_stats(self) -> dict:
+        """Get hedge counters and per-round latency thresholds"""
+        if self.hedge_policy is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.hedge_policy.get_stats()}
+
+    def get_resilience_stats(self) -> dict:
+        """Get concurrency limit, circuit breaker and retry budget state"""
+        return self.llm_guard.get_stats()
+
+    def get_usage_stats(self) -> dict:
+        """Get cumulative token usage and the share of input read from cache"""
+        with self._usage_lock:
+            stats = dict(self.usage_stats)
+        total_input = (
+            stats["input_tokens"]
+            + stats["cache_creation_input_tokens"]
+            + stats["cache_read_input_tokens"]
+        )
+        stats["cache_read_ratio"] = (
+            stats["cache_read_input_tokens"] / total_input if total_input else 0.0
+        )
+        return stats
+
+    def _get_tool_calls(self, response):
+        return [
+            block
+            for block in response.content
+            if getattr(block, "type", None) == "tool_use"
+        ]
+
+    def _is_outline_only(self, tool_calls) -> bool:
+        # Preserve exact anchor tags emitted by the outline tool so lesson
+        # "(Link)" URLs remain clickable and open in new tabs.
+        return len(tool_calls) == 1 and tool_calls[0].name == "get_course_outline"
+
+    def _execute_tool_calls(
+        self, tool_calls, tool_manager, tool_context=None, deadline=None
+    ):
+        # All calls start together, so they share one timeout window
+        tools_deadline = time.monotonic() + self._tool_timeout(deadline)
+        futures = [
+            # Run in a copy of this context so tools add to the request's timings
+            self.tool_executor.submit(
+                contextvars.copy_context().run,
+                tool_manager.execute_tool,
+                tool_call.name,
+                **self._tool_call_kwargs(tool_call, tool_context),
             )
+            for tool_call in tool_calls
+        ]
+
+        outcomes = []
+        for future in futures:
+            try:
+                outcomes.append(
+                    future.result(timeout=max(tools_deadline - time.monotonic(), 0))
+                )
+            except Exception as e:
+                future.cancel()
+                outcomes.append(e)
+
+        return self._assemble_tool_results(tool_calls, outcomes)
+
+    async def _aexecute_tool_calls(
+        self, tool_calls, tool_manager, tool_context=None, deadline=None
+    ):
+        loop = asyncio.get_running_loop()
+        timeout = self._tool_timeout(deadline)
+
+        async def run_tool_call(tool_call):
+            call = functools.partial(
+                tool_manager.execute_tool,
+                tool_call.name,
+                **self._tool_call_kwargs(tool_call, tool_context),
+            )
+            if not self._is_blocking_tool(tool_manager, tool_call.name):
+                return call()
+
+            return await asyncio.wait_for(
+                loop.run_in_executor(
+                    self.tool_executor, contextvars.copy_context().run, call
+                ),
+                timeout=timeout,
+            )
+
+        outcomes = await asyncio.gather(
+            *(run_tool_call(tool_call) for tool_call in tool_calls),
+            return_exceptions=True,
+        )
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException) and not isinstance(
+                outcome, Exception
+            ):
+                raise outcome
+
+        return self._assemble_tool_results(tool_calls, outcomes)
+
+    def _tool_timeout(self, deadline: Optional[Deadline]) -> float:
+        if deadline is None:
+            return self.tool_timeout_seconds
+        return deadline.timeout(self.tool_timeout_seconds, "tool calls")
+
+    def _tool_call_kwargs(self, tool_call, tool_context) -> dict:
+        # Tool managers without per-request contexts get the model's input only
+        if tool_context is None:
+            return tool_call.input
+        return {**tool_call.input, "tool_context": tool_context}
+
+    def _assemble_tool_results(self, tool_calls, outcomes):
+        """Build tool_result blocks in call order; fail only if every call failed"""
+        failures = [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+        if failures and len(failures) == len(outcomes):
+            raise failures[0]
+
+        tool_results = []
+        for tool_call, outcome in zip(tool_calls, outcomes):
+            if isinstance(outcome, Exception):
+                tool_results.append(self._build_tool_error(tool_call, outcome))
+            else:
+                tool_results.append(self._build_tool_result(tool_call, outcome))
         return tool_results
 
+    def _is_blocking_tool(self, tool_manager, tool_name: str) -> bool:
+        # Tool managers that can't tell are assumed to block
+        is_blocking = getattr(tool_manager, "is_blocking_tool", None)
+        return is_blocking(tool_name) if is_blocking else True
+
+    def _build_tool_result(self, tool_call, tool_result):
+        return {
+            "type": "tool_result",
+            "tool_use_id": tool_call.id,
+            "content": tool_result,
+        }
+
+    def _build_tool_error(self, tool_call, error: Exception):
+        if isinstance(error, TimeoutError):
+            detail = f"timed out after {self.tool_timeout_seconds:g}s"
+        else:
+            detail = str(error) or type(error).__name__
+        return {
+            "type": "tool_result",
+            "tool_use_id": tool_call.id,
+            "content": f"Tool '{tool_call.name}' failed: {detail}",
+            "is_error": True,
+        }
+
     def _extract_text_response(self, response) -> str:
         for content_block in response.content:
             if getattr(content_block, "type", None) == "text":
@@ -0,0 +1,179 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+
+@dataclass
+class CachedAnswer:
+    """A cached answer together with what it cost to produce"""
+
+    answer: str
+    sources: List[str]
+    created_at: float  # Monotonic timestamp used for TTL expiry
+    compute_seconds: float  # Time the original query took
+    embedding: Optional[np.ndarray] = field(default=None, repr=False)
+
+
+class AnswerCache:
+    """LRU/TTL answer cache for history-free queries, keyed by index version"""
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_seconds: float = 3600,
+        similarity_threshold: float = 0.0,
+        embed_fn: Optional[Callable[[List[str]], Any]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # Semantic hits are only attempted with a threshold and an embedder
+        self.similarity_threshold = similarity_threshold
+        self.embed_fn = embed_fn if similarity_threshold > 0 else None
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, CachedAnswer]" = OrderedDict()
+        self._index_version: Optional[int] = None
+        self._stats = {
+            "lookups": 0,
+            "exact_hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+            "bypassed": 0,
+            "evictions": 0,
+            "invalidations": 0,
+            "latency_saved_seconds": 0.0,
+        }
+
+    @property
+    def uses_embeddings(self) -> bool:
+        """Whether lookups and stores call the (CPU-bound) embedder"""
+        return self.embed_fn is not None
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Normalize query text so trivially different phrasings share a key"""
+        text = re.sub(r"[^\w\s]", " ", query.lower())
+        return " ".join(text.split())
+
+    def record_bypass(self):
+        """Count a query that skipped the cache (e.g. it had session history)"""
+        with self._lock:
+            self._stats["bypassed"] += 1
+
+    def get(self, query: str, index_version: int) -> Optional[CachedAnswer]:
+        """Return a cached answer for the query, or None on a miss"""
+        key = self.normalize(query)
+        with self._lock:
+            self._stats["lookups"] += 1
+            self._sync_index_version(index_version)
+
+            entry = self._get_live_entry(key)
+            if entry is not None:
+                self._record_hit(key, entry, "exact_hits")
+                return entry
+
+            if not self.uses_embeddings or not self._entries:
+                self._stats["misses"] += 1
+                return None
+
+        # Embed outside the lock; the embedder is the slow part
+        embedding = self._embed(key)
+
+        with self._lock:
+            if self._index_version != index_version:
+                self._stats["misses"] += 1
+                return None
+
+            best_key, best_score = None, self.similarity_threshold
+            for candidate_key, candidate in self._entries.items():
+                if candidate.embedding is None or self._is_expired(candidate):
+                    continue
+                score = float(np.dot(embedding, candidate.embedding))
+                if score >= best_score:
+                    best_key, best_score = candidate_key, score
+
+            if best_key is None:
+                self._stats["misses"] += 1
+                return None
+
+            entry = self._entries[best_key]
+            self._record_hit(best_key, entry, "semantic_hits")
+            return entry
+
+    def put(
+        self,
+        query: str,
+        index_version: int,
+        answer: str,
+        sources: List[str],
+        compute_seconds: float,
+    ):
+        """Store an answer produced against the given index version"""
+        key = self.normalize(query)
+        embedding = self._embed(key) if self.uses_embeddings else None
+
+        with self._lock:
+            self._sync_index_version(index_version)
+            if self._index_version != index_version:
+                return
+
+            self._entries[key] = CachedAnswer(
+                answer=answer,
+                sources=list(sources),
+                created_at=self.clock(),
+                compute_seconds=compute_seconds,
+                embedding=embedding,
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters, hit rate and total latency saved"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        hits = stats["exact_hits"] + stats["semantic_hits"]
+        stats["hit_rate"] = hits / stats["lookups"] if stats["lookups"] else 0.0
+        return stats
+
+    def _sync_index_version(self, index_version: int):
+        # Ingestion bumps the index version; answers from older data are dropped
+        if self._index_version == index_version:
+            return
+        if self._index_version is not None and index_version < self._index_version:
+            return
+        if self._entries:
+            self._stats["invalidations"] += 1
+        self._entries.clear()
+        self._index_version = index_version
+
+    def _get_live_entry(self, key: str) -> Optional[CachedAnswer]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self._is_expired(entry):
+            del self._entries[key]
+            return None
+        return entry
+
+    def _is_expired(self, entry: CachedAnswer) -> bool:
+        return self.clock() - entry.created_at > self.ttl_seconds
+
+    def _record_hit(self, key: str, entry: CachedAnswer, counter: str):
+        self._entries.move_to_end(key)
+        self._stats[counter] += 1
+        self._stats["latency_saved_seconds"] += entry.compute_seconds
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.asarray(self.embed_fn([text])[0], dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
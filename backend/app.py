@@ -3,17 +3,38 @@ import warnings
 warnings.filterwarnings("ignore", message="resource_tracker: There appear to be.*")
 
 import asyncio
+import json
+import logging
+import math
 import os
-from typing import List, Optional
+import random
+import time
+from typing import Any, Dict, List, Optional
 
 import anthropic
+from admission import AdmissionController, AdmissionRejected
 from config import config
-from fastapi import FastAPI, HTTPException
+from deadline import Deadline
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
+from metrics import REGISTRY
 from pydantic import BaseModel
 from rag_system import RAGSystem
+from request_timing import RequestTimings, collect_timings
+from resilience import LLMUnavailableError
+from starlette.background import BackgroundTask
+
+logger = logging.getLogger(__name__)
+if not logger.handlers:
+    # Uvicorn configures only its own loggers; without a handler and level
+    # here, the INFO query-timing lines would be dropped
+    _log_handler = logging.StreamHandler()
+    _log_handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_log_handler)
+    logger.setLevel(logging.INFO)
 
 # Initialize FastAPI app
 app = FastAPI(title="Course Materials RAG System", root_path="")
@@ -34,6 +55,16 @@ app.add_middleware(
 # Initialize RAG system
 rag_system = RAGSystem(config)
 
+# Bounds concurrent queries; overflow waits briefly in a queue or is rejected
+admission = AdmissionController(
+    max_in_flight=config.QUERY_MAX_IN_FLIGHT,
+    max_queue=config.QUERY_MAX_QUEUE,
+    queue_timeout_seconds=config.QUERY_QUEUE_TIMEOUT_SECONDS,
+    # Admission is where load is shed; the LLM limiter never sees more
+    # requests than it currently allows
+    capacity_fn=rag_system.llm_capacity,
+)
+
 
 # Pydantic models for request/response
 class QueryRequest(BaseModel):
@@ -41,6 +72,7 @@ class QueryRequest(BaseModel):
 
     query: str
     session_id: Optional[str] = None
+    include_timings: bool = False
 
 
 class QueryResponse(BaseModel):
@@ -49,6 +81,8 @@ class QueryResponse(BaseModel):
     answer: str
     sources: List[str]
     session_id: str
+    # Per-stage breakdown, only when the request asks for it
+    timings: Optional[Dict[str, Any]] = None
 
 
 class NewSessionRequest(BaseModel):
@@ -71,6 +105,28 @@ class CourseStats(BaseModel):
     course_titles: List[str]
 
 
+class IndexStats(BaseModel):
+    """Response model for vector index statistics"""
+
+    total_chunks: int
+    chunks_per_course: Dict[str, int]
+    disk_size_bytes: int
+    estimated_index_memory_bytes: int
+    process_rss_bytes: Optional[int] = None
+    hnsw: Dict[str, Dict[str, Any]]
+
+
+class UsageStats(BaseModel):
+    """Response model for cumulative LLM token usage"""
+
+    requests: int
+    input_tokens: int
+    output_tokens: int
+    cache_creation_input_tokens: int
+    cache_read_input_tokens: int
+    cache_read_ratio: float
+
+
 # API Endpoints
 
 
@@ -93,21 +149,82 @@ async def create_new_session(request: NewSessionRequest):
 
 
 @app.post("/api/query", response_model=QueryResponse)
-async def query_documents(request: QueryRequest):
+async def query_documents(request: QueryRequest, response: Response):
     """Process a query and return response with sources"""
+    with collect_timings() as timings:
+        status_code = 500
+        session_id = request.session_id
+        try:
+            result = await answer_query(request, timings)
+            status_code, session_id = 200, result.session_id
+        except HTTPException as e:
+            status_code = e.status_code
+            # Failed and timed-out queries are the ones worth a breakdown
+            e.headers = {**(e.headers or {}), "Server-Timing": timings.server_timing()}
+            raise
+        finally:
+            log_query_timings(request, session_id, timings, status_code)
+
+    response.headers["Server-Timing"] = timings.server_timing()
+    if request.include_timings:
+        result.timings = timings.to_dict()
+    return result
+
+
+def log_query_timings(
+    request: QueryRequest,
+    session_id: Optional[str],
+    timings: RequestTimings,
+    status: int,
+):
+    """Log a sampled JSON line; slow and failed queries are always logged"""
+    breakdown = timings.to_dict()
+    if (
+        status == 200
+        and breakdown["total_ms"] < config.QUERY_TIMING_LOG_SLOW_MS
+        and random.random() >= config.QUERY_TIMING_LOG_SAMPLE_RATE
+    ):
+        return
+    logger.info(
+        json.dumps(
+            {
+                "event": "query_timings",
+                "timestamp": time.time(),
+                "status": status,
+                "session_id": session_id,
+                "query_chars": len(request.query),
+                **breakdown,
+            }
+        )
+    )
+
+
+async def answer_query(request: QueryRequest, timings: RequestTimings) -> QueryResponse:
+    """Admit, run and time one query; errors surface as HTTPException"""
     try:
         # Create session if not provided
         session_id = request.session_id
         if not session_id:
             session_id = rag_system.session_manager.create_session()
 
-        # Process query using RAG system
-        answer, sources = await asyncio.wait_for(
-            asyncio.to_thread(rag_system.query, request.query, session_id),
-            timeout=config.QUERY_TIMEOUT_SECONDS,
-        )
+        # Process query using RAG system; provider calls are awaited on the
+        # event loop so in-flight chats don't each hold a worker thread
+        async with await admission.acquire() as ticket:
+            timings.add_stage("admission_queue", ticket.wait_seconds)
+            # The budget starts once admitted; queueing has its own timeout
+            deadline = Deadline(config.QUERY_TIMEOUT_SECONDS)
+            try:
+                answer, sources = await asyncio.wait_for(
+                    rag_system.aquery(request.query, session_id, deadline=deadline),
+                    timeout=config.QUERY_TIMEOUT_SECONDS,
+                )
+            finally:
+                # Stops tool threads a timed-out request would leave running
+                deadline.cancel()
 
         return QueryResponse(answer=answer, sources=sources, session_id=session_id)
+    except AdmissionRejected as e:
+        raise admission_rejected(e)
     except asyncio.TimeoutError:
         raise HTTPException(
             status_code=504,
@@ -124,10 +241,96 @@ async def query_documents(request: QueryRequest):
                 "Please try again."
             ),
         )
+    except LLMUnavailableError as e:
+        # Breaker open or concurrency limit reached: fail fast
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def admission_rejected(error: AdmissionRejected) -> HTTPException:
+    """Shed-load response telling the client when to come back"""
+    return HTTPException(
+        status_code=error.status_code,
+        detail=str(error),
+        headers={"Retry-After": str(math.ceil(error.retry_after))},
+    )
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Encode one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/api/query/stream")
+async def stream_query(request: QueryRequest):
+    """Stream the answer as server-sent events (sources, token, error, done)"""
+    # Admit before the response starts so an overload is a real HTTP status
+    try:
+        ticket = await admission.acquire()
+    except AdmissionRejected as e:
+        raise admission_rejected(e)
+
+    try:
+        session_id = request.session_id
+        if not session_id:
+            session_id = rag_system.session_manager.create_session()
+    except BaseException:
+        ticket.release()
+        raise
+
+    async def event_stream():
+        started = time.perf_counter()
+        deadline = Deadline(config.QUERY_TIMEOUT_SECONDS)
+        try:
+            with collect_timings() as timings:
+                async with asyncio.timeout(config.QUERY_TIMEOUT_SECONDS):
+                    async for event, data in rag_system.astream_query(
+                        request.query, session_id, deadline=deadline
+                    ):
+                        yield format_sse(event, data)
+        except TimeoutError:
+            yield format_sse(
+                "error",
+                {
+                    "detail": (
+                        "The request timed out while generating a response. "
+                        "Please try again."
+                    )
+                },
+            )
+            total_ms = round((time.perf_counter() - started) * 1000, 1)
+            # No session_queue stage means the request never left the queue
+            queue_wait_ms = timings.to_dict()["stages"].get("session_queue", total_ms)
+            yield format_sse(
+                "done",
+                {
+                    "session_id": session_id,
+                    "sources": [],
+                    "timing": {
+                        "time_to_first_token_ms": None,
+                        "total_ms": total_ms,
+                        "queue_wait_ms": queue_wait_ms,
+                    },
+                },
+            )
+        finally:
+            deadline.cancel()
+            ticket.release()
+
+    # The background task frees the slot if the stream never ran at all
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(ticket.release),
+    )
+
+
 @app.get("/api/courses", response_model=CourseStats)
 async def get_course_stats():
     """Get course analytics and statistics"""
@@ -141,6 +344,135 @@ async def get_course_stats():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/search/stats")
+async def get_search_stats() -> Dict[str, Any]:
+    """Get relevance-cutoff counters: results and estimated tokens trimmed"""
+    try:
+        return rag_system.get_search_stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/index/stats", response_model=IndexStats)
+async def get_index_stats():
+    """Get vector index size, per-course chunk counts and HNSW settings"""
+    try:
+        stats = await asyncio.to_thread(rag_system.get_index_stats)
+        return IndexStats(**stats)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/usage/stats", response_model=UsageStats)
+async def get_usage_stats():
+    """Get cumulative LLM token usage, including prompt-cache reads and writes"""
+    try:
+        return UsageStats(**rag_system.get_usage_stats())
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/admission/stats")
+async def get_admission_stats() -> Dict[str, Any]:
+    """Get query slot and wait-queue occupancy, rejections and queue wait"""
+    try:
+        return admission.get_stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/metrics")
+async def get_metrics() -> PlainTextResponse:
+    """Per-stage latency histograms and counters in Prometheus text format"""
+    try:
+        return PlainTextResponse(
+            REGISTRY.render(), media_type="text/plain; version=0.0.4"
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/sessions/stats")
+async def get_session_stats() -> Dict[str, Any]:
+    """Get session cache counters and per-session request queueing"""
+    try:
+        return rag_system.get_session_stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/models/stats")
+async def get_model_tier_stats() -> Dict[str, Any]:
+    """Get per-model-tier request counts and latency"""
+    try:
+        return rag_system.get_model_tier_stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/hedging/stats")
+async def get_hedging_stats() -> Dict[str, Any]:
+    """Get hedged LLM request counters and per-round hedge thresholds"""
+    try:
+        return rag_system.get_hedging_stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/resilience/stats")
+async def get_resilience_stats() -> Dict[str, Any]:
+    """Get LLM concurrency limit, circuit breaker and retry budget state"""
+    try:
+        return rag_system.get_resilience_stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/tokens/stats")
+async def get_token_budget_stats() -> Dict[str, Any]:
+    """Get prompt token budgets, trim counters and input size percentiles"""
+    try:
+        return rag_system.get_token_budget_stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/router/stats")
+async def get_router_stats() -> Dict[str, Any]:
+    """Get how many queries the intent router answered without the LLM"""
+    try:
+        return rag_system.get_router_stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/coalescing/stats")
+async def get_coalescing_stats() -> Dict[str, Any]:
+    """Get how many queries were coalesced onto an identical in-flight query"""
+    try:
+        return rag_system.get_coalescing_stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/cache/stats")
+async def get_cache_stats() -> Dict[str, Any]:
+    """Get answer cache hit rate, counters and latency saved"""
+    try:
+        return rag_system.get_cache_stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/speculation/stats")
+async def get_speculation_stats() -> Dict[str, Any]:
+    """Get speculative retrieval counters and hit rate"""
+    try:
+        return rag_system.get_speculation_stats()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.on_event("startup")
 async def startup_event():
     """Load initial documents on startup"""
@@ -156,6 +488,13 @@ async def startup_event():
             print(f"Error loading documents: {e}")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release the shared provider connection pool and flush sessions"""
+    await rag_system.ai_generator.aclose()
+    await asyncio.to_thread(rag_system.session_manager.close)
+
+
 # Custom static file handler with no-cache headers for development
 
 from fastapi.responses import FileResponse
@@ -14,10 +14,76 @@ class Config:
     # Anthropic API settings
     ANTHROPIC_API_KEY: str = os.getenv("ANTHROPIC_API_KEY", "")
     ANTHROPIC_MODEL: str = "claude-sonnet-4-20250514"
+    ANTHROPIC_MAX_TOKENS: int = int(os.getenv("ANTHROPIC_MAX_TOKENS", "800"))
+
+    # Route simple queries (by a local complexity score) to a faster model
+    MODEL_TIERING_ENABLED: bool = (
+        os.getenv("MODEL_TIERING_ENABLED", "false").lower() == "true"
+    )
+    FAST_MODEL: str = os.getenv("FAST_MODEL", "claude-3-5-haiku-20241022")
+    FAST_MODEL_MAX_TOKENS: int = int(os.getenv("FAST_MODEL_MAX_TOKENS", "400"))
+    # A course reference alone scores 0.25, so every course question stays
+    # on the main tier; the fast tier gets short general questions and
+    # shallow follow-ups
+    MODEL_TIER_COMPLEXITY_THRESHOLD: float = float(
+        os.getenv("MODEL_TIER_COMPLEXITY_THRESHOLD", "0.25")
+    )
+
+    # "fake" swaps in the offline fake LLM backend for load testing
+    LLM_BACKEND: str = os.getenv("LLM_BACKEND", "anthropic")
+    FAKE_LLM_LATENCY: str = os.getenv("FAKE_LLM_LATENCY", "lognormal:800,0.4")
+    FAKE_LLM_ERROR_RATE: float = float(os.getenv("FAKE_LLM_ERROR_RATE", "0"))
+    FAKE_LLM_TOOL_USE_RATE: float = float(os.getenv("FAKE_LLM_TOOL_USE_RATE", "1"))
+    FAKE_LLM_SEED: int = int(os.getenv("FAKE_LLM_SEED", "0"))
     ANTHROPIC_TIMEOUT_SECONDS: float = float(
         os.getenv("ANTHROPIC_TIMEOUT_SECONDS", "30")
     )
     ANTHROPIC_MAX_RETRIES: int = int(os.getenv("ANTHROPIC_MAX_RETRIES", "1"))
+    # Connection pool shared by all in-flight async provider calls
+    ANTHROPIC_MAX_CONNECTIONS: int = int(os.getenv("ANTHROPIC_MAX_CONNECTIONS", "200"))
+    ANTHROPIC_MAX_KEEPALIVE_CONNECTIONS: int = int(
+        os.getenv("ANTHROPIC_MAX_KEEPALIVE_CONNECTIONS", "50")
+    )
+
+    # Client-side protection for LLM calls: AIMD concurrency limit, circuit
+    # breaker and a retry budget (ANTHROPIC_MAX_RETRIES caps per-call retries)
+    LLM_CONCURRENCY_INITIAL: int = int(os.getenv("LLM_CONCURRENCY_INITIAL", "32"))
+    LLM_CONCURRENCY_MAX: int = int(os.getenv("LLM_CONCURRENCY_MAX", "200"))
+    LLM_LATENCY_TARGET_SECONDS: float = float(
+        os.getenv("LLM_LATENCY_TARGET_SECONDS", "20")
+    )
+    LLM_BREAKER_FAILURE_RATE: float = float(
+        os.getenv("LLM_BREAKER_FAILURE_RATE", "0.5")
+    )
+    LLM_BREAKER_RESET_SECONDS: float = float(
+        os.getenv("LLM_BREAKER_RESET_SECONDS", "30")
+    )
+    LLM_RETRY_BUDGET_RATIO: float = float(os.getenv("LLM_RETRY_BUDGET_RATIO", "0.1"))
+
+    # Hedged requests: duplicate an LLM call that outlives its round's p95
+    # (never sooner than the min delay), capped at a share of calls
+    HEDGE_ENABLED: bool = os.getenv("HEDGE_ENABLED", "false").lower() == "true"
+    HEDGE_MIN_DELAY_SECONDS: float = float(os.getenv("HEDGE_MIN_DELAY_SECONDS", "2"))
+    HEDGE_MAX_RATIO: float = float(os.getenv("HEDGE_MAX_RATIO", "0.05"))
+
+    # Tool calls requested in the same round run concurrently
+    TOOL_MAX_WORKERS: int = int(os.getenv("TOOL_MAX_WORKERS", "8"))
+    TOOL_TIMEOUT_SECONDS: float = float(os.getenv("TOOL_TIMEOUT_SECONDS", "10"))
+
+    # Estimated-token budgets that keep prompt size flat as chats grow
+    PROMPT_TOKEN_BUDGET: int = int(os.getenv("PROMPT_TOKEN_BUDGET", "6000"))
+    HISTORY_TOKEN_BUDGET: int = int(os.getenv("HISTORY_TOKEN_BUDGET", "1000"))
+    TOOL_RESULT_TOKEN_BUDGET: int = int(os.getenv("TOOL_RESULT_TOKEN_BUDGET", "1500"))
+
+    # Answer obvious outline requests locally instead of asking the LLM
+    INTENT_ROUTER_ENABLED: bool = (
+        os.getenv("INTENT_ROUTER_ENABLED", "true").lower() == "true"
+    )
+
+    # Coalesce identical history-free queries that are in flight together
+    SINGLE_FLIGHT_ENABLED: bool = (
+        os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+    )
 
     # Embedding model settings
     EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
@@ -27,7 +93,80 @@ class Config:
     CHUNK_OVERLAP: int = 100  # Characters to overlap between chunks
     MAX_RESULTS: int = 5  # Maximum search results to return
     MAX_HISTORY: int = 2  # Number of conversation messages to remember
+    # Idle sessions expire after the TTL. The cap is enforced per lock shard
+    # (16 shards of ceil(MAX_SESSIONS / 16) each), so a full shard evicts its
+    # least recently used session even while the total is under the cap
+    MAX_SESSIONS: int = int(os.getenv("MAX_SESSIONS", "10000"))
+    SESSION_TTL_SECONDS: float = float(os.getenv("SESSION_TTL_SECONDS", "3600"))
+    # "memory" keeps sessions per process; "sqlite" shares them between
+    # workers on one host through write-behind batches to SESSION_DB_PATH
+    SESSION_BACKEND: str = os.getenv("SESSION_BACKEND", "memory")
+    SESSION_DB_PATH: str = os.getenv("SESSION_DB_PATH", "./sessions.db")
+    SESSION_FLUSH_INTERVAL_SECONDS: float = float(
+        os.getenv("SESSION_FLUSH_INTERVAL_SECONDS", "0.05")
+    )
+    # How long a worker trusts its cached copy of a shared session
+    SESSION_CACHE_SECONDS: float = float(os.getenv("SESSION_CACHE_SECONDS", "1"))
     QUERY_TIMEOUT_SECONDS: int = int(os.getenv("QUERY_TIMEOUT_SECONDS", "45"))
+    # Admission control: queries beyond QUERY_MAX_IN_FLIGHT (or the LLM
+    # concurrency limit, if lower) wait in a queue of QUERY_MAX_QUEUE for
+    # at most QUERY_QUEUE_TIMEOUT_SECONDS
+    QUERY_MAX_IN_FLIGHT: int = int(os.getenv("QUERY_MAX_IN_FLIGHT", "32"))
+    QUERY_MAX_QUEUE: int = int(os.getenv("QUERY_MAX_QUEUE", "128"))
+    QUERY_QUEUE_TIMEOUT_SECONDS: float = float(
+        os.getenv("QUERY_QUEUE_TIMEOUT_SECONDS", "5")
+    )
+    # Worker threads for blocking query work (answer-cache embeddings)
+    QUERY_MAX_WORKERS: int = int(os.getenv("QUERY_MAX_WORKERS", "8"))
+    # Share of /api/query timing breakdowns written to the JSON log; queries
+    # slower than QUERY_TIMING_LOG_SLOW_MS (or failed) are always logged
+    QUERY_TIMING_LOG_SAMPLE_RATE: float = float(
+        os.getenv("QUERY_TIMING_LOG_SAMPLE_RATE", "0.01")
+    )
+    QUERY_TIMING_LOG_SLOW_MS: float = float(
+        os.getenv("QUERY_TIMING_LOG_SLOW_MS", "5000")
+    )
+
+    # Relevance cutoff settings for search results
+    # Chunks farther than this distance are dropped (0 disables the cutoff)
+    SEARCH_MAX_DISTANCE: float = float(os.getenv("SEARCH_MAX_DISTANCE", "1.6"))
+    # Cut results at the largest distance gap when it is at least this wide
+    SEARCH_ADAPTIVE_K: bool = os.getenv("SEARCH_ADAPTIVE_K", "true").lower() == "true"
+    SEARCH_MIN_SCORE_GAP: float = float(os.getenv("SEARCH_MIN_SCORE_GAP", "0.15"))
+    SEARCH_MIN_RESULTS: int = int(os.getenv("SEARCH_MIN_RESULTS", "1"))
+
+    # HNSW index settings applied to each Chroma collection. Space, M and
+    # construction ef only take effect when a collection is first created;
+    # search ef is also updated on existing collections at startup.
+    # Note that SEARCH_MAX_DISTANCE is expressed in the units of HNSW_SPACE.
+    HNSW_SPACE: str = os.getenv("HNSW_SPACE", "l2")
+    HNSW_M: int = int(os.getenv("HNSW_M", "16"))
+    HNSW_CONSTRUCTION_EF: int = int(os.getenv("HNSW_CONSTRUCTION_EF", "100"))
+    HNSW_SEARCH_EF: int = int(os.getenv("HNSW_SEARCH_EF", "100"))
+
+    # Speculative retrieval: search the raw user query while the first LLM
+    # round is in flight and reuse it if the model's search is close enough
+    SPECULATIVE_RETRIEVAL_ENABLED: bool = (
+        os.getenv("SPECULATIVE_RETRIEVAL_ENABLED", "false").lower() == "true"
+    )
+    # Share of the smaller query's content words both queries must contain
+    SPECULATIVE_MATCH_THRESHOLD: float = float(
+        os.getenv("SPECULATIVE_MATCH_THRESHOLD", "0.6")
+    )
+    SPECULATIVE_MAX_WORKERS: int = int(os.getenv("SPECULATIVE_MAX_WORKERS", "4"))
+
+    # Answer cache for history-free queries (invalidated on ingestion)
+    ANSWER_CACHE_ENABLED: bool = (
+        os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    )
+    ANSWER_CACHE_MAX_ENTRIES: int = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "512"))
+    ANSWER_CACHE_TTL_SECONDS: float = float(
+        os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600")
+    )
+    # Cosine similarity needed for an embedding-based hit (0 = exact text only)
+    ANSWER_CACHE_SIMILARITY_THRESHOLD: float = float(
+        os.getenv("ANSWER_CACHE_SIMILARITY_THRESHOLD", "0")
+    )
 
     # Database paths
     CHROMA_PATH: str = "./chroma_db"  # ChromaDB storage location
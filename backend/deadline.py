@@ -0,0 +1,51 @@
+import time
+from typing import Callable, Optional
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request ran out of time budget (or was cancelled) before a stage"""
+
+
+class Deadline:
+    """
+    A request's time budget, shared by every stage that works on it.
+
+    Stages call check() before starting work that can't be interrupted
+    (a provider call, an embedding, a Chroma query) and size their own
+    timeouts with timeout(). cancel() ends the budget early, e.g. when the
+    caller has already given up on the request.
+    """
+
+    def __init__(
+        self, timeout_seconds: float, clock: Callable[[], float] = time.monotonic
+    ):
+        self.clock = clock
+        self.expires_at = clock() + timeout_seconds
+        self.cancelled = False
+
+    def remaining(self) -> float:
+        """Seconds left, never negative; 0 once cancelled"""
+        if self.cancelled:
+            return 0.0
+        return max(self.expires_at - self.clock(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def cancel(self):
+        self.cancelled = True
+
+    def check(self, stage: str):
+        """Raise DeadlineExceeded instead of starting the stage too late"""
+        if self.expired:
+            reason = "cancelled" if self.cancelled else "deadline exceeded"
+            raise DeadlineExceeded(f"Request {reason} before {stage}")
+
+    def timeout(self, stage_timeout: Optional[float], stage: str) -> float:
+        """A stage's timeout, capped by the time left on the request"""
+        self.check(stage)
+        remaining = self.remaining()
+        if stage_timeout is None:
+            return remaining
+        return min(stage_timeout, remaining)
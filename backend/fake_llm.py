@@ -0,0 +1,336 @@
+import asyncio
+import itertools
+import math
+import random
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import anthropic
+import httpx
+from anthropic.types import Message, TextBlock, ToolUseBlock, Usage
+from token_budget import estimate_content_tokens, estimate_tokens
+
+FAKE_API_URL = "https://fake-llm.local/v1/messages"
+ERROR_KINDS = ("rate_limit", "overloaded", "server_error", "timeout")
+PROMPT_PREFIX = "Answer this question about course materials: "
+OUTLINE_WORDS = ("outline", "syllabus", "lessons", "curriculum")
+FILLER_WORDS = (
+    "retrieval",
+    "lessons",
+    "context",
+    "prompts",
+    "tools",
+    "agents",
+    "embeddings",
+    "examples",
+)
+
+# One scripted turn: answer text, a tool call ({"tool": name, "input": {...}}),
+# or a list of those making up one message
+ScriptedTurn = Union[str, Dict[str, Any], List[Union[str, Dict[str, Any]]]]
+
+
+@dataclass
+class LatencyDistribution:
+    """Response latency model, parsed from specs like "lognormal:800,0.5" """
+
+    kind: str = "fixed"
+    params: Tuple[float, ...] = (0.0,)
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyDistribution":
+        """
+        Parse a latency spec; all times are in milliseconds.
+
+        Supported specs:
+            fixed:<ms>
+            uniform:<low_ms>,<high_ms>
+            lognormal:<median_ms>,<sigma>
+        """
+        kind, _, raw_params = spec.strip().partition(":")
+        params = tuple(float(value) for value in raw_params.split(",") if value)
+        expected = {"fixed": 1, "uniform": 2, "lognormal": 2}
+        if kind not in expected or len(params) != expected[kind]:
+            raise ValueError(f"Invalid latency spec: {spec!r}")
+        return cls(kind, params)
+
+    def sample(self, rng: random.Random) -> float:
+        """Draw one latency in seconds"""
+        if self.kind == "uniform":
+            milliseconds = rng.uniform(*self.params)
+        elif self.kind == "lognormal":
+            median, sigma = self.params
+            milliseconds = rng.lognormvariate(math.log(max(median, 1e-3)), sigma)
+        else:
+            milliseconds = self.params[0]
+        return max(milliseconds, 0.0) / 1000
+
+
+class FakeLLMBackend:
+    """
+    Shared behaviour of the fake sync and async Anthropic clients.
+
+    Responses come from the script queue first, then from the default policy:
+    when tools are offered and no tool has run yet, request a tool (outline
+    for outline-like questions, otherwise a content search on the user's
+    question); otherwise answer with filler text.
+    """
+
+    def __init__(
+        self,
+        latency: Optional[LatencyDistribution] = None,
+        error_rate: float = 0.0,
+        error_kinds: Sequence[str] = ERROR_KINDS,
+        tool_use_rate: float = 1.0,
+        answer_words: int = 60,
+        time_to_first_token_ratio: float = 0.3,
+        script: Optional[List[ScriptedTurn]] = None,
+        policy: Optional[Callable[[Dict[str, Any]], ScriptedTurn]] = None,
+        seed: Optional[int] = None,
+    ):
+        unknown = set(error_kinds) - set(ERROR_KINDS)
+        if unknown:
+            raise ValueError(f"Unknown fake LLM error kinds: {sorted(unknown)}")
+
+        self.latency = latency or LatencyDistribution()
+        self.error_rate = error_rate
+        self.error_kinds = tuple(error_kinds)
+        self.tool_use_rate = tool_use_rate
+        self.answer_words = answer_words
+        self.time_to_first_token_ratio = time_to_first_token_ratio
+        self.policy = policy or self.default_policy
+
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._script = list(script or [])
+        self._ids = itertools.count(1)
+        self.request_count = 0
+        self.recent_requests = deque(maxlen=100)
+        self.errors: Dict[str, int] = {kind: 0 for kind in self.error_kinds}
+
+    def enqueue(self, *turns: ScriptedTurn):
+        """Script the next responses, consumed in order before the policy"""
+        with self._lock:
+            self._script.extend(turns)
+
+    def plan(self, params: Dict[str, Any]) -> Tuple[float, Optional[str], Message]:
+        """Decide latency, injected error kind and response for one request"""
+        with self._lock:
+            self.request_count += 1
+            self.recent_requests.append(params)
+            latency = self.latency.sample(self._rng)
+            error_kind = None
+            if self.error_kinds and self._rng.random() < self.error_rate:
+                error_kind = self._rng.choice(self.error_kinds)
+                self.errors[error_kind] += 1
+            scripted = self._script.pop(0) if self._script else None
+
+        if error_kind is not None:
+            return latency, error_kind, None
+        turn = scripted if scripted is not None else self.policy(params)
+        return latency, None, self._build_message(turn, params)
+
+    def default_policy(self, params: Dict[str, Any]) -> ScriptedTurn:
+        tool_names = {tool["name"] for tool in params.get("tools") or []}
+        question = _latest_question(params["messages"])
+        if tool_names and not _has_tool_results(params["messages"]):
+            with self._lock:
+                use_tool = self._rng.random() < self.tool_use_rate
+            if use_tool:
+                if "get_course_outline" in tool_names and any(
+                    word in question.lower() for word in OUTLINE_WORDS
+                ):
+                    return {
+                        "tool": "get_course_outline",
+                        "input": {"course_name": question},
+                    }
+                if "search_course_content" in tool_names:
+                    return {
+                        "tool": "search_course_content",
+                        "input": {"query": question},
+                    }
+
+        with self._lock:
+            words = [self._rng.choice(FILLER_WORDS) for _ in range(self.answer_words)]
+        return "Fake answer: " + " ".join(words)
+
+    def build_error(self, error_kind: str) -> Exception:
+        """Build the SDK exception a real provider failure would raise"""
+        request = httpx.Request("POST", FAKE_API_URL)
+        if error_kind == "timeout":
+            return anthropic.APITimeoutError(request=request)
+
+        status_code, error_class = {
+            "rate_limit": (429, anthropic.RateLimitError),
+            "overloaded": (529, anthropic.InternalServerError),
+            "server_error": (500, anthropic.InternalServerError),
+        }[error_kind]
+        response = httpx.Response(status_code, request=request)
+        return error_class(f"Fake {error_kind} error", response=response, body=None)
+
+    def _build_message(self, turn: ScriptedTurn, params: Dict[str, Any]) -> Message:
+        content = []
+        for part in turn if isinstance(turn, list) else [turn]:
+            if isinstance(part, str):
+                content.append(TextBlock(type="text", text=part))
+            else:
+                content.append(
+                    ToolUseBlock(
+                        type="tool_use",
+                        id=f"toolu_fake_{next(self._ids)}",
+                        name=part["tool"],
+                        input=part.get("input", {}),
+                    )
+                )
+
+        input_tokens = estimate_content_tokens(params.get("system")) + sum(
+            estimate_content_tokens(message["content"])
+            for message in params["messages"]
+        )
+        output_tokens = sum(
+            estimate_tokens(
+                getattr(block, "text", None) or str(getattr(block, "input", ""))
+            )
+            for block in content
+        )
+        return Message(
+            id=f"msg_fake_{next(self._ids)}",
+            type="message",
+            role="assistant",
+            model=params.get("model", "fake"),
+            content=content,
+            stop_reason=(
+                "tool_use" if any(b.type == "tool_use" for b in content) else "end_turn"
+            ),
+            stop_sequence=None,
+            usage=Usage(input_tokens=input_tokens, output_tokens=output_tokens),
+        )
+
+
+def _apply_request_timeout(params: Dict[str, Any], latency: float, error_kind):
+    """Like the SDK, give up with a timeout error once a per-request timeout passes"""
+    timeout = params.get("timeout")
+    if timeout is not None and latency > timeout:
+        return timeout, "timeout"
+    return latency, error_kind
+
+
+class _FakeMessages:
+    def __init__(self, backend: FakeLLMBackend):
+        self.backend = backend
+
+    def create(self, **params) -> Message:
+        latency, error_kind, message = self.backend.plan(params)
+        latency, error_kind = _apply_request_timeout(params, latency, error_kind)
+        time.sleep(latency)
+        if error_kind is not None:
+            raise self.backend.build_error(error_kind)
+        return message
+
+
+class FakeAnthropic:
+    """Drop-in for anthropic.Anthropic backed by a FakeLLMBackend"""
+
+    def __init__(self, backend: FakeLLMBackend):
+        self.messages = _FakeMessages(backend)
+
+    def close(self):
+        pass
+
+
+class _AsyncFakeStream:
+    """Mimics the SDK's async message stream: text_stream + get_final_message"""
+
+    def __init__(self, backend: FakeLLMBackend, params: Dict[str, Any]):
+        self.backend = backend
+        self.params = params
+        self._message: Optional[Message] = None
+
+    async def __aenter__(self):
+        latency, error_kind, message = self.backend.plan(self.params)
+        latency, error_kind = _apply_request_timeout(self.params, latency, error_kind)
+        first_token_latency = latency * self.backend.time_to_first_token_ratio
+        await asyncio.sleep(first_token_latency)
+        if error_kind is not None:
+            raise self.backend.build_error(error_kind)
+        self._message = message
+        self._remaining_latency = latency - first_token_latency
+        return self
+
+    async def __aexit__(self, *_exc_info):
+        return False
+
+    @property
+    def text_stream(self):
+        return self._iter_text()
+
+    async def _iter_text(self):
+        chunks = [
+            chunk
+            for block in self._message.content
+            if block.type == "text"
+            for chunk in re.findall(r"\S+\s*", block.text)
+        ]
+        delay = self._remaining_latency / len(chunks) if chunks else 0.0
+        for chunk in chunks:
+            yield chunk
+            await asyncio.sleep(delay)
+
+    async def get_final_message(self) -> Message:
+        return self._message
+
+
+class _AsyncFakeMessages:
+    def __init__(self, backend: FakeLLMBackend):
+        self.backend = backend
+
+    async def create(self, **params) -> Message:
+        latency, error_kind, message = self.backend.plan(params)
+        latency, error_kind = _apply_request_timeout(params, latency, error_kind)
+        await asyncio.sleep(latency)
+        if error_kind is not None:
+            raise self.backend.build_error(error_kind)
+        return message
+
+    def stream(self, **params) -> _AsyncFakeStream:
+        return _AsyncFakeStream(self.backend, params)
+
+
+class AsyncFakeAnthropic:
+    """Drop-in for anthropic.AsyncAnthropic backed by a FakeLLMBackend"""
+
+    def __init__(self, backend: FakeLLMBackend):
+        self.messages = _AsyncFakeMessages(backend)
+
+    async def close(self):
+        pass
+
+
+def create_fake_clients(
+    backend: FakeLLMBackend,
+) -> Tuple[FakeAnthropic, AsyncFakeAnthropic]:
+    """Sync and async fake clients sharing one backend"""
+    return FakeAnthropic(backend), AsyncFakeAnthropic(backend)
+
+
+def _latest_question(messages: List[Dict[str, Any]]) -> str:
+    """Text of the first user turn, without history or prompt wrapper"""
+    content = messages[0]["content"] if messages else ""
+    if isinstance(content, list):
+        content = content[-1].get("text", "") if content else ""
+    return content.removeprefix(PROMPT_PREFIX)
+
+
+def _has_tool_results(messages: List[Dict[str, Any]]) -> bool:
+    return any(
+        isinstance(message["content"], list)
+        and any(
+            isinstance(block, dict) and block.get("type") == "tool_result"
+            for block in message["content"]
+        )
+        for message in messages
+    )
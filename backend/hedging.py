@@ -0,0 +1,189 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, wait
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from percentiles import percentile
+
+
+class HedgePolicy:
+    """
+    Decides when a slow LLM call gets a duplicate ("hedge") request.
+
+    A call is hedged once it has run longer than the observed latency
+    quantile for its round (never sooner than min_delay_seconds). Each call
+    earns max_hedge_ratio hedge credits and each hedge spends one, which
+    caps hedges at roughly that share of calls.
+    """
+
+    def __init__(
+        self,
+        min_delay_seconds: float = 2.0,
+        max_hedge_ratio: float = 0.05,
+        quantile: float = 0.95,
+        window_size: int = 200,
+        min_samples: int = 20,
+    ):
+        self.min_delay_seconds = min_delay_seconds
+        self.max_hedge_ratio = max_hedge_ratio
+        self.quantile = quantile
+        self.window_size = window_size
+        self.min_samples = min_samples
+
+        self._lock = threading.Lock()
+        self._latencies: Dict[int, deque] = {}
+        self._credits = 0.0
+        self._stats = {
+            "calls": 0,
+            "hedges_issued": 0,
+            "hedges_won": 0,
+            "hedges_suppressed": 0,
+        }
+
+    def start(self, round_index: int) -> Optional[float]:
+        """Register a call; returns the hedge delay, or None to never hedge"""
+        with self._lock:
+            self._stats["calls"] += 1
+            self._credits = min(self._credits + self.max_hedge_ratio, 1.0)
+            samples = self._latencies.get(round_index)
+            if not samples or len(samples) < self.min_samples:
+                return None
+            threshold = percentile(sorted(samples), self.quantile)
+        return max(threshold, self.min_delay_seconds)
+
+    def try_hedge(self) -> bool:
+        """Spend a hedge credit; False when the hedge-rate cap is reached"""
+        with self._lock:
+            if self._credits < 1.0:
+                self._stats["hedges_suppressed"] += 1
+                return False
+            self._credits -= 1.0
+            self._stats["hedges_issued"] += 1
+            return True
+
+    def record(self, round_index: int, latency_seconds: float, hedge_won: bool):
+        """Record the latency the caller saw and whether the hedge answered"""
+        with self._lock:
+            samples = self._latencies.setdefault(
+                round_index, deque(maxlen=self.window_size)
+            )
+            samples.append(latency_seconds)
+            if hedge_won:
+                self._stats["hedges_won"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hedge counters and the current per-round hedge thresholds"""
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            thresholds = {
+                str(round_index): round(
+                    percentile(sorted(samples), self.quantile) * 1000
+                )
+                for round_index, samples in self._latencies.items()
+                if samples
+            }
+        stats["hedge_rate"] = (
+            stats["hedges_issued"] / stats["calls"] if stats["calls"] else 0.0
+        )
+        stats["hedge_win_rate"] = (
+            stats["hedges_won"] / stats["hedges_issued"]
+            if stats["hedges_issued"]
+            else 0.0
+        )
+        stats["round_p95_ms"] = thresholds
+        return stats
+
+
+def hedged_call(
+    policy: HedgePolicy,
+    round_index: int,
+    fn: Callable[[], Any],
+    executor: Executor,
+    on_late_result: Optional[Callable[[Any], None]] = None,
+) -> Any:
+    """
+    Run a blocking call, duplicating it if it outlives the hedge delay.
+
+    The first successful result wins. A blocking request can't be aborted,
+    so the loser runs to completion and its result goes to on_late_result.
+    """
+    started = time.perf_counter()
+    delay = policy.start(round_index)
+    if delay is None:
+        result = fn()
+        policy.record(round_index, time.perf_counter() - started, hedge_won=False)
+        return result
+
+    primary = executor.submit(fn)
+    done, _ = wait([primary], timeout=delay)
+    if done or not policy.try_hedge():
+        result = primary.result()
+        policy.record(round_index, time.perf_counter() - started, hedge_won=False)
+        return result
+
+    hedge = executor.submit(fn)
+    pending = {primary, hedge}
+    winner = None
+    error = None
+    while pending and winner is None:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                winner = future
+                break
+            error = future.exception()
+    if winner is None:
+        raise error
+
+    for loser in pending:
+        if on_late_result is not None:
+            loser.add_done_callback(
+                lambda future: future.exception() is None
+                and on_late_result(future.result())
+            )
+    policy.record(round_index, time.perf_counter() - started, hedge_won=winner is hedge)
+    return winner.result()
+
+
+async def ahedged_call(
+    policy: HedgePolicy, round_index: int, fn: Callable[[], Awaitable[Any]]
+) -> Any:
+    """Async variant of hedged_call; the losing request is cancelled"""
+    started = time.perf_counter()
+    delay = policy.start(round_index)
+    if delay is None:
+        result = await fn()
+        policy.record(round_index, time.perf_counter() - started, hedge_won=False)
+        return result
+
+    primary = asyncio.ensure_future(fn())
+    pending = {primary}
+    try:
+        done, _ = await asyncio.wait(pending, timeout=delay)
+        if done or not policy.try_hedge():
+            result = await primary
+            policy.record(round_index, time.perf_counter() - started, hedge_won=False)
+            return result
+
+        hedge = asyncio.ensure_future(fn())
+        pending.add(hedge)
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    policy.record(
+                        round_index,
+                        time.perf_counter() - started,
+                        hedge_won=task is hedge,
+                    )
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
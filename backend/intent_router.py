@@ -0,0 +1,158 @@
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Phrases that ask for a course's structure rather than its content
+OUTLINE_PATTERN = re.compile(
+    r"\b("
+    r"outline|syllabus|curriculum|table of contents|course structure"
+    r"|lesson list|list of (?:the |all )?lessons"
+    r"|(?:list|show|give|what are)(?: me)?(?: all)?(?: the)? lessons"
+    r"|lessons (?:in|of|for) |how many lessons"
+    r")"
+)
+
+# Signals that the user wants an explanation, which only the model can give
+CONTENT_PATTERN = re.compile(
+    r"\b("
+    r"explain|why|how (?:do|does|to|can)|difference|compare|summari[sz]e"
+    r"|teach|taught|covered in|about lesson|lesson \d+"
+    r")\b"
+)
+
+# Title words too generic to identify a course on their own
+TITLE_STOPWORDS = {
+    "a",
+    "ai",
+    "an",
+    "and",
+    "apps",
+    "build",
+    "building",
+    "for",
+    "in",
+    "of",
+    "the",
+    "to",
+    "towards",
+    "use",
+    "with",
+}
+
+
+@dataclass
+class RoutedIntent:
+    """A query the router can answer without the model"""
+
+    intent: str
+    course_title: str
+
+
+class IntentRouter:
+    """Rule-based classifier that answers obvious outline requests locally"""
+
+    def __init__(
+        self,
+        course_titles_fn: Callable[[], List[str]],
+        title_match_threshold: float = 0.6,
+    ):
+        self.course_titles_fn = course_titles_fn
+        self.title_match_threshold = title_match_threshold
+
+        self._lock = threading.Lock()
+        self._title_index: Tuple[Tuple[str, ...], Dict[str, set], set] = ((), {}, set())
+        self._counts = {
+            "routed": 0,
+            "no_intent": 0,
+            "content_question": 0,
+            "no_course": 0,
+            "ambiguous_course": 0,
+        }
+        self._route_seconds = 0.0
+
+    def route(self, query: str) -> Optional[RoutedIntent]:
+        """
+        Classify a query, returning None whenever the model should decide.
+
+        Only outline requests that name exactly one catalog course are routed.
+        """
+        started = time.perf_counter()
+        outcome, routed = self._classify(query)
+        with self._lock:
+            self._counts[outcome] += 1
+            self._route_seconds += time.perf_counter() - started
+        return routed
+
+    def _classify(self, query: str) -> Tuple[str, Optional[RoutedIntent]]:
+        text = " ".join(re.findall(r"[\w-]+", query.lower()))
+        if not OUTLINE_PATTERN.search(text):
+            return "no_intent", None
+        if CONTENT_PATTERN.search(text):
+            return "content_question", None
+
+        matches = self._match_course_titles(set(text.split()))
+        if not matches:
+            return "no_course", None
+        if len(matches) > 1:
+            return "ambiguous_course", None
+        return "routed", RoutedIntent(intent="outline", course_title=matches[0])
+
+    def mentions_course(self, query: str) -> bool:
+        """Whether the query names at least one catalog course"""
+        words = set(re.findall(r"[\w-]+", query.lower()))
+        return bool(self._match_course_titles(words))
+
+    def _match_course_titles(self, query_words: set) -> List[str]:
+        """Titles the query names, by share of title words or a distinctive word"""
+        title_words, distinctive_words = self._get_title_index()
+
+        matches = []
+        for title, words in title_words.items():
+            if not words:
+                continue
+            shared = words & query_words
+            coverage = len(shared) / len(words)
+            if coverage >= self.title_match_threshold or shared & distinctive_words:
+                matches.append(title)
+        return matches
+
+    def _get_title_index(self) -> Tuple[Dict[str, set], set]:
+        """Word sets per title, rebuilt only when the catalog changes"""
+        titles = tuple(self.course_titles_fn())
+        with self._lock:
+            cached_titles, title_words, distinctive_words = self._title_index
+            if cached_titles == titles:
+                return title_words, distinctive_words
+
+        title_words = {title: _title_words(title) for title in titles}
+        word_counts: Dict[str, int] = {}
+        for words in title_words.values():
+            for word in words:
+                word_counts[word] = word_counts.get(word, 0) + 1
+        # A word found in exactly one title identifies that course by itself
+        distinctive_words = {
+            word for word, count in word_counts.items() if count == 1 and len(word) > 2
+        }
+
+        with self._lock:
+            self._title_index = (titles, title_words, distinctive_words)
+        return title_words, distinctive_words
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Routing outcome counters, routed share and mean classification time"""
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._counts)
+            route_seconds = self._route_seconds
+
+        total = sum(stats.values())
+        stats["total"] = total
+        stats["routed_ratio"] = stats["routed"] / total if total else 0.0
+        stats["avg_route_ms"] = route_seconds * 1000 / total if total else 0.0
+        return stats
+
+
+def _title_words(title: str) -> set:
+    words = re.findall(r"[\w-]+", title.lower())
+    return {word for word in words if word not in TITLE_STOPWORDS}
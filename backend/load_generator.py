@@ -0,0 +1,188 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import httpx
+from percentiles import percentile_ms
+
+DEFAULT_QUERIES = [
+    "What is covered in lesson 1 of the MCP course?",
+    "How does prompt compression reduce cost?",
+    "Show me the outline of the Chroma course",
+    "What are embeddings used for in retrieval?",
+    "Explain tool use in the computer use course",
+    "What is query optimization?",
+]
+
+
+@dataclass
+class RequestResult:
+    """Outcome of one load-test request"""
+
+    latency_seconds: float
+    error: Optional[str] = None
+
+
+async def run_load(
+    url: str,
+    rps: float,
+    duration_seconds: float,
+    queries: Sequence[str] = DEFAULT_QUERIES,
+    max_in_flight: int = 1000,
+    timeout_seconds: float = 60.0,
+    poisson: bool = False,
+    seed: Optional[int] = None,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> Dict[str, Any]:
+    """
+    Drive POST /api/query open-loop at a target request rate.
+
+    Requests are sent on schedule regardless of how slowly earlier ones
+    complete, so queueing in the server shows up as latency, not as a lower
+    offered load. Arrivals beyond max_in_flight are counted as dropped.
+
+    Returns:
+        Summary dict (see summarize)
+    """
+    rng = random.Random(seed)
+    total_requests = int(rps * duration_seconds)
+    limits = httpx.Limits(max_connections=max_in_flight)
+    results: List[RequestResult] = []
+    in_flight = 0
+    tasks = []
+
+    async def send(client: httpx.AsyncClient, query: str):
+        nonlocal in_flight
+        in_flight += 1
+        started = time.perf_counter()
+        try:
+            response = await client.post(f"{url}/api/query", json={"query": query})
+            error = (
+                None if response.status_code == 200 else f"http_{response.status_code}"
+            )
+        except httpx.TimeoutException:
+            error = "timeout"
+        except httpx.HTTPError as e:
+            error = type(e).__name__
+        finally:
+            in_flight -= 1
+        results.append(RequestResult(time.perf_counter() - started, error))
+
+    async with httpx.AsyncClient(
+        timeout=timeout_seconds, limits=limits, transport=transport
+    ) as client:
+        started = time.perf_counter()
+        next_send = started
+        for _ in range(total_requests):
+            delay = next_send - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if in_flight >= max_in_flight:
+                results.append(RequestResult(0.0, "dropped"))
+            else:
+                tasks.append(asyncio.create_task(send(client, rng.choice(queries))))
+            next_send += rng.expovariate(rps) if poisson else 1 / rps
+
+        await asyncio.gather(*tasks)
+        wall_seconds = time.perf_counter() - started
+
+    return summarize(results, wall_seconds, target_rps=rps)
+
+
+def summarize(
+    results: List[RequestResult], wall_seconds: float, target_rps: float = 0.0
+) -> Dict[str, Any]:
+    """Throughput, latency percentiles of successful requests and error counts"""
+    successes = sorted(
+        result.latency_seconds for result in results if result.error is None
+    )
+    errors = Counter(result.error for result in results if result.error is not None)
+    return {
+        "target_rps": target_rps,
+        "requests": len(results),
+        "succeeded": len(successes),
+        "failed": sum(errors.values()),
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_rps": (
+            round(len(successes) / wall_seconds, 2) if wall_seconds else 0.0
+        ),
+        "latency_ms": {
+            name: percentile_ms(successes, quantile)
+            for name, quantile in (
+                ("p50", 0.5),
+                ("p95", 0.95),
+                ("p99", 0.99),
+                ("max", 1.0),
+            )
+        },
+        "errors": dict(errors.most_common()),
+    }
+
+
+def format_report(summary: Dict[str, Any]) -> str:
+    latency = summary["latency_ms"]
+    lines = [
+        f"Target rate:  {summary['target_rps']} req/s",
+        f"Requests:     {summary['requests']} "
+        f"({summary['succeeded']} ok, {summary['failed']} failed)",
+        f"Throughput:   {summary['throughput_rps']} req/s over "
+        f"{summary['wall_seconds']} s",
+        f"Latency (ms): p50={latency['p50']} p95={latency['p95']} "
+        f"p99={latency['p99']} max={latency['max']}",
+    ]
+    if summary["errors"]:
+        lines.append("Errors:")
+        lines.extend(f"  {kind}: {count}" for kind, count in summary["errors"].items())
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Load-test /api/query at a target request rate. Start the server "
+            "with LLM_BACKEND=fake to benchmark without the real provider."
+        )
+    )
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--rps", type=float, default=10.0)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds")
+    parser.add_argument("--max-in-flight", type=int, default=1000)
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds")
+    parser.add_argument(
+        "--poisson", action="store_true", help="exponential inter-arrival times"
+    )
+    parser.add_argument("--queries", help="file with one query per line")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--json", dest="json_path", help="also write the summary here")
+    args = parser.parse_args()
+
+    queries = DEFAULT_QUERIES
+    if args.queries:
+        with open(args.queries, "r", encoding="utf-8") as file:
+            queries = [line.strip() for line in file if line.strip()]
+
+    summary = asyncio.run(
+        run_load(
+            args.url,
+            args.rps,
+            args.duration,
+            queries=queries,
+            max_in_flight=args.max_in_flight,
+            timeout_seconds=args.timeout,
+            poisson=args.poisson,
+            seed=args.seed,
+        )
+    )
+    print(format_report(summary))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as file:
+            json.dump(summary, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+import bisect
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from request_timing import record_llm_round, record_stage, record_tool
+
+# Seconds; spans a cached lookup (sub-millisecond) up to a slow LLM round
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+
+class _Metric(ABC):
+    """A named metric family; one series per distinct label-value tuple"""
+
+    type_name = ""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if len(labels) != len(self.label_names):
+            raise ValueError(f"{self.name} takes labels {self.label_names}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def _label_text(self, key: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [
+            f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, key)
+        ]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        lines.extend(self._render_samples())
+        return lines
+
+    @abstractmethod
+    def _render_samples(self) -> List[str]:
+        """Sample lines of every series, after the HELP and TYPE lines"""
+        pass
+
+
+class Counter(_Metric):
+    """Monotonic total, e.g. queries served or tokens used"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        super().__init__(name, help_text, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f"{self.name}_total{self._label_text(key)} {_number(value)}"
+            for key, value in values
+        ]
+
+
+class _HistogramSeries:
+    __slots__ = ("bucket_counts", "count", "sum")
+
+    def __init__(self, bucket_count: int):
+        self.bucket_counts = [0] * bucket_count
+        self.count = 0
+        self.sum = 0.0
+
+
+class Histogram(_Metric):
+    """
+    Distribution of observed values in fixed buckets.
+
+    An observation costs one bisect and a few additions under the metric's
+    lock; buckets are cumulated only when rendered.
+    """
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], _HistogramSeries] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _HistogramSeries(len(self.buckets) + 1)
+            series.bucket_counts[index] += 1
+            series.count += 1
+            series.sum += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the seconds spent in the block, including when it raises"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def snapshot(self, **labels: str) -> Optional[Tuple[int, float]]:
+        """(count, sum) of one series, or None if it has no observations"""
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return (series.count, series.sum) if series else None
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            series_items = [
+                (key, list(series.bucket_counts), series.count, series.sum)
+                for key, series in sorted(self._series.items())
+            ]
+        lines = []
+        for key, bucket_counts, count, total in series_items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                le = self._label_text(key, f'le="{_number(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            le = self._label_text(key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {count}")
+            lines.append(f"{self.name}_sum{self._label_text(key)} {_number(total)}")
+            lines.append(f"{self.name}_count{self._label_text(key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """The metrics a process exports, rendered in Prometheus text format"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+
+    def counter(
+        self, name: str, help_text: str, label_names: Sequence[str] = ()
+    ) -> Counter:
+        return self._register(Counter(name, help_text, label_names))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, help_text, label_names, buckets))
+
+    def _register(self, metric: _Metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                # Re-imports (and tests) get the metric already registered
+                if type(existing) is not type(metric):
+                    raise ValueError(f"Metric {metric.name} already registered")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    return repr(float(value))
+
+
+# Process-wide registry and the metrics the query pipeline records
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "rag_stage_duration_seconds",
+    "Time spent in one stage of answering a query",
+    ("stage",),
+)
+LLM_ROUND_SECONDS = REGISTRY.histogram(
+    "rag_llm_round_duration_seconds",
+    "Time for one provider call of the tool loop, hedges and retries included",
+    ("model", "mode"),
+)
+LLM_TOKENS = REGISTRY.counter(
+    "rag_llm_tokens", "Tokens billed by the provider", ("model", "kind")
+)
+TOOL_SECONDS = REGISTRY.histogram(
+    "rag_tool_duration_seconds", "Time to execute one tool call", ("tool", "outcome")
+)
+QUERY_SECONDS = REGISTRY.histogram(
+    "rag_query_duration_seconds",
+    "End-to-end time to answer a query, session queueing included, by outcome",
+    ("outcome",),
+)
+QUERIES = REGISTRY.counter(
+    "rag_queries_answered",
+    "Answered queries by how the answer was produced",
+    ("mode",),
+)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time one pipeline stage into its histogram and the request's timings"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        STAGE_SECONDS.observe(seconds, stage=name)
+        record_stage(name, seconds)
+
+
+class LLMRound:
+    """Handed to the body of llm_round(); set response once the call returns"""
+
+    __slots__ = ("response",)
+
+    def __init__(self):
+        self.response = None
+
+
+@contextmanager
+def llm_round(model: str, mode: str) -> Iterator[LLMRound]:
+    """Time one provider round, recording its token counts for the request"""
+    current = LLMRound()
+    started = time.perf_counter()
+    error = None
+    try:
+        yield current
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        seconds = time.perf_counter() - started
+        LLM_ROUND_SECONDS.observe(seconds, model=model, mode=mode)
+        record_llm_round(model, seconds, current.response, error)
+
+
+def observe_tool(name: str, seconds: float, outcome: str):
+    """Record one tool execution in its histogram and the request's timings"""
+    TOOL_SECONDS.observe(seconds, tool=name, outcome=outcome)
+    record_tool(name, seconds, outcome)
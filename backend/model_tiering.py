@@ -0,0 +1,121 @@
+import re
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from percentiles import percentile_ms
+
+# Course vocabulary that means the answer needs retrieval and synthesis
+COURSE_REFERENCE_PATTERN = re.compile(
+    r"\b(course|lesson|module|instructor|syllabus)s?\b"
+)
+
+# Requests for multi-step reasoning rather than a short factual answer
+REASONING_PATTERN = re.compile(
+    r"\b(why|compare|comparison|difference|trade-?offs?|pros and cons"
+    r"|step by step|in detail|walk me through|design|analy[sz]e)\b"
+)
+
+
+@dataclass(frozen=True)
+class ModelTier:
+    """A model and its output cap"""
+
+    name: str
+    model: str
+    max_tokens: int
+
+
+class ModelTierRouter:
+    """
+    Sends simple queries to a fast model tier and hard ones to the main tier.
+
+    Complexity is a weighted score in [0, 1] from cheap local features:
+    query length, a course reference, conversation depth and reasoning cues.
+    Queries scoring below the threshold go to the fast tier.
+    """
+
+    LENGTH_WEIGHT = 0.35
+    COURSE_WEIGHT = 0.25
+    HISTORY_WEIGHT = 0.2
+    REASONING_WEIGHT = 0.4
+    LONG_QUERY_WORDS = 40
+    DEEP_HISTORY_LINES = 4
+
+    def __init__(
+        self,
+        main_tier: ModelTier,
+        fast_tier: ModelTier,
+        complexity_threshold: float = 0.25,
+        course_reference_fn: Optional[Callable[[str], bool]] = None,
+        sample_size: int = 500,
+    ):
+        self.main_tier = main_tier
+        self.fast_tier = fast_tier
+        self.complexity_threshold = complexity_threshold
+        self.course_reference_fn = course_reference_fn
+
+        self._lock = threading.Lock()
+        self._latencies = {
+            tier.name: deque(maxlen=sample_size) for tier in (main_tier, fast_tier)
+        }
+        self._counts = {tier.name: 0 for tier in (main_tier, fast_tier)}
+
+    def score(self, query: str, conversation_history: Optional[str] = None) -> float:
+        """Complexity of a query in [0, 1]"""
+        text = query.lower()
+        words = len(text.split())
+        history_lines = (
+            len(conversation_history.splitlines()) if conversation_history else 0
+        )
+
+        score = self.LENGTH_WEIGHT * min(words / self.LONG_QUERY_WORDS, 1.0)
+        score += self.HISTORY_WEIGHT * min(history_lines / self.DEEP_HISTORY_LINES, 1.0)
+        if self._references_course(text):
+            score += self.COURSE_WEIGHT
+        if REASONING_PATTERN.search(text):
+            score += self.REASONING_WEIGHT
+        return min(score, 1.0)
+
+    def select(
+        self, query: str, conversation_history: Optional[str] = None
+    ) -> ModelTier:
+        """Pick the tier for one request"""
+        if self.score(query, conversation_history) < self.complexity_threshold:
+            tier = self.fast_tier
+        else:
+            tier = self.main_tier
+        with self._lock:
+            self._counts[tier.name] += 1
+        return tier
+
+    def record_latency(self, tier: ModelTier, latency_seconds: float):
+        with self._lock:
+            self._latencies[tier.name].append(latency_seconds)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-tier request counts and p50/p95 generation latency"""
+        with self._lock:
+            counts = dict(self._counts)
+            latencies = {
+                name: sorted(samples) for name, samples in self._latencies.items()
+            }
+
+        total = sum(counts.values())
+        stats: Dict[str, Any] = {"threshold": self.complexity_threshold}
+        for tier in (self.main_tier, self.fast_tier):
+            samples = latencies[tier.name]
+            stats[tier.name] = {
+                "model": tier.model,
+                "requests": counts[tier.name],
+                "share": counts[tier.name] / total if total else 0.0,
+                "p50_ms": percentile_ms(samples, 0.5),
+                "p95_ms": percentile_ms(samples, 0.95),
+            }
+        return stats
+
+    def _references_course(self, text: str) -> bool:
+        if COURSE_REFERENCE_PATTERN.search(text):
+            return True
+        return bool(self.course_reference_fn and self.course_reference_fn(text))
@@ -0,0 +1,15 @@
+import math
+from typing import Sequence
+
+
+def percentile(sorted_samples: Sequence[float], quantile: float) -> float:
+    """Nearest-rank percentile of an already sorted list; 0 when it is empty"""
+    if not sorted_samples:
+        return 0.0
+    rank = max(math.ceil(quantile * len(sorted_samples)) - 1, 0)
+    return sorted_samples[min(rank, len(sorted_samples) - 1)]
+
+
+def percentile_ms(sorted_samples: Sequence[float], quantile: float) -> float:
+    """percentile() of samples in seconds, as milliseconds for stats output"""
+    return round(percentile(sorted_samples, quantile) * 1000, 1)
@@ -1,11 +1,42 @@
+import asyncio
+import contextvars
+import functools
 import os
-from typing import Dict, List, Optional, Tuple
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
 
 from ai_generator import AIGenerator
+from answer_cache import AnswerCache, CachedAnswer
+from deadline import Deadline, DeadlineExceeded
 from document_processor import DocumentProcessor
+from fake_llm import FakeLLMBackend, LatencyDistribution, create_fake_clients
+from hedging import HedgePolicy
+from intent_router import IntentRouter
+from metrics import QUERIES, QUERY_SECONDS, stage
+from model_tiering import ModelTier, ModelTierRouter
 from models import Course
-from search_tools import CourseOutlineTool, CourseSearchTool, ToolManager
+from request_timing import record_stage
+from resilience import (
+    AdaptiveConcurrencyLimiter,
+    CircuitBreaker,
+    LLMGuard,
+    LLMUnavailableError,
+    RetryBudget,
+)
+from search_tools import CourseOutlineTool, CourseSearchTool, ToolContext, ToolManager
 from session_manager import SessionManager
+from session_queue import SessionRequestQueue
+from session_store import create_session_store
+from singleflight import SingleFlight
+from speculative_retrieval import (
+    SpeculationStats,
+    SpeculativeToolManager,
+    finish_speculative_search,
+    start_speculative_search,
+)
+from token_budget import TokenBudget
 from vector_store import VectorStore
 
 
@@ -20,15 +51,127 @@ class RAGSystem:
             config.CHUNK_SIZE, config.CHUNK_OVERLAP
         )
         self.vector_store = VectorStore(
-            config.CHROMA_PATH, config.EMBEDDING_MODEL, config.MAX_RESULTS
+            config.CHROMA_PATH,
+            config.EMBEDDING_MODEL,
+            config.MAX_RESULTS,
+            max_distance=config.SEARCH_MAX_DISTANCE,
+            adaptive_k=config.SEARCH_ADAPTIVE_K,
+            min_score_gap=config.SEARCH_MIN_SCORE_GAP,
+            min_results=config.SEARCH_MIN_RESULTS,
+            hnsw_settings={
+                "space": config.HNSW_SPACE,
+                "M": config.HNSW_M,
+                "construction_ef": config.HNSW_CONSTRUCTION_EF,
+                "search_ef": config.HNSW_SEARCH_EF,
+            },
         )
+        # Shared by the generator and the session manager's history trimming
+        self.token_budget = TokenBudget(
+            prompt_budget=config.PROMPT_TOKEN_BUDGET,
+            history_budget=config.HISTORY_TOKEN_BUDGET,
+            tool_result_budget=config.TOOL_RESULT_TOKEN_BUDGET,
+        )
+        client = async_client = None
+        if config.LLM_BACKEND == "fake":
+            client, async_client = create_fake_clients(
+                FakeLLMBackend(
+                    latency=LatencyDistribution.parse(config.FAKE_LLM_LATENCY),
+                    error_rate=config.FAKE_LLM_ERROR_RATE,
+                    tool_use_rate=config.FAKE_LLM_TOOL_USE_RATE,
+                    seed=config.FAKE_LLM_SEED,
+                )
+            )
         self.ai_generator = AIGenerator(
             config.ANTHROPIC_API_KEY,
             config.ANTHROPIC_MODEL,
             config.ANTHROPIC_TIMEOUT_SECONDS,
             config.ANTHROPIC_MAX_RETRIES,
+            max_tokens=config.ANTHROPIC_MAX_TOKENS,
+            max_connections=config.ANTHROPIC_MAX_CONNECTIONS,
+            max_keepalive_connections=config.ANTHROPIC_MAX_KEEPALIVE_CONNECTIONS,
+            tool_max_workers=config.TOOL_MAX_WORKERS,
+            tool_timeout_seconds=config.TOOL_TIMEOUT_SECONDS,
+            token_budget=self.token_budget,
+            client=client,
+            async_client=async_client,
+            llm_guard=LLMGuard(
+                limiter=AdaptiveConcurrencyLimiter(
+                    initial_limit=config.LLM_CONCURRENCY_INITIAL,
+                    max_limit=config.LLM_CONCURRENCY_MAX,
+                    latency_target_seconds=config.LLM_LATENCY_TARGET_SECONDS,
+                ),
+                breaker=CircuitBreaker(
+                    failure_rate_threshold=config.LLM_BREAKER_FAILURE_RATE,
+                    reset_seconds=config.LLM_BREAKER_RESET_SECONDS,
+                ),
+                retry_budget=RetryBudget(ratio=config.LLM_RETRY_BUDGET_RATIO),
+                max_retries=config.ANTHROPIC_MAX_RETRIES,
+            ),
+            hedge_policy=(
+                HedgePolicy(
+                    min_delay_seconds=config.HEDGE_MIN_DELAY_SECONDS,
+                    max_hedge_ratio=config.HEDGE_MAX_RATIO,
+                )
+                if config.HEDGE_ENABLED
+                else None
+            ),
         )
-        self.session_manager = SessionManager(config.MAX_HISTORY)
+        self.session_manager = SessionManager(
+            config.MAX_HISTORY,
+            max_sessions=config.MAX_SESSIONS,
+            ttl_seconds=config.SESSION_TTL_SECONDS,
+            store=create_session_store(
+                config.SESSION_BACKEND,
+                db_path=config.SESSION_DB_PATH,
+                flush_interval_seconds=config.SESSION_FLUSH_INTERVAL_SECONDS,
+                ttl_seconds=config.SESSION_TTL_SECONDS,
+            ),
+            cache_seconds=config.SESSION_CACHE_SECONDS,
+            # Trims long histories on message boundaries before the prompt
+            fit_history=self.token_budget.fit_history,
+        )
+        # Serializes concurrent requests within one session
+        self.session_queue = SessionRequestQueue()
+
+        # Answer cache in front of the tool loop for history-free queries
+        self.answer_cache = None
+        if config.ANSWER_CACHE_ENABLED:
+            self.answer_cache = AnswerCache(
+                max_entries=config.ANSWER_CACHE_MAX_ENTRIES,
+                ttl_seconds=config.ANSWER_CACHE_TTL_SECONDS,
+                similarity_threshold=config.ANSWER_CACHE_SIMILARITY_THRESHOLD,
+                embed_fn=(
+                    self.vector_store.embedding_function
+                    if config.ANSWER_CACHE_SIMILARITY_THRESHOLD > 0
+                    else None
+                ),
+            )
+
+        # Local classifier that answers obvious outline requests without the LLM
+        self.intent_router = None
+        if config.INTENT_ROUTER_ENABLED:
+            self.intent_router = IntentRouter(
+                self.vector_store.get_existing_course_titles
+            )
+
+        # Optional fast model tier for simple queries; course mentions are
+        # detected with the intent router's catalog title matching
+        if config.MODEL_TIERING_ENABLED:
+            self.ai_generator.model_router = ModelTierRouter(
+                main_tier=ModelTier(
+                    "main", config.ANTHROPIC_MODEL, config.ANTHROPIC_MAX_TOKENS
+                ),
+                fast_tier=ModelTier(
+                    "fast", config.FAST_MODEL, config.FAST_MODEL_MAX_TOKENS
+                ),
+                complexity_threshold=config.MODEL_TIER_COMPLEXITY_THRESHOLD,
+                course_reference_fn=(
+                    self.intent_router.mentions_course if self.intent_router else None
+                ),
+            )
+
+        # Identical history-free queries in flight at once share one answer
+        self.single_flight = SingleFlight() if config.SINGLE_FLIGHT_ENABLED else None
 
         # Initialize search tools
         self.tool_manager = ToolManager()
@@ -37,6 +180,22 @@ class RAGSystem:
         self.tool_manager.register_tool(self.search_tool)
         self.tool_manager.register_tool(self.outline_tool)
 
+        # Optional speculative search on the raw query, run while the first
+        # LLM round is in flight
+        self.speculation_stats = SpeculationStats()
+        self.speculation_executor = None
+        if config.SPECULATIVE_RETRIEVAL_ENABLED:
+            self.speculation_executor = ThreadPoolExecutor(
+                max_workers=config.SPECULATIVE_MAX_WORKERS,
+                thread_name_prefix="speculative-search",
+            )
+
+        # Dedicated, sized pool for blocking query work so a burst can't
+        # pile up in the loop's shared default executor
+        self.query_executor = ThreadPoolExecutor(
+            max_workers=config.QUERY_MAX_WORKERS, thread_name_prefix="query"
+        )
+
     def add_course_document(self, file_path: str) -> Tuple[Course, int]:
         """
         Add a single course document to the knowledge base.
@@ -122,8 +281,16 @@ class RAGSystem:
 
         return total_courses, total_chunks
 
+    CONTENT_QUERY_FALLBACK = (
+        "Sorry, I couldn't process that course-content request right now. "
+        "Please try again."
+    )
+
     def query(
-        self, query: str, session_id: Optional[str] = None
+        self,
+        query: str,
+        session_id: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
     ) -> Tuple[str, List[str]]:
         """
         Process a user query using the RAG system with tool-based search.
@@ -131,46 +298,498 @@ class RAGSystem:
         Args:
             query: User's question
             session_id: Optional session ID for conversation context
+            deadline: Optional time budget; once spent, no new provider or
+                search call starts and the exchange is not recorded
 
         Returns:
             Tuple of (response, sources list - empty for tool-based approach)
         """
-        # Create prompt for the AI with clear instructions
-        prompt = f"""Answer this question about course materials: {query}"""
+        with self._observe_query():
+            return self._query(query, session_id, deadline)
 
-        # Get conversation history if session exists
-        history = None
-        if session_id:
-            history = self.session_manager.get_conversation_history(session_id)
+    def _query(
+        self, query: str, session_id: Optional[str], deadline: Optional[Deadline]
+    ) -> Tuple[str, List[str]]:
+        started = time.perf_counter()
+        routed = self._route_query(query)
+        if routed is not None:
+            return self._finish_query(
+                query, session_id, routed, [], deadline, mode="routed"
+            )
+
+        prompt = self._build_prompt(query)
+        history = self._get_history(session_id)
+
+        index_version = self._current_index_version()
+        cached = self._lookup_cached_answer(query, history, index_version)
+        if cached:
+            return self._finish_query(
+                query,
+                session_id,
+                cached.answer,
+                cached.sources,
+                deadline,
+                mode="cached",
+            )
+
+        generate = functools.partial(
+            self._generate_answer, query, prompt, history, deadline
+        )
+        if self.single_flight is None or history:
+            (response, sources, cacheable), shared = generate(), False
+        else:
+            (response, sources, cacheable), shared = self.single_flight.do(
+                self._coalescing_key(query), generate
+            )
+
+        # Only the caller that did the work stores the shared answer
+        if cacheable and not shared:
+            self._store_cached_answer(
+                query, history, index_version, response, sources, started
+            )
 
+        return self._finish_query(
+            query,
+            session_id,
+            response,
+            sources,
+            deadline,
+            mode=self._answer_mode(cacheable, shared),
+        )
+
+    async def aquery(
+        self,
+        query: str,
+        session_id: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> Tuple[str, List[str]]:
+        """
+        Async variant of query that awaits the provider without a thread.
+
+        Requests for the same session run one at a time, in arrival order.
+
+        Args:
+            query: User's question
+            session_id: Optional session ID for conversation context
+            deadline: Optional time budget, as for query
+
+        Returns:
+            Tuple of (response, sources list)
+        """
+        with self._observe_query():
+            async with self.session_queue.hold(session_id) as queue_wait_seconds:
+                record_stage("session_queue", queue_wait_seconds)
+                return await self._aquery(query, session_id, deadline)
+
+    async def _aquery(
+        self, query: str, session_id: Optional[str], deadline: Optional[Deadline]
+    ) -> Tuple[str, List[str]]:
+        started = time.perf_counter()
+        routed = await self._aroute_query(query)
+        if routed is not None:
+            return self._finish_query(
+                query, session_id, routed, [], deadline, mode="routed"
+            )
+
+        prompt = self._build_prompt(query)
+        history = self._get_history(session_id)
+
+        index_version = self._current_index_version()
+        cached = await self._acache_call(
+            self._lookup_cached_answer, query, history, index_version
+        )
+        if cached:
+            return self._finish_query(
+                query,
+                session_id,
+                cached.answer,
+                cached.sources,
+                deadline,
+                mode="cached",
+            )
+
+        generate = functools.partial(
+            self._agenerate_answer, query, prompt, history, deadline
+        )
+        if self.single_flight is None or history:
+            (response, sources, cacheable), shared = await generate(), False
+        else:
+            (response, sources, cacheable), shared = await self.single_flight.ado(
+                self._coalescing_key(query), generate
+            )
+
+        if cacheable and not shared:
+            await self._acache_call(
+                self._store_cached_answer,
+                query,
+                history,
+                index_version,
+                response,
+                sources,
+                started,
+            )
+
+        return self._finish_query(
+            query,
+            session_id,
+            response,
+            sources,
+            deadline,
+            mode=self._answer_mode(cacheable, shared),
+        )
+
+    async def astream_query(
+        self,
+        query: str,
+        session_id: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Stream a query answer as (event, payload) pairs.
+
+        Events:
+            "sources": emitted as soon as a tool round produces sources
+            "token": one text delta of the answer
+            "error": the pipeline failed; payload carries a user-facing detail
+            "done": terminal event with session id, final sources and timing
+
+        Requests for the same session run one at a time, in arrival order.
+        """
+        with self._observe_query():
+            async with self.session_queue.hold(session_id) as queue_wait_seconds:
+                record_stage("session_queue", queue_wait_seconds)
+                async for event in self._astream_query(
+                    query, session_id, queue_wait_seconds, deadline
+                ):
+                    yield event
+
+    async def _astream_query(
+        self,
+        query: str,
+        session_id: Optional[str],
+        queue_wait_seconds: float,
+        deadline: Optional[Deadline],
+    ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        started = time.perf_counter()
+        first_token_at = None
+        prompt = self._build_prompt(query)
+        history = self._get_history(session_id)
+
+        routed = await self._aroute_query(query)
+        index_version = self._current_index_version()
+        cached = None
+        if routed is None:
+            cached = await self._acache_call(
+                self._lookup_cached_answer, query, history, index_version
+            )
+
+        answer_parts: List[str] = []
+        sources: List[str] = []
+        cacheable = True
+        abandoned = False
+        mode = "generated"
+        if routed is not None:
+            first_token_at = time.perf_counter()
+            yield "token", {"text": routed}
+            response = routed
+            cacheable = False
+            mode = "routed"
+        elif cached:
+            sources = list(cached.sources)
+            if sources:
+                yield "sources", {"sources": sources}
+            first_token_at = time.perf_counter()
+            yield "token", {"text": cached.answer}
+            response = cached.answer
+            cacheable = False
+            mode = "cached"
+        else:
+            speculation = self._start_speculation(query, deadline)
+            tool_context = ToolContext(deadline=deadline)
+            try:
+                async for event_type, payload in self.ai_generator.astream_response(
+                    query=prompt,
+                    conversation_history=history,
+                    tools=self.tool_manager.get_tool_definitions(),
+                    tool_manager=self._request_tool_manager(speculation),
+                    user_query=query,
+                    tool_context=tool_context,
+                    deadline=deadline,
+                ):
+                    if event_type == "text":
+                        if first_token_at is None:
+                            first_token_at = time.perf_counter()
+                        answer_parts.append(payload)
+                        yield "token", {"text": payload}
+                    elif event_type == "tool_results":
+                        latest_sources = tool_context.sources
+                        if latest_sources and latest_sources != sources:
+                            sources = list(latest_sources)
+                            yield "sources", {"sources": sources}
+                response = "".join(answer_parts)
+            except Exception as e:
+                print(f"Error streaming content query: {e}")
+                response = self.CONTENT_QUERY_FALLBACK
+                sources = []
+                cacheable = False
+                mode = "fallback"
+                error = {"detail": response}
+                if isinstance(e, LLMUnavailableError):
+                    error = {"detail": str(e), "retry_after": round(e.retry_after, 1)}
+                elif isinstance(e, DeadlineExceeded):
+                    error = {"detail": str(e)}
+                    abandoned = True
+                yield "error", error
+            finally:
+                self._finish_speculation(speculation)
+
+        if cacheable:
+            await self._acache_call(
+                self._store_cached_answer,
+                query,
+                history,
+                index_version,
+                response,
+                sources,
+                started,
+            )
+
+        if not abandoned:
+            self._finish_query(query, session_id, response, sources, mode=mode)
+
+        finished = time.perf_counter()
+        yield "done", {
+            "session_id": session_id,
+            "sources": sources,
+            "timing": {
+                "time_to_first_token_ms": (
+                    round((first_token_at - started) * 1000, 1)
+                    if first_token_at is not None
+                    else None
+                ),
+                "total_ms": round((finished - started) * 1000, 1),
+                "queue_wait_ms": round(queue_wait_seconds * 1000, 1),
+            },
+        }
+
+    def _generate_answer(
+        self,
+        query: str,
+        prompt: str,
+        history: Optional[str],
+        deadline: Optional[Deadline] = None,
+    ) -> Tuple[str, List[str], bool]:
+        """Run the tool loop; returns (response, sources, cacheable)"""
+        speculation = self._start_speculation(query, deadline)
+        # Sources and tool calls of this request only, never another one's
+        tool_context = ToolContext(deadline=deadline)
         try:
             # Generate response using AI with tools
             response = self.ai_generator.generate_response(
                 query=prompt,
                 conversation_history=history,
                 tools=self.tool_manager.get_tool_definitions(),
-                tool_manager=self.tool_manager,
+                tool_manager=self._request_tool_manager(speculation),
+                user_query=query,
+                tool_context=tool_context,
+                deadline=deadline,
             )
-
-            # Get sources from the search tool
-            sources = self.tool_manager.get_last_sources()
+            return response, tool_context.sources, True
+        except (LLMUnavailableError, DeadlineExceeded):
+            # Shed load or give up: let the API answer 503/504, not a fallback
+            raise
         except Exception as e:
             print(f"Error processing content query: {e}")
-            response = (
-                "Sorry, I couldn't process that course-content request right now. "
-                "Please try again."
+            return self.CONTENT_QUERY_FALLBACK, [], False
+        finally:
+            self._finish_speculation(speculation)
+
+    async def _agenerate_answer(
+        self,
+        query: str,
+        prompt: str,
+        history: Optional[str],
+        deadline: Optional[Deadline] = None,
+    ) -> Tuple[str, List[str], bool]:
+        """Async variant of _generate_answer"""
+        speculation = self._start_speculation(query, deadline)
+        tool_context = ToolContext(deadline=deadline)
+        try:
+            response = await self.ai_generator.agenerate_response(
+                query=prompt,
+                conversation_history=history,
+                tools=self.tool_manager.get_tool_definitions(),
+                tool_manager=self._request_tool_manager(speculation),
+                user_query=query,
+                tool_context=tool_context,
+                deadline=deadline,
             )
-            sources = []
+            return response, tool_context.sources, True
+        except (LLMUnavailableError, DeadlineExceeded):
+            # Shed load or give up: let the API answer 503/504, not a fallback
+            raise
+        except Exception as e:
+            print(f"Error processing content query: {e}")
+            return self.CONTENT_QUERY_FALLBACK, [], False
         finally:
-            # Reset sources after retrieving them
-            self.tool_manager.reset_sources()
+            self._finish_speculation(speculation)
+
+    def _coalescing_key(self, query: str) -> Tuple[str, int]:
+        """Identical normalized queries against the same index share one answer"""
+        return AnswerCache.normalize(query), self.vector_store.index_version
+
+    def _build_prompt(self, query: str) -> str:
+        """Create prompt for the AI with clear instructions"""
+        return f"""Answer this question about course materials: {query}"""
+
+    def _get_history(self, session_id: Optional[str]) -> Optional[str]:
+        """Get conversation history if session exists"""
+        if not session_id:
+            return None
+        with stage("session_read"):
+            return self.session_manager.get_conversation_history(session_id)
+
+    def _route_query(self, query: str) -> Optional[str]:
+        """Answer obvious outline requests directly from the outline tool"""
+        if self.intent_router is None:
+            return None
+        routed = self.intent_router.route(query)
+        if routed is None:
+            return None
+        return self.outline_tool.execute(routed.course_title)
+
+    async def _aroute_query(self, query: str) -> Optional[str]:
+        """Async variant of _route_query; the outline read blocks on Chroma"""
+        if self.intent_router is None:
+            return None
+        loop = asyncio.get_running_loop()
+        # A copy of the caller's context, so the outline read counts toward
+        # the request's timings
+        return await loop.run_in_executor(
+            self.query_executor,
+            contextvars.copy_context().run,
+            self._route_query,
+            query,
+        )
+
+    def _start_speculation(self, query: str, deadline: Optional[Deadline] = None):
+        """Start a background search on the raw query when speculation is on"""
+        if self.speculation_executor is None:
+            return None
+        return start_speculative_search(
+            self.speculation_executor,
+            self.vector_store,
+            query,
+            match_threshold=self.config.SPECULATIVE_MATCH_THRESHOLD,
+            wait_seconds=self.config.TOOL_TIMEOUT_SECONDS,
+            stats=self.speculation_stats,
+            deadline=deadline,
+        )
+
+    def _request_tool_manager(self, speculation):
+        """Tool manager for one request, serving matching searches from memory"""
+        if speculation is None:
+            return self.tool_manager
+        return SpeculativeToolManager(
+            self.tool_manager, self.search_tool, speculation, self.speculation_stats
+        )
+
+    def _finish_speculation(self, speculation):
+        if speculation is not None:
+            finish_speculative_search(speculation, self.speculation_stats)
 
-        # Update conversation history
+    def _finish_query(
+        self,
+        query: str,
+        session_id: Optional[str],
+        response: str,
+        sources: List[str],
+        deadline: Optional[Deadline] = None,
+        mode: str = "generated",
+    ) -> Tuple[str, List[str]]:
+        """Update conversation history and return the response with sources"""
+        # The caller has given up: don't record an exchange it never saw
+        if deadline is not None:
+            deadline.check("recording the exchange")
         if session_id:
-            self.session_manager.add_exchange(session_id, query, response)
+            with stage("session_write"):
+                self.session_manager.add_exchange(session_id, query, response)
+        QUERIES.inc(mode=mode)
+        return response, list(sources)
+
+    @staticmethod
+    def _answer_mode(cacheable: bool, shared: bool) -> str:
+        """How a generated answer was produced, for the queries counter"""
+        if not cacheable:
+            return "fallback"
+        return "coalesced" if shared else "generated"
+
+    @staticmethod
+    @contextmanager
+    def _observe_query() -> Iterator[None]:
+        """Record a query's end-to-end time by outcome"""
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            yield
+            outcome = "ok"
+        except DeadlineExceeded:
+            outcome = "timeout"
+            raise
+        except LLMUnavailableError:
+            outcome = "unavailable"
+            raise
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        finally:
+            QUERY_SECONDS.observe(time.perf_counter() - started, outcome=outcome)
 
-        # Return response with sources from tool searches
-        return response, sources
+    def _current_index_version(self) -> Optional[int]:
+        """Index version answers are cached against (None when caching is off)"""
+        if self.answer_cache is None:
+            return None
+        return self.vector_store.index_version
+
+    def _lookup_cached_answer(
+        self, query: str, history: Optional[str], index_version: Optional[int]
+    ) -> Optional[CachedAnswer]:
+        """Look up a cached answer; queries with history bypass the cache"""
+        if self.answer_cache is None:
+            return None
+        if history:
+            self.answer_cache.record_bypass()
+            return None
+        return self.answer_cache.get(query, index_version)
+
+    def _store_cached_answer(
+        self,
+        query: str,
+        history: Optional[str],
+        index_version: Optional[int],
+        response: str,
+        sources: List[str],
+        started: float,
+    ):
+        """Cache a successful history-free answer"""
+        if self.answer_cache is None or history or not response:
+            return
+        if response == getattr(self.ai_generator, "TOOL_FAILURE_FALLBACK", None):
+            return
+        self.answer_cache.put(
+            query,
+            index_version,
+            response,
+            sources,
+            compute_seconds=time.perf_counter() - started,
+        )
+
+    async def _acache_call(self, cache_call, *args):
+        """Run a cache call, off the event loop when it has to embed text"""
+        if self.answer_cache is not None and self.answer_cache.uses_embeddings:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.query_executor, cache_call, *args)
+        return cache_call(*args)
 
     def get_course_analytics(self) -> Dict:
         """Get analytics about the course catalog"""
@@ -178,3 +797,67 @@ class RAGSystem:
             "total_courses": self.vector_store.get_course_count(),
             "course_titles": self.vector_store.get_existing_course_titles(),
         }
+
+    def get_index_stats(self) -> Dict:
+        """Get vector index size, per-course chunk counts and HNSW settings"""
+        return self.vector_store.get_index_stats()
+
+    def get_session_stats(self) -> Dict:
+        """Get session cache counters and per-session request queueing"""
+        return {
+            **self.session_manager.get_stats(),
+            "request_queue": self.session_queue.get_stats(),
+        }
+
+    def get_usage_stats(self) -> Dict:
+        """Get cumulative LLM token usage including prompt-cache reads/writes"""
+        return self.ai_generator.get_usage_stats()
+
+    def get_model_tier_stats(self) -> Dict:
+        """Get per-model-tier request counts and latency"""
+        return self.ai_generator.get_model_tier_stats()
+
+    def get_hedging_stats(self) -> Dict:
+        """Get hedged LLM request counters (issued, won, suppressed by the cap)"""
+        return self.ai_generator.get_hedging_stats()
+
+    def llm_capacity(self) -> int:
+        """Concurrent LLM calls the adaptive limiter allows right now"""
+        return self.ai_generator.llm_guard.limiter.limit
+
+    def get_resilience_stats(self) -> Dict:
+        """Get LLM concurrency limit, circuit breaker and retry budget state"""
+        return self.ai_generator.get_resilience_stats()
+
+    def get_token_budget_stats(self) -> Dict:
+        """Get prompt budgets, trim counters and per-request input size percentiles"""
+        return self.token_budget.get_stats()
+
+    def get_cache_stats(self) -> Dict:
+        """Get answer cache hit rate, counters and latency saved"""
+        if self.answer_cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.answer_cache.get_stats()}
+
+    def get_coalescing_stats(self) -> Dict:
+        """Get how many queries reused an identical in-flight query's answer"""
+        if self.single_flight is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.single_flight.get_stats()}
+
+    def get_speculation_stats(self) -> Dict:
+        """Get speculative retrieval counters and hit rate"""
+        return {
+            "enabled": self.speculation_executor is not None,
+            **self.speculation_stats.snapshot(),
+        }
+
+    def get_router_stats(self) -> Dict:
+        """Get intent router outcome counters and routed share"""
+        if self.intent_router is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.intent_router.get_stats()}
+
+    def get_search_stats(self) -> Dict:
+        """Get relevance-cutoff counters (results and characters trimmed)"""
+        return self.vector_store.get_search_stats()
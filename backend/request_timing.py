@@ -0,0 +1,136 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class RequestTimings:
+    """
+    Per-stage time breakdown of one request.
+
+    Stages add themselves through the module-level record_* functions,
+    which find the request's collector in a context variable; tool threads
+    see it because their calls run in a copy of the submitting context.
+    Updates are locked since one request's tools run on several threads.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._stages: Dict[str, float] = {}
+        self._llm_rounds: List[Dict[str, Any]] = []
+        self._tools: List[Dict[str, Any]] = []
+
+    def add_stage(self, name: str, seconds: float):
+        """Add time to a stage; repeated stages (two searches) are summed"""
+        with self._lock:
+            self._stages[name] = self._stages.get(name, 0.0) + seconds
+
+    def add_llm_round(
+        self,
+        model: str,
+        seconds: float,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        error: Optional[str] = None,
+    ):
+        with self._lock:
+            self._llm_rounds.append(
+                {
+                    "model": model,
+                    "duration_ms": _ms(seconds),
+                    "input_tokens": input_tokens,
+                    "output_tokens": output_tokens,
+                    "error": error,
+                }
+            )
+
+    def add_tool(self, name: str, seconds: float, outcome: str):
+        with self._lock:
+            self._tools.append(
+                {"name": name, "duration_ms": _ms(seconds), "outcome": outcome}
+            )
+
+    def total_ms(self) -> float:
+        return _ms(time.perf_counter() - self.started)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The breakdown as returned in QueryResponse.timings and logged"""
+        with self._lock:
+            return {
+                "total_ms": self.total_ms(),
+                "stages": {
+                    name: _ms(seconds) for name, seconds in self._stages.items()
+                },
+                "llm_rounds": [dict(llm_round) for llm_round in self._llm_rounds],
+                "tools": [dict(tool) for tool in self._tools],
+            }
+
+    def server_timing(self) -> str:
+        """Server-Timing header value: stages, numbered LLM rounds, tools"""
+        timings = self.to_dict()
+        entries = [
+            f"{name};dur={duration_ms}"
+            for name, duration_ms in timings["stages"].items()
+        ]
+        for index, llm_round in enumerate(timings["llm_rounds"], start=1):
+            desc = (
+                f"{llm_round['model']} in={llm_round['input_tokens']} "
+                f"out={llm_round['output_tokens']}"
+            )
+            entries.append(f'llm_{index};dur={llm_round["duration_ms"]};desc="{desc}"')
+        for index, tool in enumerate(timings["tools"], start=1):
+            entries.append(
+                f'tool_{index};dur={tool["duration_ms"]};desc="{tool["name"]}"'
+            )
+        entries.append(f"total;dur={timings['total_ms']}")
+        return ", ".join(entries)
+
+
+_current: contextvars.ContextVar[Optional[RequestTimings]] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+
+@contextmanager
+def collect_timings() -> Iterator[RequestTimings]:
+    """Collect the stages run in this context (and tasks it starts)"""
+    timings = RequestTimings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+def record_stage(name: str, seconds: float):
+    timings = _current.get()
+    if timings is not None:
+        timings.add_stage(name, seconds)
+
+
+def record_llm_round(model: str, seconds: float, response=None, error=None):
+    timings = _current.get()
+    if timings is None:
+        return
+    usage = getattr(response, "usage", None)
+    if error is not None:
+        error = str(error) or type(error).__name__
+    timings.add_llm_round(
+        model,
+        seconds,
+        input_tokens=getattr(usage, "input_tokens", None) or 0,
+        output_tokens=getattr(usage, "output_tokens", None) or 0,
+        error=error,
+    )
+
+
+def record_tool(name: str, seconds: float, outcome: str):
+    timings = _current.get()
+    if timings is not None:
+        timings.add_tool(name, seconds, outcome)
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 1)
@@ -0,0 +1,384 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import anthropic
+from deadline import DeadlineExceeded
+
+
+class LLMUnavailableError(Exception):
+    """The LLM call was rejected locally instead of being sent to the provider"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(LLMUnavailableError):
+    """The circuit breaker is open after a burst of provider failures"""
+
+
+class ConcurrencyLimitExceeded(LLMUnavailableError):
+    """Every slot of the adaptive concurrency limit is in use"""
+
+
+def is_overload_error(error: Exception) -> bool:
+    """Errors meaning the provider wants less traffic (429, 529, timeouts)"""
+    if isinstance(error, (anthropic.RateLimitError, anthropic.APITimeoutError)):
+        return True
+    return isinstance(error, anthropic.APIStatusError) and error.status_code == 529
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """Transient provider failures worth another attempt"""
+    if isinstance(error, (anthropic.APIConnectionError, anthropic.RateLimitError)):
+        return True
+    return isinstance(error, anthropic.APIStatusError) and error.status_code >= 500
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD limit on concurrent LLM calls.
+
+    Each call that finishes fast and without overload adds 1/limit, so the
+    limit grows by about one per round of calls; an overload error or a call
+    slower than the latency target halves it (at most once per latency
+    target, so one burst of failures counts as a single signal).
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 32,
+        min_limit: int = 1,
+        max_limit: int = 200,
+        latency_target_seconds: float = 20.0,
+        decrease_factor: float = 0.5,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target_seconds = latency_target_seconds
+        self.decrease_factor = decrease_factor
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._limit = float(min(max(initial_limit, min_limit), max_limit))
+        self._in_flight = 0
+        self._last_decrease = float("-inf")
+        self._stats = {"rejected": 0, "increases": 0, "decreases": 0}
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def try_acquire(self) -> bool:
+        """Take a slot without waiting; False when the limit is reached"""
+        with self._lock:
+            if self._in_flight >= int(self._limit):
+                self._stats["rejected"] += 1
+                return False
+            self._in_flight += 1
+            return True
+
+    def release(self, latency_seconds: float, overloaded: bool):
+        """Return a slot and adapt the limit to the observed outcome"""
+        with self._lock:
+            self._in_flight -= 1
+            if overloaded or latency_seconds > self.latency_target_seconds:
+                now = self.clock()
+                if now - self._last_decrease >= self.latency_target_seconds:
+                    self._last_decrease = now
+                    self._limit = max(
+                        self._limit * self.decrease_factor, self.min_limit
+                    )
+                    self._stats["decreases"] += 1
+            elif self._limit < self.max_limit:
+                self._limit = min(self._limit + 1 / self._limit, self.max_limit)
+                self._stats["increases"] += 1
+
+    def discard(self):
+        """Return a slot whose attempt ended without a provider outcome"""
+        with self._lock:
+            self._in_flight -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "limit": int(self._limit),
+                "in_flight": self._in_flight,
+                **self._stats,
+            }
+
+
+class RetryBudget:
+    """
+    Caps retries to a fraction of first attempts.
+
+    Every request deposits `ratio` tokens and every retry withdraws one, so
+    a provider brownout cannot multiply load by the per-call retry count.
+    A small per-second allowance keeps retries possible at low traffic.
+    """
+
+    def __init__(
+        self,
+        ratio: float = 0.1,
+        min_retries_per_second: float = 1.0,
+        max_balance: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ratio = ratio
+        self.min_retries_per_second = min_retries_per_second
+        self.max_balance = max_balance
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._balance = max_balance
+        self._refilled_at = clock()
+        self._stats = {"retries": 0, "exhausted": 0}
+
+    def record_request(self):
+        with self._lock:
+            self._balance = min(self._balance + self.ratio, self.max_balance)
+
+    def try_withdraw(self) -> bool:
+        with self._lock:
+            now = self.clock()
+            refill = (now - self._refilled_at) * self.min_retries_per_second
+            self._balance = min(self._balance + refill, self.max_balance)
+            self._refilled_at = now
+            if self._balance < 1:
+                self._stats["exhausted"] += 1
+                return False
+            self._balance -= 1
+            self._stats["retries"] += 1
+            return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"balance": round(self._balance, 2), **self._stats}
+
+
+class CircuitBreaker:
+    """
+    Opens when the failure rate over recent calls crosses a threshold.
+
+    While open, calls fail fast; after reset_seconds a single probe is let
+    through (half-open) and its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(
+        self,
+        failure_rate_threshold: float = 0.5,
+        window_size: int = 20,
+        min_calls: int = 10,
+        reset_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_rate_threshold = failure_rate_threshold
+        self.min_calls = min_calls
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=window_size)
+        self._state = "closed"
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._stats = {"opened": 0, "rejected": 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go to the provider now"""
+        with self._lock:
+            state = self._current_state()
+            if state == "closed":
+                return
+            if state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            self._stats["rejected"] += 1
+            retry_after = max(self._opened_at + self.reset_seconds - self.clock(), 1.0)
+        raise CircuitOpenError(
+            "The AI provider is failing; requests are paused briefly.", retry_after
+        )
+
+    def record(self, success: bool):
+        with self._lock:
+            if self._current_state() == "half_open":
+                self._probe_in_flight = False
+                if success:
+                    self._state = "closed"
+                    self._outcomes.clear()
+                else:
+                    self._open()
+                return
+
+            self._outcomes.append(success)
+            failures = self._outcomes.count(False)
+            if (
+                self._state == "closed"
+                and len(self._outcomes) >= self.min_calls
+                and failures / len(self._outcomes) >= self.failure_rate_threshold
+            ):
+                self._open()
+
+    def release_probe(self):
+        """Give back a half-open probe that ended without a provider outcome"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def _open(self):
+        # Caller holds self._lock
+        self._state = "open"
+        self._opened_at = self.clock()
+        self._stats["opened"] += 1
+
+    def _current_state(self) -> str:
+        # Caller holds self._lock
+        if (
+            self._state == "open"
+            and self.clock() - self._opened_at >= self.reset_seconds
+        ):
+            self._state = "half_open"
+        return self._state
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            failures = self._outcomes.count(False)
+            return {
+                "state": self._current_state(),
+                "recent_failure_rate": (
+                    failures / len(self._outcomes) if self._outcomes else 0.0
+                ),
+                **self._stats,
+            }
+
+
+class LLMGuard:
+    """Concurrency limiter, circuit breaker and budgeted retries for LLM calls"""
+
+    def __init__(
+        self,
+        limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        retry_budget: Optional[RetryBudget] = None,
+        max_retries: int = 2,
+        base_delay_seconds: float = 0.5,
+        max_delay_seconds: float = 8.0,
+    ):
+        self.limiter = limiter or AdaptiveConcurrencyLimiter()
+        self.breaker = breaker or CircuitBreaker()
+        self.retry_budget = retry_budget or RetryBudget()
+        self.max_retries = max_retries
+        self.base_delay_seconds = base_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self._rng = random.Random()
+
+    @contextmanager
+    def slot(self):
+        """
+        One attempt: fail fast if the breaker is open or no slot is free,
+        then record the attempt's outcome with the breaker and limiter.
+        """
+        self.breaker.before_call()
+        if not self.limiter.try_acquire():
+            # Breaker may have handed this call the half-open probe
+            self.breaker.release_probe()
+            raise ConcurrencyLimitExceeded(
+                "Too many AI requests are in flight; please retry shortly.", 1.0
+            )
+
+        started = time.perf_counter()
+        try:
+            yield
+        except DeadlineExceeded:
+            # Our own budget ran out: neither latency nor health evidence
+            self.limiter.discard()
+            self.breaker.release_probe()
+            raise
+        except Exception as e:
+            self.limiter.release(time.perf_counter() - started, is_overload_error(e))
+            # Client errors (bad request, auth) say nothing about provider health
+            self.breaker.record(success=not is_retryable_error(e))
+            raise
+        except BaseException:
+            # Cancelled by the caller: free the slot without judging the provider
+            self.limiter.discard()
+            self.breaker.release_probe()
+            raise
+        self.limiter.release(time.perf_counter() - started, overloaded=False)
+        self.breaker.record(success=True)
+
+    def retry_delay(self, attempt: int, error: Exception) -> Optional[float]:
+        """Seconds to wait before retrying, or None if the error is final"""
+        if not is_retryable_error(error) or attempt >= self.max_retries:
+            return None
+        if not self.retry_budget.try_withdraw():
+            return None
+
+        # Full jitter spreads retries so queued requests don't retry in lockstep
+        ceiling = min(self.base_delay_seconds * 2**attempt, self.max_delay_seconds)
+        delay = self._rng.uniform(0, ceiling)
+        retry_after = _retry_after_seconds(error)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay_seconds))
+        return delay
+
+    def call(self, fn: Callable[[], Any]) -> Any:
+        """Run a blocking provider call with the guard and budgeted retries"""
+        self.retry_budget.record_request()
+        attempt = 0
+        while True:
+            try:
+                with self.slot():
+                    return fn()
+            except LLMUnavailableError:
+                raise
+            except Exception as e:
+                delay = self.retry_delay(attempt, e)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+            attempt += 1
+
+    async def acall(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Async variant of call"""
+        self.retry_budget.record_request()
+        attempt = 0
+        while True:
+            try:
+                with self.slot():
+                    return await fn()
+            except LLMUnavailableError:
+                raise
+            except Exception as e:
+                delay = self.retry_delay(attempt, e)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.limiter.get_stats(),
+            "circuit_breaker": self.breaker.get_stats(),
+            "retry_budget": self.retry_budget.get_stats(),
+        }
+
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
@@ -1,22 +1,61 @@
 import html
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 from urllib.parse import urlparse
 
+from deadline import Deadline
+from metrics import observe_tool, stage
 from vector_store import SearchResults, VectorStore
 
 
+class ToolContext:
+    """
+    Per-request state for tool execution: the sources shown to the user.
+    Tools of one round run on several threads, so updates are locked. The
+    request's deadline, if any, rides along so tools can skip work nobody
+    will wait for. Tool timings go to metrics.observe_tool instead.
+    """
+
+    def __init__(self, deadline: Optional[Deadline] = None):
+        self.deadline = deadline
+        self._lock = threading.Lock()
+        self._sources: List[str] = []
+
+    @property
+    def sources(self) -> List[str]:
+        """Distinct sources of every search in the request, in first-seen order"""
+        with self._lock:
+            return list(self._sources)
+
+    def add_sources(self, sources: List[str]):
+        with self._lock:
+            for source in sources:
+                if source not in self._sources:
+                    self._sources.append(source)
+
+
 class Tool(ABC):
     """Abstract base class for all tools"""
 
+    # Whether execute() blocks on CPU or I/O (embedding, vector search) and so
+    # must run off the event loop in the async path
+    blocking = True
+
     @abstractmethod
     def get_tool_definition(self) -> Dict[str, Any]:
         """Return Anthropic tool definition for this tool"""
         pass
 
     @abstractmethod
-    def execute(self, **kwargs) -> str:
-        """Execute the tool with given parameters"""
+    def execute(self, tool_context: Optional[ToolContext] = None, **kwargs) -> str:
+        """
+        Execute the tool with given parameters.
+
+        Per-request output such as sources goes to tool_context, never to
+        the tool instance, which is shared by concurrent requests.
+        """
         pass
 
 
@@ -25,7 +64,8 @@ class CourseSearchTool(Tool):
 
     def __init__(self, vector_store: VectorStore):
         self.store = vector_store
-        self.last_sources = []  # Track sources from last search
+        # Sources of the last search run without a ToolContext
+        self.last_sources = []
 
     def get_tool_definition(self) -> Dict[str, Any]:
         """Return Anthropic tool definition for this tool"""
@@ -57,6 +97,7 @@ class CourseSearchTool(Tool):
         query: str,
         course_name: Optional[str] = None,
         lesson_number: Optional[int] = None,
+        tool_context: Optional[ToolContext] = None,
     ) -> str:
         """
         Execute the search tool with given parameters.
@@ -65,16 +106,32 @@ class CourseSearchTool(Tool):
             query: What to search for
             course_name: Optional course filter
             lesson_number: Optional lesson filter
+            tool_context: Per-request context that collects the sources
 
         Returns:
             Formatted search results or error message
         """
 
         # Use the vector store's unified search interface
+        search_kwargs = {}
+        if tool_context is not None and tool_context.deadline is not None:
+            search_kwargs["deadline"] = tool_context.deadline
         results = self.store.search(
-            query=query, course_name=course_name, lesson_number=lesson_number
+            query=query,
+            course_name=course_name,
+            lesson_number=lesson_number,
+            **search_kwargs,
         )
+        return self.render_results(results, course_name, lesson_number, tool_context)
 
+    def render_results(
+        self,
+        results: SearchResults,
+        course_name: Optional[str] = None,
+        lesson_number: Optional[int] = None,
+        tool_context: Optional[ToolContext] = None,
+    ) -> str:
+        """Turn search results (live or prefetched) into the tool's output"""
         # Handle errors
         if results.error:
             return results.error
@@ -89,9 +146,12 @@ class CourseSearchTool(Tool):
             return f"No relevant content found{filter_info}."
 
         # Format and return results
-        return self._format_results(results)
+        with stage("tool_format"):
+            return self._format_results(results, tool_context)
 
-    def _format_results(self, results: SearchResults) -> str:
+    def _format_results(
+        self, results: SearchResults, tool_context: Optional[ToolContext] = None
+    ) -> str:
         """Format search results with course and lesson context"""
         formatted = []
         sources = []  # Track sources for the UI
@@ -120,7 +180,10 @@ class CourseSearchTool(Tool):
             formatted.append(f"{header}\n{doc}")
 
         # Store sources for retrieval
-        self.last_sources = sources
+        if tool_context is not None:
+            tool_context.add_sources(sources)
+        else:
+            self.last_sources = sources
 
         return "\n\n".join(formatted)
 
@@ -178,7 +241,9 @@ class CourseOutlineTool(Tool):
             },
         }
 
-    def execute(self, course_name: str) -> str:
+    def execute(
+        self, course_name: str, tool_context: Optional[ToolContext] = None
+    ) -> str:
         """Return a normalized plain-text course outline for the given course."""
         outline = self.store.get_course_outline(course_name)
         if not outline:
@@ -253,15 +318,33 @@ class ToolManager:
         """Get all tool definitions for Anthropic tool calling"""
         return [tool.get_tool_definition() for tool in self.tools.values()]
 
-    def execute_tool(self, tool_name: str, **kwargs) -> str:
-        """Execute a tool by name with given parameters"""
+    def execute_tool(
+        self, tool_name: str, tool_context: Optional[ToolContext] = None, **kwargs
+    ) -> str:
+        """Execute a tool by name, timing the call into metrics and request timings"""
         if tool_name not in self.tools:
             return f"Tool '{tool_name}' not found"
 
-        return self.tools[tool_name].execute(**kwargs)
+        tool = self.tools[tool_name]
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            if tool_context is None:
+                result = tool.execute(**kwargs)
+            else:
+                result = tool.execute(tool_context=tool_context, **kwargs)
+            outcome = "ok"
+            return result
+        finally:
+            observe_tool(tool_name, time.perf_counter() - started, outcome)
+
+    def is_blocking_tool(self, tool_name: str) -> bool:
+        """Whether the named tool must be run off the event loop"""
+        tool = self.tools.get(tool_name)
+        return bool(tool and tool.blocking)
 
     def get_last_sources(self) -> list:
-        """Get sources from the last search operation"""
+        """Get sources from the last search run without a ToolContext"""
         # Check all tools for last_sources attribute
         for tool in self.tools.values():
             if hasattr(tool, "last_sources") and tool.last_sources:
@@ -1,43 +1,183 @@
+import math
+import threading
+import time
+import uuid
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
+from session_store import SessionStore
 
-@dataclass
+
+@dataclass(slots=True)
 class Message:
     """Represents a single message in a conversation"""
 
     role: str  # "user" or "assistant"
     content: str  # The message content
+    rendered: str = ""  # "Role: content" line used in the prompt history
+
+    def __post_init__(self):
+        if not self.rendered:
+            self.rendered = f"{self.role.title()}: {self.content}"
+
+
+class HistoryBuffer:
+    """
+    Fixed-size ring buffer of messages plus their rendered history text.
+
+    The text is updated on append and eviction, so reading the formatted
+    history returns a ready string instead of re-joining every message.
+    """
+
+    __slots__ = ("_slots", "_head", "_size", "text")
+
+    def __init__(self, capacity: int):
+        self._slots: List[Optional[Message]] = [None] * max(capacity, 1)
+        self._head = 0  # Index of the oldest message
+        self._size = 0
+        self.text = ""
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, message: Message):
+        capacity = len(self._slots)
+        if self._size == capacity:
+            # Overwrite the oldest message and cut its line off the text
+            oldest = self._slots[self._head]
+            self.text = self.text[len(oldest.rendered) + 1 :]
+            self._slots[self._head] = message
+            self._head = (self._head + 1) % capacity
+        else:
+            self._slots[(self._head + self._size) % capacity] = message
+            self._size += 1
+
+        if self.text:
+            self.text = f"{self.text}\n{message.rendered}"
+        else:
+            self.text = message.rendered
+
+    def clear(self):
+        self._slots = [None] * len(self._slots)
+        self._head = 0
+        self._size = 0
+        self.text = ""
+
+    def messages(self) -> List[Message]:
+        """Messages oldest first"""
+        capacity = len(self._slots)
+        return [
+            self._slots[(self._head + offset) % capacity]
+            for offset in range(self._size)
+        ]
+
+
+@dataclass(slots=True)
+class _Session:
+    history: HistoryBuffer
+    last_access: float = 0.0
+    loaded_at: float = 0.0
+
+
+class _Shard:
+    """One lock stripe: its sessions in least-recently-used-first order"""
+
+    __slots__ = ("lock", "sessions")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sessions: "OrderedDict[str, _Session]" = OrderedDict()
 
 
 class SessionManager:
-    """Manages conversation sessions and message history"""
+    """
+    Manages conversation sessions and message history.
 
-    def __init__(self, max_history: int = 5):
+    The manager is a cache, optionally in front of a SessionStore. Cached
+    sessions are spread over lock-striped shards so concurrent requests for
+    different sessions rarely contend. Idle sessions expire after
+    ttl_seconds (0 disables expiry) and each shard keeps at most its share
+    of max_sessions, evicting the least recently used session first.
+
+    With no store the cache holds the only copy, so an evicted session is
+    gone. A store gets every change and is read through on a miss; a
+    shared one (other workers write to it) is also re-read once a cached
+    session is older than cache_seconds.
+
+    fit_history, if given, trims the formatted history on the way out; it
+    gets the history text and the rendered messages it is joined from.
+    """
+
+    def __init__(
+        self,
+        max_history: int = 5,
+        max_sessions: int = 10000,
+        ttl_seconds: float = 3600.0,
+        num_shards: int = 16,
+        clock: Callable[[], float] = time.monotonic,
+        store: Optional[SessionStore] = None,
+        cache_seconds: float = 1.0,
+        fit_history: Optional[Callable[[str, List[str]], Optional[str]]] = None,
+    ):
         self.max_history = max_history
-        self.sessions: Dict[str, List[Message]] = {}
-        self.session_counter = 0
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.store = store
+        self.cache_seconds = cache_seconds
+        self.fit_history = fit_history
+        self._shards = [_Shard() for _ in range(num_shards)]
+        self._shard_capacity = max(math.ceil(max_sessions / num_shards), 1)
+
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "created": 0,
+            "deleted": 0,
+            "evicted_ttl": 0,
+            "evicted_capacity": 0,
+            "cache_hits": 0,
+            "cache_misses": 0,
+        }
+
+    @property
+    def sessions(self) -> Dict[str, List[Message]]:
+        """Snapshot of cached sessions and their messages"""
+        snapshot = {}
+        for shard in self._shards:
+            with shard.lock:
+                self._evict_expired(shard)
+                for session_id, session in shard.sessions.items():
+                    snapshot[session_id] = session.history.messages()
+        return snapshot
 
     def create_session(self) -> str:
         """Create a new conversation session"""
-        self.session_counter += 1
-        session_id = f"session_{self.session_counter}"
-        self.sessions[session_id] = []
+        # Random ids can't collide across workers sharing a store
+        session_id = f"session_{uuid.uuid4().hex}"
+        shard = self._shard(session_id)
+        with shard.lock:
+            self._insert(shard, session_id)
+        self._count("created")
         return session_id
 
     def add_message(self, session_id: str, role: str, content: str):
         """Add a message to the conversation history"""
-        if session_id not in self.sessions:
-            self.sessions[session_id] = []
+        shard = self._shard(session_id)
+        with shard.lock:
+            session = self._load(shard, session_id)
+            if session is None:
+                session = self._insert(shard, session_id)
+                self._count("created")
 
-        message = Message(role=role, content=content)
-        self.sessions[session_id].append(message)
+            # The ring buffer drops the oldest message past max_history exchanges
+            session.history.append(Message(role=role, content=content))
 
-        # Keep conversation history within limits
-        if len(self.sessions[session_id]) > self.max_history * 2:
-            self.sessions[session_id] = self.sessions[session_id][
-                -self.max_history * 2 :
-            ]
+            # Saved under the shard lock so writes reach the store in order
+            if self.store is not None:
+                self.store.save(
+                    session_id,
+                    [(msg.role, msg.content) for msg in session.history.messages()],
+                )
 
     def add_exchange(self, session_id: str, user_message: str, assistant_message: str):
         """Add a complete question-answer exchange"""
@@ -46,25 +186,137 @@ class SessionManager:
 
     def get_conversation_history(self, session_id: Optional[str]) -> Optional[str]:
         """Get formatted conversation history for a session"""
-        if not session_id or session_id not in self.sessions:
+        if not session_id:
             return None
 
-        messages = self.sessions[session_id]
-        if not messages:
-            return None
-
-        # Format messages for context
-        formatted_messages = []
-        for msg in messages:
-            formatted_messages.append(f"{msg.role.title()}: {msg.content}")
-
-        return "\n".join(formatted_messages)
+        shard = self._shard(session_id)
+        with shard.lock:
+            session = self._load(shard, session_id)
+            if session is None:
+                return None
+            # Maintained incrementally by HistoryBuffer; empty means no history
+            history = session.history.text
+            if not history or self.fit_history is None:
+                return history or None
+            return self.fit_history(
+                history, [message.rendered for message in session.history.messages()]
+            )
 
     def clear_session(self, session_id: str):
         """Clear all messages from a session"""
-        if session_id in self.sessions:
-            self.sessions[session_id] = []
+        shard = self._shard(session_id)
+        with shard.lock:
+            session = self._load(shard, session_id)
+            if session is not None:
+                session.history.clear()
+                if self.store is not None:
+                    self.store.save(session_id, [])
 
     def delete_session(self, session_id: str) -> bool:
         """Delete a session and return whether it existed"""
-        return self.sessions.pop(session_id, None) is not None
+        shard = self._shard(session_id)
+        with shard.lock:
+            cached = shard.sessions.pop(session_id, None) is not None
+            stored = self.store is not None and self.store.delete(session_id)
+            existed = stored or cached
+        if existed:
+            self._count("deleted")
+        return existed
+
+    def evict_expired(self) -> int:
+        """Drop every idle-expired session now; returns how many were dropped"""
+        evicted = 0
+        for shard in self._shards:
+            with shard.lock:
+                evicted += self._evict_expired(shard)
+        return evicted
+
+    def close(self):
+        """Flush buffered writes to the store"""
+        if self.store is not None:
+            self.store.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cached session count, cache hit/miss and eviction counters"""
+        live = 0
+        for shard in self._shards:
+            with shard.lock:
+                live += len(shard.sessions)
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["live_sessions"] = live
+        stats["max_sessions"] = self._shard_capacity * len(self._shards)
+        # Capacity eviction is LRU within each shard, not across all sessions
+        stats["max_sessions_per_shard"] = self._shard_capacity
+        stats["eviction"] = "per-shard LRU"
+        stats["store"] = self.store.get_stats() if self.store is not None else None
+        return stats
+
+    def _shard(self, session_id: str) -> _Shard:
+        return self._shards[hash(session_id) % len(self._shards)]
+
+    def _load(self, shard: _Shard, session_id: str) -> Optional[_Session]:
+        # Caller holds shard.lock. Serves the cached session, reading through
+        # to the store on a miss or when a shared store's copy may be newer.
+        self._evict_expired(shard)
+        now = self.clock()
+        session = shard.sessions.get(session_id)
+        if session is not None and not (
+            self.store is not None
+            and self.store.shared
+            and now - session.loaded_at > self.cache_seconds
+        ):
+            self._count("cache_hits")
+            session.last_access = now
+            shard.sessions.move_to_end(session_id)
+            return session
+
+        self._count("cache_misses")
+        stored = self.store.load(session_id) if self.store is not None else None
+        if stored is None:
+            shard.sessions.pop(session_id, None)
+            return None
+        session = self._insert(shard, session_id)
+        for role, content in stored:
+            session.history.append(Message(role=role, content=content))
+        return session
+
+    def _insert(self, shard: _Shard, session_id: str) -> _Session:
+        # Caller holds shard.lock
+        self._evict_expired(shard)
+        now = self.clock()
+        session = _Session(
+            history=HistoryBuffer(self.max_history * 2),
+            last_access=now,
+            loaded_at=now,
+        )
+        shard.sessions[session_id] = session
+        shard.sessions.move_to_end(session_id)
+        evicted = 0
+        while len(shard.sessions) > self._shard_capacity:
+            shard.sessions.popitem(last=False)
+            evicted += 1
+        if evicted:
+            self._count("evicted_capacity", evicted)
+        return session
+
+    def _evict_expired(self, shard: _Shard) -> int:
+        # Caller holds shard.lock. Sessions are in access order, so expired
+        # ones are all at the front and the sweep stops at the first live one.
+        if self.ttl_seconds <= 0:
+            return 0
+        cutoff = self.clock() - self.ttl_seconds
+        evicted = 0
+        while shard.sessions:
+            session_id, session = next(iter(shard.sessions.items()))
+            if session.last_access > cutoff:
+                break
+            del shard.sessions[session_id]
+            evicted += 1
+        if evicted:
+            self._count("evicted_ttl", evicted)
+        return evicted
+
+    def _count(self, key: str, amount: int = 1):
+        with self._stats_lock:
+            self._stats[key] += amount
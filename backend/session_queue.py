@@ -0,0 +1,118 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+from percentiles import percentile_ms
+
+
+class _SessionSlot:
+    """The lock one session's requests queue on, alive while any are queued"""
+
+    __slots__ = ("lock", "users")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.users = 0
+
+
+class _SessionWaits:
+    __slots__ = ("requests", "queued", "total_wait", "max_wait")
+
+    def __init__(self):
+        self.requests = 0
+        self.queued = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+
+class SessionRequestQueue:
+    """
+    Runs requests for the same session one at a time, in arrival order.
+
+    Each session gets a FIFO asyncio lock while it has requests in flight,
+    so a follow-up reads the history its predecessor wrote. Requests for
+    different sessions never wait on each other. Must be used from a
+    single event loop.
+    """
+
+    def __init__(self, sample_size: int = 500, tracked_sessions: int = 1000):
+        self.tracked_sessions = tracked_sessions
+        self._slots: Dict[str, _SessionSlot] = {}
+        self._waits: "OrderedDict[str, _SessionWaits]" = OrderedDict()
+        self._queued_waits = deque(maxlen=sample_size)
+        self._stats = {"requests": 0, "queued": 0}
+
+    @asynccontextmanager
+    async def hold(self, session_id: Optional[str]) -> AsyncIterator[float]:
+        """Wait for the session's turn; yields the seconds spent queued"""
+        if not session_id:
+            yield 0.0
+            return
+
+        slot = self._slots.get(session_id)
+        if slot is None:
+            slot = self._slots[session_id] = _SessionSlot()
+        slot.users += 1
+        queued = slot.lock.locked()
+        started = time.perf_counter()
+        try:
+            await slot.lock.acquire()
+        except BaseException:
+            self._leave(session_id, slot)
+            raise
+
+        wait_seconds = time.perf_counter() - started
+        self._record(session_id, queued, wait_seconds)
+        try:
+            yield wait_seconds
+        finally:
+            slot.lock.release()
+            self._leave(session_id, slot)
+
+    def _leave(self, session_id: str, slot: _SessionSlot):
+        slot.users -= 1
+        if slot.users == 0:
+            del self._slots[session_id]
+
+    def _record(self, session_id: str, queued: bool, wait_seconds: float):
+        self._stats["requests"] += 1
+        waits = self._waits.pop(session_id, None) or _SessionWaits()
+        # Most recently active sessions last; the oldest fall off past the cap
+        self._waits[session_id] = waits
+        if len(self._waits) > self.tracked_sessions:
+            self._waits.popitem(last=False)
+
+        waits.requests += 1
+        if queued:
+            self._stats["queued"] += 1
+            self._queued_waits.append(wait_seconds)
+            waits.queued += 1
+            waits.total_wait += wait_seconds
+            waits.max_wait = max(waits.max_wait, wait_seconds)
+
+    def get_stats(self, top_sessions: int = 10) -> Dict[str, Any]:
+        """Queueing counters, wait percentiles and the most-delayed sessions"""
+        samples = sorted(self._queued_waits)
+        busiest = sorted(
+            (item for item in self._waits.items() if item[1].queued),
+            key=lambda item: item[1].total_wait,
+            reverse=True,
+        )[:top_sessions]
+        return {
+            **self._stats,
+            "active_sessions": len(self._slots),
+            "waiting": sum(slot.users - 1 for slot in self._slots.values()),
+            "wait_p50_ms": percentile_ms(samples, 0.5),
+            "wait_p95_ms": percentile_ms(samples, 0.95),
+            "sessions": {
+                session_id: {
+                    "requests": waits.requests,
+                    "queued": waits.queued,
+                    "total_wait_ms": round(waits.total_wait * 1000, 1),
+                    "max_wait_ms": round(waits.max_wait * 1000, 1),
+                }
+                for session_id, waits in busiest
+            },
+        }
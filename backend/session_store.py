@@ -0,0 +1,332 @@
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+# A stored message is a (role, content) pair
+StoredMessages = List[Tuple[str, str]]
+
+
+class SessionStore(ABC):
+    """Backing store for conversation history, behind SessionManager's cache"""
+
+    # Whether other processes read and write the same sessions
+    shared = False
+
+    @abstractmethod
+    def load(self, session_id: str) -> Optional[StoredMessages]:
+        """Messages of a session, or None if the store doesn't have it"""
+
+    @abstractmethod
+    def save_many(self, sessions: Dict[str, StoredMessages]):
+        """Replace the messages of several sessions in one batch"""
+
+    @abstractmethod
+    def delete(self, session_id: str) -> bool:
+        """Delete a session and return whether it existed"""
+
+    def save(self, session_id: str, messages: StoredMessages):
+        self.save_many({session_id: messages})
+
+    def purge_expired(self, max_idle_seconds: float) -> int:
+        """Drop sessions not written for max_idle_seconds; returns the count"""
+        return 0
+
+    def close(self):
+        """Flush pending writes and release resources"""
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": type(self).__name__}
+
+
+class InMemorySessionStore(SessionStore):
+    """Process-local store for tests and tools; sessions are lost on restart
+
+    The app runs without it: SessionManager's cache already holds the only
+    process-local copy, so "memory" sessions use no store at all.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, Tuple[StoredMessages, float]] = {}
+
+    def load(self, session_id: str) -> Optional[StoredMessages]:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+        return list(entry[0]) if entry else None
+
+    def save_many(self, sessions: Dict[str, StoredMessages]):
+        now = time.time()
+        with self._lock:
+            for session_id, messages in sessions.items():
+                self._sessions[session_id] = (list(messages), now)
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def purge_expired(self, max_idle_seconds: float) -> int:
+        cutoff = time.time() - max_idle_seconds
+        with self._lock:
+            expired = [
+                session_id
+                for session_id, (_, updated_at) in self._sessions.items()
+                if updated_at < cutoff
+            ]
+            for session_id in expired:
+                del self._sessions[session_id]
+        return len(expired)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stored = len(self._sessions)
+        return {**super().get_stats(), "stored_sessions": stored}
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Sessions in a SQLite file that every worker on the host opens.
+
+    WAL mode lets readers proceed while a batch is being written.
+    """
+
+    shared = True
+
+    def __init__(self, path: str, busy_timeout_seconds: float = 5.0):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, timeout=busy_timeout_seconds, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, messages TEXT NOT NULL, "
+            "updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions(updated_at)"
+        )
+        self._conn.commit()
+
+    def load(self, session_id: str) -> Optional[StoredMessages]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT messages FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return [(role, content) for role, content in json.loads(row[0])]
+
+    def save_many(self, sessions: Dict[str, StoredMessages]):
+        now = time.time()
+        rows = [
+            (session_id, json.dumps(messages), now)
+            for session_id, messages in sessions.items()
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO sessions (session_id, messages, updated_at) "
+                "VALUES (?, ?, ?) ON CONFLICT(session_id) DO UPDATE SET "
+                "messages = excluded.messages, updated_at = excluded.updated_at",
+                rows,
+            )
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM sessions WHERE session_id = ?", (session_id,)
+            )
+        return cursor.rowcount > 0
+
+    def purge_expired(self, max_idle_seconds: float) -> int:
+        cutoff = time.time() - max_idle_seconds
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM sessions WHERE updated_at < ?", (cutoff,)
+            )
+        return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            (stored,) = self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()
+        return {**super().get_stats(), "path": self.path, "stored_sessions": stored}
+
+
+class WriteBehindSessionStore(SessionStore):
+    """
+    Buffers writes to another store and flushes them in batches.
+
+    Repeated writes to one session between flushes collapse into one row
+    write. Reads see buffered writes, including a batch still being
+    written, so a worker always reads its own writes; other workers see
+    them after the next flush. A session deleted while its batch is in
+    flight is deleted again once the batch lands, so it can't come back.
+    """
+
+    def __init__(
+        self,
+        inner: SessionStore,
+        flush_interval_seconds: float = 0.05,
+        max_batch: int = 256,
+        purge_after_seconds: float = 0.0,
+        purge_interval_seconds: float = 60.0,
+    ):
+        self.inner = inner
+        self.shared = inner.shared
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_batch = max_batch
+        self.purge_after_seconds = purge_after_seconds
+        self.purge_interval_seconds = purge_interval_seconds
+
+        self._cond = threading.Condition()
+        self._pending: Dict[str, StoredMessages] = {}
+        # The batch being written and sessions deleted while it is in flight
+        self._in_flight: Dict[str, StoredMessages] = {}
+        self._deleted_in_flight: Set[str] = set()
+        # One flush at a time, so there is at most one in-flight batch
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        self._stats = {
+            "writes": 0,
+            "coalesced_writes": 0,
+            "flushes": 0,
+            "rows_flushed": 0,
+            "flush_errors": 0,
+            "purged": 0,
+        }
+        self._writer = threading.Thread(
+            target=self._run, name="session-write-behind", daemon=True
+        )
+        self._writer.start()
+
+    def load(self, session_id: str) -> Optional[StoredMessages]:
+        with self._cond:
+            pending = self._pending.get(session_id)
+            if pending is None and session_id in self._deleted_in_flight:
+                return None
+            if pending is None:
+                pending = self._in_flight.get(session_id)
+        if pending is not None:
+            return list(pending)
+        return self.inner.load(session_id)
+
+    def save_many(self, sessions: Dict[str, StoredMessages]):
+        with self._cond:
+            for session_id, messages in sessions.items():
+                if session_id in self._pending:
+                    self._stats["coalesced_writes"] += 1
+                self._pending[session_id] = list(messages)
+                self._stats["writes"] += 1
+            if len(self._pending) >= self.max_batch:
+                self._cond.notify()
+
+    def delete(self, session_id: str) -> bool:
+        with self._cond:
+            pending = self._pending.pop(session_id, None) is not None
+            if self._in_flight.pop(session_id, None) is not None:
+                self._deleted_in_flight.add(session_id)
+                pending = True
+        return self.inner.delete(session_id) or pending
+
+    def flush(self):
+        """Write every buffered session to the inner store now"""
+        with self._flush_lock:
+            with self._cond:
+                batch, self._pending = self._pending, {}
+                self._in_flight = batch
+            if not batch:
+                return
+            try:
+                self.inner.save_many(batch)
+            except Exception as e:
+                print(f"Error flushing {len(batch)} sessions: {e}")
+                with self._cond:
+                    self._stats["flush_errors"] += 1
+                    # Newer writes that arrived meanwhile win over the failed
+                    # batch, and deleted sessions stay deleted
+                    for session_id, messages in batch.items():
+                        if session_id not in self._deleted_in_flight:
+                            self._pending.setdefault(session_id, messages)
+                    self._finish_flush()
+                return
+
+            with self._cond:
+                deleted = set(self._deleted_in_flight)
+            # The batch may have landed after the delete reached the inner store
+            for session_id in deleted:
+                try:
+                    self.inner.delete(session_id)
+                except Exception as e:
+                    print(f"Error deleting session {session_id}: {e}")
+            with self._cond:
+                self._stats["flushes"] += 1
+                self._stats["rows_flushed"] += len(batch)
+                self._finish_flush()
+
+    def _finish_flush(self):
+        # Caller holds self._cond
+        self._in_flight = {}
+        self._deleted_in_flight.clear()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._writer.join()
+        self.flush()
+        self.inner.close()
+
+    def _run(self):
+        last_purge = time.monotonic()
+        while True:
+            with self._cond:
+                if not self._closed and len(self._pending) < self.max_batch:
+                    self._cond.wait(self.flush_interval_seconds)
+                if self._closed:
+                    return
+            self.flush()
+
+            if (
+                self.purge_after_seconds > 0
+                and time.monotonic() - last_purge >= self.purge_interval_seconds
+            ):
+                last_purge = time.monotonic()
+                try:
+                    purged = self.inner.purge_expired(self.purge_after_seconds)
+                except Exception as e:
+                    print(f"Error purging expired sessions: {e}")
+                    continue
+                with self._cond:
+                    self._stats["purged"] += purged
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["pending"] = len(self._pending)
+        return {**self.inner.get_stats(), "write_behind": stats}
+
+
+def create_session_store(
+    backend: str,
+    db_path: str = "./sessions.db",
+    flush_interval_seconds: float = 0.05,
+    ttl_seconds: float = 0.0,
+) -> Optional[SessionStore]:
+    """Build the configured store; "memory" needs none, so returns None"""
+    if backend == "memory":
+        return None
+    if backend == "sqlite":
+        return WriteBehindSessionStore(
+            SQLiteSessionStore(db_path),
+            flush_interval_seconds=flush_interval_seconds,
+            purge_after_seconds=ttl_seconds,
+        )
+    raise ValueError(f"Unknown session backend: {backend}")
@@ -0,0 +1,114 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Call:
+    """One in-flight computation shared by every caller with the same key"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.callers = 1
+
+
+class _AsyncCall:
+    def __init__(self, task: "asyncio.Task"):
+        self.task = task
+        self.callers = 1
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls so only one does the work.
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait for and share its result (or exception). Sync callers
+    (threads) and async callers (tasks) are tracked separately.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._async_calls: Dict[Hashable, _AsyncCall] = {}
+        self._stats = {"leaders": 0, "coalesced": 0, "max_callers": 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run fn once per key across concurrent threads.
+
+        Returns:
+            Tuple of (result, shared) where shared is True for callers that
+            reused another caller's in-flight result
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            shared = call is not None
+            if shared:
+                call.callers += 1
+                self._record_follower(call.callers)
+            else:
+                call = self._calls[key] = _Call()
+                self._stats["leaders"] += 1
+
+        if shared:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    async def ado(
+        self, key: Hashable, fn: Callable[[], Awaitable[Any]]
+    ) -> Tuple[Any, bool]:
+        """
+        Async variant of do for callers on the event loop.
+
+        The shared work runs in its own task; it is cancelled only once every
+        caller waiting on it has been cancelled.
+        """
+        with self._lock:
+            call = self._async_calls.get(key)
+            shared = call is not None
+            if shared:
+                call.callers += 1
+                self._record_follower(call.callers)
+            else:
+                call = self._async_calls[key] = _AsyncCall(asyncio.ensure_future(fn()))
+                call.task.add_done_callback(
+                    lambda _task: self._async_calls.pop(key, None)
+                )
+                self._stats["leaders"] += 1
+
+        try:
+            return await asyncio.shield(call.task), shared
+        except asyncio.CancelledError:
+            call.callers -= 1
+            if call.callers == 0:
+                call.task.cancel()
+            raise
+
+    def _record_follower(self, callers: int):
+        # Caller holds self._lock
+        self._stats["coalesced"] += 1
+        self._stats["max_callers"] = max(self._stats["max_callers"], callers)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Leader/coalesced counts and the share of calls that did no work"""
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["in_flight"] = len(self._calls) + len(self._async_calls)
+        total = stats["leaders"] + stats["coalesced"]
+        stats["coalesced_ratio"] = stats["coalesced"] / total if total else 0.0
+        return stats
@@ -0,0 +1,252 @@
+import contextvars
+import re
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+from deadline import Deadline
+from metrics import observe_tool
+from search_tools import CourseSearchTool, ToolContext
+from vector_store import SearchResults
+
+# Words that carry no retrieval signal when comparing query phrasings
+STOPWORDS = {
+    "a",
+    "about",
+    "an",
+    "and",
+    "are",
+    "as",
+    "at",
+    "be",
+    "can",
+    "course",
+    "covered",
+    "does",
+    "explain",
+    "for",
+    "from",
+    "how",
+    "in",
+    "is",
+    "it",
+    "me",
+    "of",
+    "on",
+    "tell",
+    "the",
+    "this",
+    "to",
+    "was",
+    "what",
+    "which",
+    "with",
+}
+
+
+class SpeculationStats:
+    """Thread-safe counters for how often speculative searches are used"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {"started": 0, "hits": 0, "misses": 0, "unused": 0}
+
+    def record(self, outcome: str):
+        with self._lock:
+            self._counts[outcome] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._counts)
+        attempts = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / attempts if attempts else 0.0
+        return stats
+
+
+class SpeculativeSearch:
+    """A content search started on the raw user query, ahead of the model"""
+
+    def __init__(
+        self,
+        user_query: str,
+        future: "Future[SearchResults]",
+        match_threshold: float,
+        wait_seconds: float,
+        deadline: Optional[Deadline] = None,
+        resolve_course_name: Optional[Callable[[str], Optional[str]]] = None,
+    ):
+        self.user_query = user_query
+        self.future = future
+        self.match_threshold = match_threshold
+        self.wait_seconds = wait_seconds
+        self.deadline = deadline
+        # The live search's course-name resolver; without one, names must be
+        # exact titles
+        self.resolve_course_name = resolve_course_name
+        self.consulted = False
+        self._terms = query_terms(user_query)
+
+    def take_if_matches(
+        self,
+        query: str,
+        course_name: Optional[str] = None,
+        lesson_number: Optional[int] = None,
+    ) -> Optional[SearchResults]:
+        """Return the prefetched results if they answer this tool call"""
+        self.consulted = True
+        if term_overlap(self._terms, query_terms(query)) < self.match_threshold:
+            return None
+
+        try:
+            wait_seconds = self.wait_seconds
+            if self.deadline is not None:
+                wait_seconds = self.deadline.timeout(wait_seconds, "speculative search")
+            results = self.future.result(timeout=wait_seconds)
+        except Exception:
+            return None
+        if results.error or results.is_empty():
+            return None
+
+        # The live search filters on the title the name resolves to, so the
+        # prefetched hits must carry exactly that title
+        course_title = None
+        if course_name:
+            course_title = (
+                self.resolve_course_name(course_name)
+                if self.resolve_course_name is not None
+                else course_name
+            )
+            if not course_title:
+                return None
+
+        # An unfiltered top-k equals the filtered top-k only if every hit
+        # already satisfies the filters the model asked for
+        if not all(
+            self._satisfies_filters(metadata, course_title, lesson_number)
+            for metadata in results.metadata
+        ):
+            return None
+        return results
+
+    @staticmethod
+    def _satisfies_filters(
+        metadata: Dict[str, Any],
+        course_title: Optional[str],
+        lesson_number: Optional[int],
+    ) -> bool:
+        if lesson_number is not None and metadata.get("lesson_number") != lesson_number:
+            return False
+        if course_title is not None and metadata.get("course_title") != course_title:
+            return False
+        return True
+
+
+class SpeculativeToolManager:
+    """Per-request view of a ToolManager that serves searches from a speculation"""
+
+    def __init__(
+        self,
+        tool_manager,
+        search_tool: CourseSearchTool,
+        speculation: SpeculativeSearch,
+        stats: SpeculationStats,
+    ):
+        self.tool_manager = tool_manager
+        self.search_tool = search_tool
+        self.speculation = speculation
+        self.stats = stats
+        self.search_tool_name = search_tool.get_tool_definition()["name"]
+
+    def get_tool_definitions(self) -> list:
+        return self.tool_manager.get_tool_definitions()
+
+    def is_blocking_tool(self, tool_name: str) -> bool:
+        return self.tool_manager.is_blocking_tool(tool_name)
+
+    def execute_tool(
+        self, tool_name: str, tool_context: Optional[ToolContext] = None, **kwargs
+    ) -> str:
+        if tool_name == self.search_tool_name and "query" in kwargs:
+            results = self.speculation.take_if_matches(**kwargs)
+            if results is not None:
+                self.stats.record("hits")
+                return self._render_prefetched(results, tool_context, kwargs)
+            self.stats.record("misses")
+        return self.tool_manager.execute_tool(
+            tool_name, tool_context=tool_context, **kwargs
+        )
+
+    def _render_prefetched(
+        self,
+        results: SearchResults,
+        tool_context: Optional[ToolContext],
+        kwargs: Dict[str, Any],
+    ) -> str:
+        started = time.perf_counter()
+        try:
+            return self.search_tool.render_results(
+                results,
+                kwargs.get("course_name"),
+                kwargs.get("lesson_number"),
+                tool_context,
+            )
+        finally:
+            # Timed like a live call, under its own outcome
+            observe_tool(
+                self.search_tool_name, time.perf_counter() - started, "prefetched"
+            )
+
+    def get_last_sources(self) -> list:
+        return self.tool_manager.get_last_sources()
+
+    def reset_sources(self):
+        self.tool_manager.reset_sources()
+
+
+def query_terms(text: str) -> set:
+    """Lowercased content words of a query"""
+    words = re.findall(r"\w+", text.lower())
+    return {word for word in words if word not in STOPWORDS}
+
+
+def term_overlap(left: set, right: set) -> float:
+    """Overlap coefficient: shared terms relative to the smaller term set"""
+    if not left or not right:
+        return 0.0
+    return len(left & right) / min(len(left), len(right))
+
+
+def start_speculative_search(
+    executor,
+    vector_store,
+    user_query: str,
+    match_threshold: float,
+    wait_seconds: float,
+    stats: SpeculationStats,
+    deadline: Optional[Deadline] = None,
+) -> SpeculativeSearch:
+    """Kick off a search on the raw user query in the background"""
+    stats.record("started")
+    search_kwargs = {"query": user_query}
+    if deadline is not None:
+        search_kwargs["deadline"] = deadline
+    # A copy of the caller's context, so the search counts toward its timings
+    future = executor.submit(
+        contextvars.copy_context().run, vector_store.search, **search_kwargs
+    )
+    return SpeculativeSearch(
+        user_query,
+        future,
+        match_threshold,
+        wait_seconds,
+        deadline,
+        resolve_course_name=vector_store.resolve_course_name,
+    )
+
+
+def finish_speculative_search(speculation: SpeculativeSearch, stats: SpeculationStats):
+    """Record speculations the model never consulted and drop pending work"""
+    if not speculation.consulted:
+        stats.record("unused")
+        speculation.future.cancel()
@@ -48,7 +48,9 @@ class StubRAGSystem:
         self.query_calls: list[dict[str, str]] = []
         self.course_analytics = course_analytics
 
-    def query(self, query: str, session_id: str) -> tuple[str, list[str]]:
+    async def aquery(
+        self, query: str, session_id: str, deadline=None
+    ) -> tuple[str, list[str]]:
         self.query_calls.append({"query": query, "session_id": session_id})
         if self.query_error:
             raise self.query_error
@@ -98,7 +100,7 @@ def api_app(rag_stub: StubRAGSystem) -> FastAPI:
         try:
             session_id = request.session_id or rag_stub.session_manager.create_session()
             answer, sources = await asyncio.wait_for(
-                asyncio.to_thread(rag_stub.query, request.query, session_id),
+                rag_stub.aquery(request.query, session_id),
                 timeout=5,
             )
             return QueryResponse(answer=answer, sources=sources, session_id=session_id)
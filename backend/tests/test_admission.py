@@ -0,0 +1,165 @@
+import asyncio
+import importlib
+import sys
+from pathlib import Path
+from types import ModuleType, SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+BACKEND_PATH = Path(__file__).resolve().parents[1]
+if str(BACKEND_PATH) not in sys.path:
+    sys.path.insert(0, str(BACKEND_PATH))
+
+from admission import AdmissionController, AdmissionRejected  # noqa: E402
+
+
+def test_requests_beyond_the_limit_wait_in_fifo_order():
+    controller = AdmissionController(max_in_flight=1, max_queue=4)
+    order = []
+
+    async def request(name):
+        async with await controller.acquire():
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    async def run():
+        await asyncio.gather(*(request(i) for i in range(4)))
+
+    asyncio.run(run())
+
+    assert order == [0, 1, 2, 3]
+    stats = controller.get_stats()
+    assert stats["admitted"] == 4
+    assert stats["queued"] == 3
+    assert stats["in_flight"] == 0
+    assert stats["queue_wait_p95_ms"] > 0
+
+
+def test_full_queue_rejects_immediately_with_429():
+    controller = AdmissionController(max_in_flight=1, max_queue=1)
+
+    async def run():
+        holder = await controller.acquire()
+        waiter = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire()
+        holder.release()
+        (await waiter).release()
+        return rejected.value
+
+    error = asyncio.run(run())
+
+    assert error.status_code == 429
+    assert error.retry_after >= 1
+    assert controller.get_stats()["rejected_queue_full"] == 1
+
+
+def test_queue_deadline_rejects_with_503_and_frees_the_queue():
+    controller = AdmissionController(
+        max_in_flight=1, max_queue=4, queue_timeout_seconds=0.02
+    )
+
+    async def run():
+        holder = await controller.acquire()
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire()
+        holder.release()
+        return rejected.value
+
+    error = asyncio.run(run())
+
+    assert error.status_code == 503
+    stats = controller.get_stats()
+    assert stats["rejected_queue_timeout"] == 1
+    assert stats["queue_depth"] == 0
+    assert stats["in_flight"] == 0
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    controller = AdmissionController(max_in_flight=1, max_queue=4)
+
+    async def run():
+        holder = await controller.acquire()
+        waiter = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        holder.release()
+        holder.release()
+        ticket = await controller.acquire()
+        ticket.release()
+
+    asyncio.run(run())
+
+    assert controller.get_stats()["in_flight"] == 0
+
+
+def test_requests_over_a_shrunken_capacity_queue_instead_of_running():
+    capacity = {"limit": 2}
+    controller = AdmissionController(
+        max_in_flight=8, max_queue=4, capacity_fn=lambda: capacity["limit"]
+    )
+
+    async def run():
+        first = await controller.acquire()
+        second = await controller.acquire()
+        capacity["limit"] = 1
+        third = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+        queued = controller.get_stats()["queue_depth"]
+
+        # Capacity is now 1: the first release retires a slot, the second
+        # hands the remaining one to the waiter
+        first.release()
+        await asyncio.sleep(0)
+        still_queued = not third.done()
+        second.release()
+        (await third).release()
+        return queued, still_queued
+
+    queued, still_queued = asyncio.run(run())
+
+    assert queued == 1
+    assert still_queued
+    assert controller.get_stats()["in_flight"] == 0
+
+
+class StubRAGSystem:
+    def __init__(self, _config):
+        self.session_manager = SimpleNamespace(
+            create_session=lambda: "session_1", close=lambda: None
+        )
+        self.ai_generator = SimpleNamespace(aclose=self._aclose)
+
+    async def _aclose(self):
+        pass
+
+    def add_course_folder(self, _folder_path, clear_existing=False):
+        return 0, 0
+
+    def llm_capacity(self):
+        return 64
+
+
+def test_query_endpoints_shed_load_with_retry_after(monkeypatch):
+    fake_rag_module = ModuleType("rag_system")
+    fake_rag_module.RAGSystem = StubRAGSystem
+    monkeypatch.setitem(sys.modules, "rag_system", fake_rag_module)
+    monkeypatch.chdir(BACKEND_PATH)
+    sys.modules.pop("app", None)
+    try:
+        app_module = importlib.import_module("app")
+        app_module.admission = AdmissionController(max_in_flight=0, max_queue=0)
+        with TestClient(app_module.app) as client:
+            response = client.post("/api/query", json={"query": "What is MCP?"})
+            stream = client.post("/api/query/stream", json={"query": "What is MCP?"})
+            stats = client.get("/api/admission/stats").json()
+    finally:
+        sys.modules.pop("app", None)
+
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "1"
+    assert stream.status_code == 429
+    assert stats["rejected_queue_full"] == 2
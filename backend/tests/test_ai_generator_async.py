@@ -0,0 +1,135 @@
+import asyncio
+import copy
+import sys
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+BACKEND_PATH = Path(__file__).resolve().parents[1]
+if str(BACKEND_PATH) not in sys.path:
+    sys.path.insert(0, str(BACKEND_PATH))
+
+from ai_generator import AIGenerator  # noqa: E402
+
+
+class StubAsyncMessagesAPI:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(copy.deepcopy(kwargs))
+        return self.responses.pop(0)
+
+
+class StubAsyncAnthropicClient:
+    def __init__(self, responses):
+        self.messages = StubAsyncMessagesAPI(responses)
+
+
+class ThreadRecordingToolManager:
+    def __init__(self, blocking_tools):
+        self.blocking_tools = set(blocking_tools)
+        self.calls = []
+
+    def is_blocking_tool(self, tool_name: str) -> bool:
+        return tool_name in self.blocking_tools
+
+    def execute_tool(self, tool_name: str, **kwargs):
+        self.calls.append((tool_name, kwargs, threading.get_ident()))
+        return f"result for {tool_name}"
+
+
+def build_async_generator(responses):
+    generator = AIGenerator("test-key", "test-model", 10, 0)
+    generator.async_client = StubAsyncAnthropicClient(responses)
+    return generator
+
+
+def build_tool_use_response(tool_name: str, tool_input: dict, tool_use_id: str):
+    return SimpleNamespace(
+        stop_reason="tool_use",
+        content=[
+            SimpleNamespace(
+                type="tool_use", name=tool_name, input=tool_input, id=tool_use_id
+            )
+        ],
+    )
+
+
+def build_text_response(text: str):
+    return SimpleNamespace(
+        stop_reason="end_turn",
+        content=[SimpleNamespace(type="text", text=text)],
+    )
+
+
+def test_agenerate_response_runs_tool_round_then_final_answer():
+    generator = build_async_generator(
+        [
+            build_tool_use_response(
+                "search_course_content", {"query": "lesson 5"}, "toolu_1"
+            ),
+            build_text_response("Lesson 5 covered batching."),
+        ]
+    )
+    tool_manager = ThreadRecordingToolManager({"search_course_content"})
+    tools = [{"name": "search_course_content", "input_schema": {"type": "object"}}]
+
+    response_text = asyncio.run(
+        generator.agenerate_response(
+            query="What was covered in lesson 5?",
+            tools=tools,
+            tool_manager=tool_manager,
+        )
+    )
+
+    assert response_text == "Lesson 5 covered batching."
+    first_call, second_call = generator.async_client.messages.calls
+    assert first_call["tools"] == tools
+    assert second_call["messages"][-1]["content"][0]["tool_use_id"] == "toolu_1"
+
+
+def test_agenerate_response_offloads_only_blocking_tools():
+    generator = build_async_generator(
+        [
+            build_tool_use_response("search_course_content", {"query": "a"}, "t1"),
+            build_tool_use_response("lookup_glossary", {"term": "MCP"}, "t2"),
+            build_text_response("done"),
+        ]
+    )
+    tool_manager = ThreadRecordingToolManager({"search_course_content"})
+    loop_thread_ids = []
+
+    async def run():
+        loop_thread_ids.append(threading.get_ident())
+        return await generator.agenerate_response(
+            query="q",
+            tools=[{"name": "search_course_content"}, {"name": "lookup_glossary"}],
+            tool_manager=tool_manager,
+        )
+
+    assert asyncio.run(run()) == "done"
+    (_, _, search_thread), (_, _, glossary_thread) = tool_manager.calls
+    assert search_thread != loop_thread_ids[0]
+    assert glossary_thread == loop_thread_ids[0]
+
+
+def test_agenerate_response_returns_fallback_when_tool_fails():
+    generator = build_async_generator(
+        [build_tool_use_response("search_course_content", {"query": "a"}, "t1")]
+    )
+
+    class FailingToolManager(ThreadRecordingToolManager):
+        def execute_tool(self, tool_name: str, **kwargs):
+            raise RuntimeError("vector store unavailable")
+
+    response_text = asyncio.run(
+        generator.agenerate_response(
+            query="q",
+            tools=[{"name": "search_course_content"}],
+            tool_manager=FailingToolManager({"search_course_content"}),
+        )
+    )
+
+    assert response_text == AIGenerator.TOOL_FAILURE_FALLBACK
@@ -0,0 +1,224 @@
+import asyncio
+import copy
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+BACKEND_PATH = Path(__file__).resolve().parents[1]
+if str(BACKEND_PATH) not in sys.path:
+    sys.path.insert(0, str(BACKEND_PATH))
+
+from ai_generator import AIGenerator  # noqa: E402
+from request_timing import collect_timings  # noqa: E402
+from search_tools import CourseSearchTool, ToolContext, ToolManager  # noqa: E402
+from vector_store import SearchResults  # noqa: E402
+
+
+class StubMessagesAPI:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def create(self, **kwargs):
+        self.calls.append(copy.deepcopy(kwargs))
+        return self.responses.pop(0)
+
+
+class AsyncStubMessagesAPI(StubMessagesAPI):
+    async def create(self, **kwargs):
+        return super().create(**kwargs)
+
+
+class BarrierToolManager:
+    """Tools that only finish if they run at the same time as each other"""
+
+    def __init__(self, parties: int, fail=(), sleep_for=None):
+        self.barrier = threading.Barrier(parties, timeout=2)
+        self.fail = set(fail)
+        self.sleep_for = sleep_for or {}
+
+    def is_blocking_tool(self, _tool_name: str) -> bool:
+        return True
+
+    def execute_tool(self, tool_name: str, **kwargs):
+        self.barrier.wait()
+        time.sleep(self.sleep_for.get(tool_name, 0))
+        if tool_name in self.fail:
+            raise RuntimeError(f"{tool_name} unavailable")
+        return f"{tool_name}: {kwargs}"
+
+
+def two_tool_round():
+    return SimpleNamespace(
+        content=[
+            SimpleNamespace(
+                type="tool_use",
+                name="search_course_content",
+                input={"query": "batching"},
+                id="t_search",
+            ),
+            SimpleNamespace(
+                type="tool_use",
+                name="get_course_outline",
+                input={"course_name": "MCP"},
+                id="t_outline",
+            ),
+        ]
+    )
+
+
+def text_response(text: str):
+    return SimpleNamespace(content=[SimpleNamespace(type="text", text=text)])
+
+
+def build_generator(responses, asynchronous=False, tool_timeout_seconds=5.0):
+    generator = AIGenerator(
+        "test-key", "test-model", 10, 0, tool_timeout_seconds=tool_timeout_seconds
+    )
+    messages = (AsyncStubMessagesAPI if asynchronous else StubMessagesAPI)(responses)
+    if asynchronous:
+        generator.async_client = SimpleNamespace(messages=messages)
+    else:
+        generator.client = SimpleNamespace(messages=messages)
+    return generator
+
+
+def tool_results_sent(messages_api):
+    return messages_api.calls[-1]["messages"][-1]["content"]
+
+
+def test_tool_calls_in_one_round_run_concurrently_in_call_order():
+    generator = build_generator([two_tool_round(), text_response("answer")])
+
+    response_text = generator.generate_response(
+        query="q",
+        tools=[{"name": "search_course_content"}, {"name": "get_course_outline"}],
+        tool_manager=BarrierToolManager(parties=2),
+    )
+
+    assert response_text == "answer"
+    results = tool_results_sent(generator.client.messages)
+    assert [result["tool_use_id"] for result in results] == ["t_search", "t_outline"]
+    assert results[0]["content"] == "search_course_content: {'query': 'batching'}"
+
+
+def test_failed_tool_is_reported_without_discarding_others():
+    generator = build_generator([two_tool_round(), text_response("answer")])
+
+    generator.generate_response(
+        query="q",
+        tools=[{"name": "search_course_content"}, {"name": "get_course_outline"}],
+        tool_manager=BarrierToolManager(parties=2, fail={"get_course_outline"}),
+    )
+
+    search_result, outline_result = tool_results_sent(generator.client.messages)
+    assert "is_error" not in search_result
+    assert outline_result["is_error"] is True
+    assert "get_course_outline unavailable" in outline_result["content"]
+
+
+def test_slow_tool_times_out_as_error_result():
+    generator = build_generator(
+        [two_tool_round(), text_response("answer")], tool_timeout_seconds=0.05
+    )
+
+    generator.generate_response(
+        query="q",
+        tools=[{"name": "search_course_content"}, {"name": "get_course_outline"}],
+        tool_manager=BarrierToolManager(
+            parties=2, sleep_for={"get_course_outline": 0.5}
+        ),
+    )
+
+    search_result, outline_result = tool_results_sent(generator.client.messages)
+    assert "is_error" not in search_result
+    assert outline_result["is_error"] is True
+    assert "timed out" in outline_result["content"]
+
+
+def test_async_tool_calls_run_concurrently_and_keep_order():
+    generator = build_generator(
+        [two_tool_round(), text_response("answer")], asynchronous=True
+    )
+
+    response_text = asyncio.run(
+        generator.agenerate_response(
+            query="q",
+            tools=[{"name": "search_course_content"}, {"name": "get_course_outline"}],
+            tool_manager=BarrierToolManager(parties=2, fail={"search_course_content"}),
+        )
+    )
+
+    assert response_text == "answer"
+    search_result, outline_result = tool_results_sent(generator.async_client.messages)
+    assert search_result["is_error"] is True
+    assert outline_result["content"] == "get_course_outline: {'course_name': 'MCP'}"
+
+
+class CourseNamedStore:
+    """Every search hits lesson 1 of the course named in the query"""
+
+    def search(self, query, course_name=None, lesson_number=None):
+        time.sleep(0.01)
+        return SearchResults(
+            documents=[f"{query} content"],
+            metadata=[{"course_title": query, "lesson_number": 1}],
+            distances=[0.1],
+        )
+
+    def get_lesson_link(self, _course_title, _lesson_number):
+        return None
+
+
+class PerQueryMessagesAPI:
+    """Asks for a search on the request's own course, then answers"""
+
+    async def create(self, **kwargs):
+        last = kwargs["messages"][-1]["content"]
+        if isinstance(last, str):
+            return SimpleNamespace(
+                content=[
+                    SimpleNamespace(
+                        type="tool_use",
+                        name="search_course_content",
+                        input={"query": last},
+                        id="t1",
+                    )
+                ]
+            )
+        await asyncio.sleep(0)
+        return text_response("answer")
+
+
+def test_concurrent_requests_collect_only_their_own_sources():
+    generator = AIGenerator("test-key", "test-model", 10, 0, tool_max_workers=4)
+    generator.async_client = SimpleNamespace(messages=PerQueryMessagesAPI())
+    tool_manager = ToolManager()
+    search_tool = CourseSearchTool(CourseNamedStore())
+    tool_manager.register_tool(search_tool)
+    contexts = [ToolContext() for _ in range(8)]
+
+    async def run_one(i, context):
+        with collect_timings() as timings:
+            await generator.agenerate_response(
+                query=f"Course {i}",
+                tools=tool_manager.get_tool_definitions(),
+                tool_manager=tool_manager,
+                tool_context=context,
+            )
+        return timings
+
+    async def run_all():
+        return await asyncio.gather(
+            *(run_one(i, context) for i, context in enumerate(contexts))
+        )
+
+    all_timings = asyncio.run(run_all())
+
+    assert [context.sources for context in contexts] == [
+        [f"Course {i} - Lesson 1"] for i in range(8)
+    ]
+    assert all(len(timings.to_dict()["tools"]) == 1 for timings in all_timings)
+    assert search_tool.last_sources == []
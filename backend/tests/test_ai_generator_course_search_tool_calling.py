@@ -38,8 +38,7 @@ class StubToolManager:
 
 
 def build_generator_with_stub_client(responses):
-    generator = object.__new__(AIGenerator)
-    generator.base_params = {"model": "test-model", "temperature": 0, "max_tokens": 800}
+    generator = AIGenerator("test-key", "test-model", 10, 0)
     generator.client = StubAnthropicClient(responses)
     return generator
 
@@ -0,0 +1,106 @@
+import copy
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+BACKEND_PATH = Path(__file__).resolve().parents[1]
+if str(BACKEND_PATH) not in sys.path:
+    sys.path.insert(0, str(BACKEND_PATH))
+
+from ai_generator import AIGenerator  # noqa: E402
+
+
+class StubMessagesAPI:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def create(self, **kwargs):
+        self.calls.append(copy.deepcopy(kwargs))
+        return self.responses.pop(0)
+
+
+def build_generator(responses):
+    generator = AIGenerator("test-key", "test-model", 10, 0)
+    generator.client = SimpleNamespace(messages=StubMessagesAPI(responses))
+    return generator
+
+
+def text_response(text: str, **usage):
+    return SimpleNamespace(
+        content=[SimpleNamespace(type="text", text=text)],
+        usage=SimpleNamespace(**usage),
+    )
+
+
+def test_system_prompt_is_sent_as_cached_block_without_history():
+    generator = build_generator([text_response("a"), text_response("b")])
+
+    generator.generate_response(query="first question")
+    generator.generate_response(
+        query="second question", conversation_history="User: hi\nAssistant: hello"
+    )
+
+    first_call, second_call = generator.client.messages.calls
+    assert first_call["system"] == second_call["system"]
+    assert first_call["system"] == [
+        {
+            "type": "text",
+            "text": AIGenerator.SYSTEM_PROMPT,
+            "cache_control": {"type": "ephemeral"},
+        }
+    ]
+
+
+def test_history_is_sent_in_the_user_turn():
+    generator = build_generator([text_response("answer")])
+
+    generator.generate_response(
+        query="What about lesson 2?",
+        conversation_history="User: lesson 1?\nAssistant: Intro",
+    )
+
+    (call,) = generator.client.messages.calls
+    assert call["messages"] == [
+        {
+            "role": "user",
+            "content": [
+                {
+                    "type": "text",
+                    "text": "Previous conversation:\nUser: lesson 1?\nAssistant: Intro",
+                },
+                {"type": "text", "text": "What about lesson 2?"},
+            ],
+        }
+    ]
+
+
+def test_usage_stats_accumulate_cache_reads_and_writes():
+    generator = build_generator(
+        [
+            text_response(
+                "a",
+                input_tokens=20,
+                output_tokens=5,
+                cache_creation_input_tokens=1200,
+                cache_read_input_tokens=0,
+            ),
+            text_response(
+                "b",
+                input_tokens=20,
+                output_tokens=7,
+                cache_creation_input_tokens=0,
+                cache_read_input_tokens=1200,
+            ),
+        ]
+    )
+
+    generator.generate_response(query="q1")
+    generator.generate_response(query="q2")
+    stats = generator.get_usage_stats()
+
+    assert stats["requests"] == 2
+    assert stats["output_tokens"] == 12
+    assert stats["cache_creation_input_tokens"] == 1200
+    assert stats["cache_read_input_tokens"] == 1200
+    assert stats["cache_read_ratio"] == 1200 / 2440
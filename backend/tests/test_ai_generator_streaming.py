@@ -0,0 +1,153 @@
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+BACKEND_PATH = Path(__file__).resolve().parents[1]
+if str(BACKEND_PATH) not in sys.path:
+    sys.path.insert(0, str(BACKEND_PATH))
+
+from ai_generator import AIGenerator  # noqa: E402
+
+
+class StubMessageStream:
+    def __init__(self, text_deltas, final_message):
+        self.text_deltas = text_deltas
+        self.final_message = final_message
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_exc_info):
+        return False
+
+    @property
+    async def text_stream(self):
+        for text in self.text_deltas:
+            yield text
+
+    async def get_final_message(self):
+        return self.final_message
+
+
+class StubStreamingMessagesAPI:
+    def __init__(self, rounds):
+        self.rounds = list(rounds)
+        self.calls = []
+
+    def stream(self, **kwargs):
+        self.calls.append(kwargs)
+        text_deltas, final_message = self.rounds.pop(0)
+        return StubMessageStream(text_deltas, final_message)
+
+
+class StubToolManager:
+    def __init__(self):
+        self.calls = []
+
+    def is_blocking_tool(self, _tool_name: str) -> bool:
+        return False
+
+    def execute_tool(self, tool_name: str, **kwargs):
+        self.calls.append((tool_name, kwargs))
+        return f"result for {tool_name}"
+
+
+def build_streaming_generator(rounds):
+    generator = AIGenerator("test-key", "test-model", 10, 0)
+    generator.async_client = SimpleNamespace(messages=StubStreamingMessagesAPI(rounds))
+    return generator
+
+
+def tool_use_message(tool_name: str, tool_input: dict, tool_use_id: str):
+    return SimpleNamespace(
+        content=[
+            SimpleNamespace(
+                type="tool_use", name=tool_name, input=tool_input, id=tool_use_id
+            )
+        ]
+    )
+
+
+def text_message(text: str):
+    return SimpleNamespace(content=[SimpleNamespace(type="text", text=text)])
+
+
+async def collect(stream):
+    return [event async for event in stream]
+
+
+def test_astream_response_streams_final_answer_after_tool_round():
+    generator = build_streaming_generator(
+        [
+            ([], tool_use_message("search_course_content", {"query": "q"}, "t1")),
+            (["Lesson 5 ", "covered ", "batching."], text_message("unused")),
+        ]
+    )
+    tool_manager = StubToolManager()
+    tools = [{"name": "search_course_content"}]
+
+    events = asyncio.run(
+        collect(
+            generator.astream_response(
+                query="What was covered in lesson 5?",
+                tools=tools,
+                tool_manager=tool_manager,
+            )
+        )
+    )
+
+    assert events == [
+        ("tool_results", ["search_course_content"]),
+        ("text", "Lesson 5 "),
+        ("text", "covered "),
+        ("text", "batching."),
+    ]
+    first_call, second_call = generator.async_client.messages.calls
+    assert first_call["tools"] == tools
+    assert second_call["messages"][-1]["content"][0]["tool_use_id"] == "t1"
+
+
+def test_astream_response_drops_tools_after_round_limit():
+    generator = build_streaming_generator(
+        [
+            ([], tool_use_message("search_course_content", {"query": "a"}, "t1")),
+            ([], tool_use_message("search_course_content", {"query": "b"}, "t2")),
+            (["Final."], text_message("Final.")),
+        ]
+    )
+
+    events = asyncio.run(
+        collect(
+            generator.astream_response(
+                query="q",
+                tools=[{"name": "search_course_content"}],
+                tool_manager=StubToolManager(),
+            )
+        )
+    )
+
+    assert events[-1] == ("text", "Final.")
+    assert "tools" not in generator.async_client.messages.calls[-1]
+
+
+def test_astream_response_emits_outline_tool_output_verbatim():
+    generator = build_streaming_generator(
+        [([], tool_use_message("get_course_outline", {"course_name": "MCP"}, "t1"))]
+    )
+
+    events = asyncio.run(
+        collect(
+            generator.astream_response(
+                query="Show the MCP outline",
+                tools=[{"name": "get_course_outline"}],
+                tool_manager=StubToolManager(),
+            )
+        )
+    )
+
+    assert events == [
+        ("tool_results", ["get_course_outline"]),
+        ("text", "result for get_course_outline"),
+    ]
+    assert len(generator.async_client.messages.calls) == 1
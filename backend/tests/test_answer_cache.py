@@ -0,0 +1,89 @@
+import sys
+from pathlib import Path
+
+BACKEND_PATH = Path(__file__).resolve().parents[1]
+if str(BACKEND_PATH) not in sys.path:
+    sys.path.insert(0, str(BACKEND_PATH))
+
+from answer_cache import AnswerCache  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def keyword_embedder(texts):
+    # Two-dimensional "embedding": mentions of MCP vs. everything else
+    return [[1.0, 0.0] if "mcp" in text else [0.0, 1.0] for text in texts]
+
+
+def test_exact_hit_ignores_case_punctuation_and_spacing():
+    cache = AnswerCache()
+    cache.put("What is MCP?", 1, "MCP is a protocol.", ["MCP - Lesson 1"], 2.5)
+
+    entry = cache.get("  what is   mcp ", 1)
+
+    assert entry.answer == "MCP is a protocol."
+    assert entry.sources == ["MCP - Lesson 1"]
+    stats = cache.get_stats()
+    assert stats["exact_hits"] == 1
+    assert stats["hit_rate"] == 1.0
+    assert stats["latency_saved_seconds"] == 2.5
+
+
+def test_index_version_change_invalidates_entries():
+    cache = AnswerCache()
+    cache.put("What is MCP?", 1, "old answer", [], 1.0)
+
+    assert cache.get("What is MCP?", 2) is None
+    assert cache.get_stats()["invalidations"] == 1
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = AnswerCache(ttl_seconds=10, clock=clock)
+    cache.put("What is MCP?", 1, "answer", [], 1.0)
+
+    clock.now = 11.0
+
+    assert cache.get("What is MCP?", 1) is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = AnswerCache(max_entries=2)
+    cache.put("first", 1, "a1", [], 1.0)
+    cache.put("second", 1, "a2", [], 1.0)
+    cache.get("first", 1)
+
+    cache.put("third", 1, "a3", [], 1.0)
+
+    assert cache.get("second", 1) is None
+    assert cache.get("first", 1).answer == "a1"
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_semantic_hit_above_similarity_threshold():
+    cache = AnswerCache(similarity_threshold=0.9, embed_fn=keyword_embedder)
+    cache.put("What is MCP?", 1, "MCP is a protocol.", [], 3.0)
+
+    assert cache.get("Explain the MCP protocol", 1).answer == "MCP is a protocol."
+    assert cache.get("What is retrieval?", 1) is None
+    stats = cache.get_stats()
+    assert stats["semantic_hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_embedder_is_unused_without_threshold():
+    def failing_embedder(_texts):
+        raise AssertionError("embedder should not be called")
+
+    cache = AnswerCache(embed_fn=failing_embedder)
+    cache.put("What is MCP?", 1, "answer", [], 1.0)
+
+    assert cache.get("Something else", 1) is None
+    assert cache.uses_embeddings is False
@@ -5,7 +5,8 @@ BACKEND_PATH = Path(__file__).resolve().parents[1]
 if str(BACKEND_PATH) not in sys.path:
     sys.path.insert(0, str(BACKEND_PATH))
 
-from search_tools import CourseSearchTool  # noqa: E402
+from request_timing import collect_timings  # noqa: E402
+from search_tools import CourseSearchTool, ToolContext, ToolManager  # noqa: E402
 from vector_store import SearchResults  # noqa: E402
 
 
@@ -76,3 +77,50 @@ def test_execute_formats_results_and_populates_sources():
     assert len(tool.last_sources) == 1
     assert "href=" in tool.last_sources[0]
     assert "Mastering MCP - Lesson 2" in tool.last_sources[0]
+
+
+def lesson_results(course_title: str, lesson_number: int) -> SearchResults:
+    return SearchResults(
+        documents=[f"{course_title} lesson {lesson_number} content."],
+        metadata=[{"course_title": course_title, "lesson_number": lesson_number}],
+        distances=[0.1],
+        error=None,
+    )
+
+
+def test_concurrent_requests_keep_their_sources_apart():
+    tool_manager = ToolManager()
+    tool = CourseSearchTool(StubVectorStore(lesson_results("Mastering MCP", 1)))
+    tool_manager.register_tool(tool)
+    first, second = ToolContext(), ToolContext()
+
+    tool_manager.execute_tool("search_course_content", tool_context=first, query="a")
+    tool.store.result = lesson_results("Intro to RAG", 3)
+    tool_manager.execute_tool("search_course_content", tool_context=second, query="b")
+    tool_manager.execute_tool("search_course_content", tool_context=second, query="b")
+
+    assert first.sources == ["Mastering MCP - Lesson 1"]
+    assert second.sources == ["Intro to RAG - Lesson 3"]
+    assert tool.last_sources == []
+
+
+def test_tool_calls_are_timed_for_the_request_including_failures():
+    class BrokenStore(StubVectorStore):
+        def search(self, **_kwargs):
+            raise RuntimeError("chroma unavailable")
+
+    tool_manager = ToolManager()
+    tool_manager.register_tool(CourseSearchTool(BrokenStore(None)))
+
+    with collect_timings() as timings:
+        try:
+            tool_manager.execute_tool(
+                "search_course_content", tool_context=ToolContext(), query="batching"
+            )
+        except RuntimeError:
+            pass
+
+    (record,) = timings.to_dict()["tools"]
+    assert record["name"] == "search_course_content"
+    assert record["outcome"] == "error"
+    assert record["duration_ms"] >= 0
@@ -0,0 +1,282 @@
+import asyncio
+import sys
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+BACKEND_PATH = Path(__file__).resolve().parents[1]
+if str(BACKEND_PATH) not in sys.path:
+    sys.path.insert(0, str(BACKEND_PATH))
+
+from ai_generator import AIGenerator  # noqa: E402
+from deadline import Deadline, DeadlineExceeded  # noqa: E402
+from resilience import (  # noqa: E402
+    AdaptiveConcurrencyLimiter,
+    CircuitBreaker,
+    LLMGuard,
+)
+from search_tools import CourseSearchTool, ToolContext  # noqa: E402
+from speculative_retrieval import (  # noqa: E402
+    SpeculationStats,
+    SpeculativeSearch,
+    start_speculative_search,
+)
+from vector_store import SearchResults, VectorStore  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class RecordingMessagesAPI:
+    def __init__(self):
+        self.calls = []
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        return SimpleNamespace(
+            stop_reason="end_turn",
+            content=[SimpleNamespace(type="text", text="answer")],
+        )
+
+
+def build_generator():
+    generator = AIGenerator("test-key", "test-model", 10, 0)
+    generator.client = SimpleNamespace(messages=RecordingMessagesAPI())
+    return generator
+
+
+def test_deadline_counts_down_and_check_raises_once_spent():
+    clock = FakeClock()
+    deadline = Deadline(2.0, clock=clock)
+
+    assert deadline.remaining() == 2.0
+    assert deadline.timeout(5.0, "search") == 2.0
+    assert deadline.timeout(1.0, "search") == 1.0
+
+    clock.now += 3.0
+    assert deadline.expired
+    with pytest.raises(DeadlineExceeded, match="deadline exceeded before search"):
+        deadline.check("search")
+
+
+def test_cancelled_deadline_is_spent_immediately():
+    deadline = Deadline(60.0)
+    deadline.cancel()
+
+    assert deadline.remaining() == 0.0
+    with pytest.raises(DeadlineExceeded, match="cancelled"):
+        deadline.check("LLM call")
+    # The API's timeout handling catches it as a timeout
+    assert issubclass(DeadlineExceeded, TimeoutError)
+
+
+def test_generator_caps_provider_timeout_at_time_left():
+    generator = build_generator()
+    clock = FakeClock()
+
+    generator.generate_response("question", deadline=Deadline(3.0, clock=clock))
+
+    assert generator.client.messages.calls[0]["timeout"] == 3.0
+
+
+def test_generator_omits_timeout_without_a_deadline():
+    generator = build_generator()
+
+    generator.generate_response("question")
+
+    assert "timeout" not in generator.client.messages.calls[0]
+
+
+def test_generator_does_not_call_provider_once_deadline_is_spent():
+    generator = build_generator()
+    deadline = Deadline(60.0)
+    deadline.cancel()
+
+    with pytest.raises(DeadlineExceeded):
+        generator.generate_response("question", deadline=deadline)
+
+    assert generator.client.messages.calls == []
+
+
+def test_guard_does_not_count_a_spent_deadline_as_provider_outcome():
+    clock = FakeClock()
+    breaker = CircuitBreaker(min_calls=1, reset_seconds=10, clock=clock)
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, clock=clock)
+    guard = LLMGuard(limiter=limiter, breaker=breaker)
+    breaker.record(success=False)
+    clock.now += 10
+    deadline = Deadline(60.0)
+    deadline.cancel()
+
+    with pytest.raises(DeadlineExceeded):
+        guard.call(lambda: deadline.check("LLM call"))
+
+    # Not a success that closes the half-open breaker, nor a fast call
+    # that grows the limit; the probe and the slot are simply given back
+    assert breaker.state == "half_open"
+    assert limiter.get_stats() == {
+        "limit": 4,
+        "in_flight": 0,
+        "rejected": 0,
+        "increases": 0,
+        "decreases": 0,
+    }
+    assert guard.call(lambda: "probe") == "probe"
+    assert breaker.state == "closed"
+
+
+def test_vector_store_skips_search_past_deadline():
+    store = VectorStore.__new__(VectorStore)
+    store.embedding_function = lambda _texts: pytest.fail("Should not embed")
+    store.course_content = SimpleNamespace(
+        query=lambda **_kwargs: pytest.fail("Chroma should not be queried")
+    )
+    store.max_results = 5
+    deadline = Deadline(60.0)
+    deadline.cancel()
+
+    results = store.search("batching", deadline=deadline)
+
+    assert results.error == VectorStore.DEADLINE_SKIPPED
+
+
+def test_search_tool_passes_context_deadline_to_store():
+    calls = []
+
+    class RecordingStore:
+        def search(self, **kwargs):
+            calls.append(kwargs)
+            return SimpleNamespace(is_empty=lambda: True, error="no results")
+
+    deadline = Deadline(60.0)
+    tool = CourseSearchTool(RecordingStore())
+
+    tool.execute("batching", tool_context=ToolContext(deadline=deadline))
+    tool.execute("batching")
+
+    assert calls[0]["deadline"] is deadline
+    assert "deadline" not in calls[1]
+
+
+def test_vector_store_skips_chroma_once_embedding_spends_the_budget():
+    clock = FakeClock()
+    store = VectorStore.__new__(VectorStore)
+
+    def slow_embedding(_texts):
+        clock.now += 10
+        return [[0.1]]
+
+    store.embedding_function = slow_embedding
+    store.course_content = SimpleNamespace(
+        query=lambda **_kwargs: pytest.fail("Chroma should not be queried")
+    )
+    store.max_results = 5
+
+    results = store.search("batching", deadline=Deadline(5.0, clock=clock))
+
+    assert results.error == VectorStore.DEADLINE_SKIPPED
+
+
+class ImmediateExecutor:
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+def test_speculative_search_runs_and_waits_within_the_deadline():
+    calls = []
+
+    class RecordingStore:
+        def search(self, **kwargs):
+            calls.append(kwargs)
+            return SearchResults(["Batching."], [{"lesson_number": 5}], [0.1])
+
+        def resolve_course_name(self, course_name):
+            return course_name
+
+    deadline = Deadline(60.0)
+    speculation = start_speculative_search(
+        ImmediateExecutor(),
+        RecordingStore(),
+        "batching in lesson 5",
+        match_threshold=0.5,
+        wait_seconds=1,
+        stats=SpeculationStats(),
+        deadline=deadline,
+    )
+    assert calls[0]["deadline"] is deadline
+
+    deadline.cancel()
+    pending = SpeculativeSearch("batching", Future(), 0.5, 30, deadline)
+    started = time.monotonic()
+
+    assert speculation.take_if_matches("batching") is None
+    assert pending.take_if_matches("batching") is None
+    assert time.monotonic() - started < 1.0
+
+
+class ToolRoundMessagesAPI:
+    """Asks for a search, taking longer than the request has left"""
+
+    def __init__(self, clock):
+        self.clock = clock
+
+    def _spend_budget(self):
+        self.clock.now += 10
+        return SimpleNamespace(
+            stop_reason="tool_use",
+            content=[
+                SimpleNamespace(
+                    type="tool_use",
+                    name="search_course_content",
+                    input={"query": "batching"},
+                    id="tool_1",
+                )
+            ],
+        )
+
+    def create(self, **_kwargs):
+        return self._spend_budget()
+
+
+class AsyncToolRoundMessagesAPI(ToolRoundMessagesAPI):
+    async def create(self, **_kwargs):
+        return self._spend_budget()
+
+
+def test_deadline_spent_before_a_tool_round_raises_instead_of_a_fallback():
+    class NeverCalledTools:
+        def execute_tool(self, *_args, **_kwargs):
+            pytest.fail("No tool should start once the budget is spent")
+
+    generator = build_generator()
+    clock = FakeClock()
+    generator.client = SimpleNamespace(messages=ToolRoundMessagesAPI(clock))
+    generator.async_client = SimpleNamespace(messages=AsyncToolRoundMessagesAPI(clock))
+    tools = [{"name": "search_course_content"}]
+
+    with pytest.raises(DeadlineExceeded):
+        generator.generate_response(
+            "question",
+            tools=tools,
+            tool_manager=NeverCalledTools(),
+            deadline=Deadline(5.0, clock=clock),
+        )
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(
+            generator.agenerate_response(
+                "question",
+                tools=tools,
+                tool_manager=NeverCalledTools(),
+                deadline=Deadline(5.0, clock=clock),
+            )
+        )
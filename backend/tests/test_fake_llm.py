@@ -0,0 +1,100 @@
+import asyncio
+import random
+import sys
+from pathlib import Path
+
+import anthropic
+import pytest
+
+BACKEND_PATH = Path(__file__).resolve().parents[1]
+if str(BACKEND_PATH) not in sys.path:
+    sys.path.insert(0, str(BACKEND_PATH))
+
+from ai_generator import AIGenerator  # noqa: E402
+from fake_llm import (  # noqa: E402
+    FakeLLMBackend,
+    LatencyDistribution,
+    create_fake_clients,
+)
+
+SEARCH_TOOL = {"name": "search_course_content", "input_schema": {"type": "object"}}
+
+
+class RecordingToolManager:
+    def __init__(self):
+        self.calls = []
+
+    def is_blocking_tool(self, _tool_name: str) -> bool:
+        return True
+
+    def execute_tool(self, tool_name: str, **kwargs):
+        self.calls.append((tool_name, kwargs))
+        return "Batching groups requests."
+
+
+def build_generator(backend: FakeLLMBackend) -> AIGenerator:
+    client, async_client = create_fake_clients(backend)
+    return AIGenerator(
+        "test-key", "test-model", 10, 0, client=client, async_client=async_client
+    )
+
+
+def test_latency_specs_parse_and_sample_in_seconds():
+    rng = random.Random(1)
+
+    assert LatencyDistribution.parse("fixed:250").sample(rng) == 0.25
+    assert 0.1 <= LatencyDistribution.parse("uniform:100,200").sample(rng) <= 0.2
+    assert LatencyDistribution.parse("lognormal:800,0.4").sample(rng) > 0
+    with pytest.raises(ValueError):
+        LatencyDistribution.parse("gamma:1")
+
+
+def test_default_policy_runs_a_search_round_then_answers():
+    backend = FakeLLMBackend(answer_words=3, seed=7)
+    tool_manager = RecordingToolManager()
+
+    response_text = build_generator(backend).generate_response(
+        query="Answer this question about course materials: What is batching?",
+        tools=[SEARCH_TOOL],
+        tool_manager=tool_manager,
+    )
+
+    assert tool_manager.calls == [
+        ("search_course_content", {"query": "What is batching?"})
+    ]
+    assert response_text.startswith("Fake answer: ")
+    assert backend.request_count == 2
+
+
+def test_scripted_turns_are_served_before_the_policy_and_stream():
+    backend = FakeLLMBackend(
+        script=[
+            {"tool": "search_course_content", "input": {"query": "mcp"}},
+            "Scripted final answer",
+        ]
+    )
+    tool_manager = RecordingToolManager()
+
+    async def collect():
+        events = []
+        async for event in build_generator(backend).astream_response(
+            query="anything", tools=[SEARCH_TOOL], tool_manager=tool_manager
+        ):
+            events.append(event)
+        return events
+
+    events = asyncio.run(collect())
+
+    assert tool_manager.calls == [("search_course_content", {"query": "mcp"})]
+    text = "".join(payload for kind, payload in events if kind == "text")
+    assert text == "Scripted final answer"
+
+
+def test_injected_errors_raise_sdk_exceptions():
+    backend = FakeLLMBackend(error_rate=1.0, error_kinds=["rate_limit"])
+    generator = build_generator(backend)
+
+    with pytest.raises(anthropic.RateLimitError):
+        asyncio.run(generator.agenerate_response(query="What is batching?"))
+
+    assert backend.errors == {"rate_limit": 1}
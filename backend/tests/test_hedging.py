@@ -0,0 +1,115 @@
+import asyncio
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+
+BACKEND_PATH = Path(__file__).resolve().parents[1]
+if str(BACKEND_PATH) not in sys.path:
+    sys.path.insert(0, str(BACKEND_PATH))
+
+from ai_generator import AIGenerator  # noqa: E402
+from hedging import HedgePolicy, ahedged_call, hedged_call  # noqa: E402
+
+
+def warmed_policy(latency_seconds=0.01, **kwargs):
+    policy = HedgePolicy(min_delay_seconds=0.0, min_samples=5, **kwargs)
+    for _ in range(5):
+        policy.start(0)
+        policy.record(0, latency_seconds, hedge_won=False)
+    return policy
+
+
+class SlowFirstMessagesAPI:
+    """First request stalls; any later request answers immediately"""
+
+    def __init__(self):
+        self.calls = 0
+        self.cancelled = 0
+
+    async def create(self, **_kwargs):
+        self.calls += 1
+        if self.calls == 1:
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                self.cancelled += 1
+                raise
+        return SimpleNamespace(
+            content=[SimpleNamespace(type="text", text=f"answer {self.calls}")]
+        )
+
+
+def test_no_hedging_until_enough_latency_samples():
+    policy = HedgePolicy(min_samples=3)
+
+    assert policy.start(0) is None
+    policy.record(0, 0.5, hedge_won=False)
+    policy.record(0, 0.6, hedge_won=False)
+    policy.record(0, 3.0, hedge_won=False)
+
+    assert policy.start(0) == 3.0
+    assert policy.start(1) is None
+
+
+def test_hedge_rate_is_capped():
+    policy = HedgePolicy(max_hedge_ratio=0.5)
+
+    policy.start(0)
+    assert not policy.try_hedge()
+    policy.start(0)
+    assert policy.try_hedge()
+    assert policy.get_stats()["hedges_suppressed"] == 1
+
+
+def test_slow_blocking_call_is_hedged_and_late_result_reported():
+    policy = warmed_policy(max_hedge_ratio=1.0)
+    release = threading.Event()
+    calls = []
+    late_results = []
+
+    def call():
+        calls.append(1)
+        if len(calls) == 1:
+            release.wait(timeout=2)
+            return "primary"
+        return "hedge"
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        result = hedged_call(policy, 0, call, executor, late_results.append)
+        release.set()
+
+    assert result == "hedge"
+    assert late_results == ["primary"]
+    stats = policy.get_stats()
+    assert stats["hedges_issued"] == 1
+    assert stats["hedges_won"] == 1
+
+
+def test_fast_call_is_not_hedged():
+    policy = warmed_policy(latency_seconds=1.0, max_hedge_ratio=1.0)
+
+    result = asyncio.run(ahedged_call(policy, 0, lambda: asyncio.sleep(0, "fast")))
+
+    assert result == "fast"
+    assert policy.get_stats()["hedges_issued"] == 0
+
+
+def test_generator_hedges_slow_async_call_and_cancels_the_loser():
+    policy = warmed_policy(max_hedge_ratio=1.0)
+    generator = AIGenerator("test-key", "test-model", 10, 0, hedge_policy=policy)
+    messages = SlowFirstMessagesAPI()
+    generator.async_client = SimpleNamespace(messages=messages)
+
+    started = time.perf_counter()
+    response_text = asyncio.run(generator.agenerate_response(query="q"))
+
+    assert response_text == "answer 2"
+    assert time.perf_counter() - started < 1
+    assert messages.cancelled == 1
+    stats = generator.get_hedging_stats()
+    assert stats["enabled"] is True
+    assert stats["hedges_won"] == 1
+    assert stats["round_p95_ms"]["0"] >= 0
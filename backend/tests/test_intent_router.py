@@ -0,0 +1,63 @@
+import sys
+from pathlib import Path
+
+BACKEND_PATH = Path(__file__).resolve().parents[1]
+if str(BACKEND_PATH) not in sys.path:
+    sys.path.insert(0, str(BACKEND_PATH))
+
+from intent_router import IntentRouter  # noqa: E402
+
+COURSE_TITLES = [
+    "Building Towards Computer Use with Anthropic",
+    "MCP: Build Rich-Context AI Apps with Anthropic",
+    "Advanced Retrieval for AI with Chroma",
+    "Prompt Compression and Query Optimization",
+]
+
+
+def build_router(titles=None):
+    return IntentRouter(lambda: list(titles or COURSE_TITLES))
+
+
+def test_outline_requests_naming_one_course_are_routed():
+    router = build_router()
+
+    for query in (
+        "Show me the outline of the MCP course",
+        "What is the syllabus for Advanced Retrieval for AI with Chroma?",
+        "List the lessons in the computer use course",
+        "How many lessons does Prompt Compression have?",
+    ):
+        routed = router.route(query)
+        assert routed is not None, query
+        assert routed.intent == "outline"
+
+    assert router.route("outline of the MCP course").course_title == COURSE_TITLES[1]
+
+
+def test_unsure_queries_fall_back_to_the_model():
+    router = build_router()
+
+    assert router.route("What is covered in lesson 3 of the MCP course?") is None
+    assert router.route("Explain the outline of the MCP protocol") is None
+    assert router.route("Show me the course outline") is None
+    assert router.route("Compare the outlines of the MCP and Chroma courses") is None
+    assert router.route("List the lessons in the Anthropic course") is None
+    assert router.route("Show the outline of the Chroma and MCP courses") is None
+
+    stats = router.get_stats()
+    assert stats["routed"] == 0
+    assert stats["no_intent"] == 1
+    assert stats["content_question"] == 2
+    assert stats["no_course"] == 2
+    assert stats["ambiguous_course"] == 1
+
+
+def test_title_index_is_rebuilt_when_catalog_changes():
+    titles = ["Advanced Retrieval for AI with Chroma"]
+    router = build_router(titles)
+    assert router.route("Outline of the MCP course") is None
+
+    titles.append("MCP: Build Rich-Context AI Apps with Anthropic")
+
+    assert router.route("Outline of the MCP course") is not None
@@ -0,0 +1,60 @@
+import asyncio
+import sys
+from pathlib import Path
+
+import httpx
+
+BACKEND_PATH = Path(__file__).resolve().parents[1]
+if str(BACKEND_PATH) not in sys.path:
+    sys.path.insert(0, str(BACKEND_PATH))
+
+from load_generator import (  # noqa: E402
+    RequestResult,
+    format_report,
+    run_load,
+    summarize,
+)
+
+
+def test_summary_reports_percentiles_of_successes_and_error_breakdown():
+    results = [RequestResult(index / 100) for index in range(1, 101)]
+    results += [RequestResult(5.0, "http_503"), RequestResult(0.0, "timeout")]
+
+    summary = summarize(results, wall_seconds=10.0, target_rps=10)
+
+    assert summary["requests"] == 102
+    assert summary["succeeded"] == 100
+    assert summary["throughput_rps"] == 10.0
+    assert summary["latency_ms"] == {
+        "p50": 500.0,
+        "p95": 950.0,
+        "p99": 990.0,
+        "max": 1000.0,
+    }
+    assert summary["errors"] == {"http_503": 1, "timeout": 1}
+    assert "p99=990.0" in format_report(summary)
+
+
+def test_run_load_sends_requests_at_target_rate():
+    queries_seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        queries_seen.append(request.url.path)
+        if len(queries_seen) % 4 == 0:
+            return httpx.Response(503, json={"detail": "overloaded"})
+        return httpx.Response(200, json={"answer": "ok"})
+
+    summary = asyncio.run(
+        run_load(
+            "http://testserver",
+            rps=50,
+            duration_seconds=0.2,
+            seed=3,
+            transport=httpx.MockTransport(handler),
+        )
+    )
+
+    assert queries_seen == ["/api/query"] * 10
+    assert summary["requests"] == 10
+    assert summary["errors"] == {"http_503": 2}
+    assert summary["wall_seconds"] >= 0.18
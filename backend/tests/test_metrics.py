@@ -0,0 +1,125 @@
+import importlib
+import sys
+from pathlib import Path
+from types import ModuleType, SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+BACKEND_PATH = Path(__file__).resolve().parents[1]
+if str(BACKEND_PATH) not in sys.path:
+    sys.path.insert(0, str(BACKEND_PATH))
+
+import metrics  # noqa: E402
+from metrics import MetricsRegistry  # noqa: E402
+from search_tools import Tool, ToolManager  # noqa: E402
+
+
+def test_histogram_renders_cumulative_buckets_sum_and_count():
+    registry = MetricsRegistry()
+    histogram = registry.histogram(
+        "demo_seconds", "Demo latency", ("stage",), buckets=(0.1, 1.0)
+    )
+
+    histogram.observe(0.05, stage="embed")
+    histogram.observe(0.5, stage="embed")
+    histogram.observe(3.0, stage="embed")
+
+    assert registry.render().splitlines() == [
+        "# HELP demo_seconds Demo latency",
+        "# TYPE demo_seconds histogram",
+        'demo_seconds_bucket{stage="embed",le="0.1"} 1',
+        'demo_seconds_bucket{stage="embed",le="1.0"} 2',
+        'demo_seconds_bucket{stage="embed",le="+Inf"} 3',
+        'demo_seconds_sum{stage="embed"} 3.55',
+        'demo_seconds_count{stage="embed"} 3',
+    ]
+
+
+def test_counter_renders_total_and_escapes_label_values():
+    registry = MetricsRegistry()
+    counter = registry.counter("demo_tokens", "Demo tokens", ("model",))
+
+    counter.inc(5, model='say "hi"')
+    counter.inc(2, model='say "hi"')
+
+    assert 'demo_tokens_total{model="say \\"hi\\""} 7.0' in registry.render()
+
+
+def test_timer_observes_failed_blocks_and_labels_are_checked():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("demo_seconds", "Demo latency", ("stage",))
+
+    with pytest.raises(RuntimeError):
+        with histogram.time(stage="search"):
+            raise RuntimeError("boom")
+
+    assert histogram.snapshot(stage="search")[0] == 1
+    with pytest.raises(ValueError):
+        histogram.observe(1.0)
+
+
+def test_registering_a_name_twice_returns_the_same_metric():
+    registry = MetricsRegistry()
+    first = registry.counter("demo", "Demo")
+
+    assert registry.counter("demo", "Demo") is first
+    with pytest.raises(ValueError):
+        registry.histogram("demo", "Demo")
+
+
+class FailingTool(Tool):
+    def get_tool_definition(self):
+        return {"name": "failing_tool"}
+
+    def execute(self, **kwargs):
+        raise RuntimeError("search backend down")
+
+
+def test_tool_manager_times_calls_by_outcome():
+    manager = ToolManager()
+    manager.register_tool(FailingTool())
+    before = metrics.TOOL_SECONDS.snapshot(tool="failing_tool", outcome="error")
+
+    with pytest.raises(RuntimeError):
+        manager.execute_tool("failing_tool")
+
+    after = metrics.TOOL_SECONDS.snapshot(tool="failing_tool", outcome="error")
+    assert after[0] == (before[0] if before else 0) + 1
+
+
+class StubRAGSystem:
+    def __init__(self, _config):
+        self.session_manager = SimpleNamespace(
+            create_session=lambda: "session_1", close=lambda: None
+        )
+        self.ai_generator = SimpleNamespace(aclose=self._aclose)
+
+    async def _aclose(self):
+        pass
+
+    def add_course_folder(self, _folder_path, clear_existing=False):
+        return 0, 0
+
+    def llm_capacity(self):
+        return 64
+
+
+def test_metrics_endpoint_serves_prometheus_text(monkeypatch):
+    fake_rag_module = ModuleType("rag_system")
+    fake_rag_module.RAGSystem = StubRAGSystem
+    monkeypatch.setitem(sys.modules, "rag_system", fake_rag_module)
+    monkeypatch.chdir(BACKEND_PATH)
+    sys.modules.pop("app", None)
+    metrics.STAGE_SECONDS.observe(0.01, stage="embed")
+    try:
+        app_module = importlib.import_module("app")
+        with TestClient(app_module.app) as client:
+            response = client.get("/metrics")
+    finally:
+        sys.modules.pop("app", None)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE rag_stage_duration_seconds histogram" in response.text
+    assert 'rag_stage_duration_seconds_count{stage="embed"}' in response.text
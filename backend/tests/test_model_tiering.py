@@ -0,0 +1,88 @@
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+BACKEND_PATH = Path(__file__).resolve().parents[1]
+if str(BACKEND_PATH) not in sys.path:
+    sys.path.insert(0, str(BACKEND_PATH))
+
+from ai_generator import AIGenerator  # noqa: E402
+from model_tiering import ModelTier, ModelTierRouter  # noqa: E402
+
+MAIN = ModelTier("main", "main-model", 800)
+FAST = ModelTier("fast", "fast-model", 400)
+
+
+class RecordingMessagesAPI:
+    def __init__(self):
+        self.calls = []
+
+    async def create(self, **kwargs):
+        self.calls.append(kwargs)
+        return SimpleNamespace(content=[SimpleNamespace(type="text", text="answer")])
+
+
+def make_router(**kwargs):
+    return ModelTierRouter(main_tier=MAIN, fast_tier=FAST, **kwargs)
+
+
+def test_short_factual_query_goes_to_fast_tier():
+    router = make_router()
+
+    assert router.select("What is a vector database?") is FAST
+
+
+def test_reasoning_course_and_history_push_queries_to_main_tier():
+    router = make_router()
+    history = "\n".join(f"User: question {i}" for i in range(6))
+
+    assert router.select("Why do embeddings beat keyword search in lesson 2?") is MAIN
+    assert router.select("What is covered in the course?", history) is MAIN
+    assert router.score("What is a vector database?", history) > router.score(
+        "What is a vector database?"
+    )
+
+
+def test_short_course_question_stays_on_main_tier():
+    router = make_router()
+
+    assert router.select("What does lesson 3 cover?") is MAIN
+    assert router.select("Hi, what can you help with?") is FAST
+
+
+def test_catalog_title_mention_counts_as_course_reference():
+    router = make_router(course_reference_fn=lambda text: "mcp" in text)
+
+    assert router.score("tell me about MCP") > router.score("tell me about it")
+
+
+def test_generator_sends_selected_tier_model_and_records_latency():
+    generator = AIGenerator("test-key", "main-model", 10, 0, model_router=make_router())
+    messages = RecordingMessagesAPI()
+    generator.async_client = SimpleNamespace(messages=messages)
+
+    asyncio.run(generator.agenerate_response(query="What is RAG?"))
+    asyncio.run(
+        generator.agenerate_response(
+            query="Prompt with retrieved context",
+            user_query="Compare the trade-offs between the two lessons in detail",
+        )
+    )
+
+    assert [(c["model"], c["max_tokens"]) for c in messages.calls] == [
+        ("fast-model", 400),
+        ("main-model", 800),
+    ]
+    stats = generator.get_model_tier_stats()
+    assert stats["enabled"] is True
+    assert stats["fast"]["requests"] == 1
+    assert stats["main"]["requests"] == 1
+    assert stats["fast"]["share"] == 0.5
+    assert stats["fast"]["p95_ms"] >= 0
+
+
+def test_generator_without_router_reports_disabled():
+    generator = AIGenerator("test-key", "main-model", 10, 0)
+
+    assert generator.get_model_tier_stats() == {"enabled": False, "model": "main-model"}
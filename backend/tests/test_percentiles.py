@@ -0,0 +1,23 @@
+import sys
+from pathlib import Path
+
+BACKEND_PATH = Path(__file__).resolve().parents[1]
+if str(BACKEND_PATH) not in sys.path:
+    sys.path.insert(0, str(BACKEND_PATH))
+
+from percentiles import percentile, percentile_ms  # noqa: E402
+
+
+def test_percentile_uses_nearest_rank():
+    samples = [index / 100 for index in range(1, 101)]
+
+    assert percentile(samples, 0.5) == 0.5
+    assert percentile(samples, 0.95) == 0.95
+    assert percentile(samples, 1.0) == 1.0
+    assert percentile(samples, 0.0) == 0.01
+    assert percentile_ms([0.0123], 0.95) == 12.3
+
+
+def test_percentile_of_no_samples_is_zero():
+    assert percentile([], 0.5) == 0.0
+    assert percentile_ms([], 0.95) == 0.0
@@ -0,0 +1,125 @@
+import importlib
+import json
+import sys
+from pathlib import Path
+from types import ModuleType
+
+import pytest
+from fastapi.testclient import TestClient
+
+BACKEND_PATH = Path(__file__).resolve().parents[1]
+if str(BACKEND_PATH) not in sys.path:
+    sys.path.insert(0, str(BACKEND_PATH))
+
+
+class StubSessionManager:
+    def create_session(self):
+        return "session_stream"
+
+    def close(self):
+        pass
+
+
+class StubAIGenerator:
+    async def aclose(self):
+        pass
+
+
+class StubRAGSystem:
+    def __init__(self, _config):
+        self.session_manager = StubSessionManager()
+        self.ai_generator = StubAIGenerator()
+        self.stream_calls = []
+
+    def add_course_folder(self, _folder_path, clear_existing=False):
+        return 0, 0
+
+    def llm_capacity(self):
+        return 64
+
+    async def astream_query(self, query, session_id=None, deadline=None):
+        self.stream_calls.append((query, session_id))
+        yield "sources", {"sources": ["Mastering MCP - Lesson 2"]}
+        yield "token", {"text": "Batching "}
+        yield "token", {"text": "helps."}
+        yield "done", {
+            "session_id": session_id,
+            "sources": ["Mastering MCP - Lesson 2"],
+            "timing": {"time_to_first_token_ms": 1.0, "total_ms": 2.0},
+        }
+
+
+@pytest.fixture
+def app_module(monkeypatch):
+    fake_rag_module = ModuleType("rag_system")
+    fake_rag_module.RAGSystem = StubRAGSystem
+    monkeypatch.setitem(sys.modules, "rag_system", fake_rag_module)
+    monkeypatch.chdir(BACKEND_PATH)
+
+    sys.modules.pop("app", None)
+    yield importlib.import_module("app")
+    sys.modules.pop("app", None)
+
+
+def parse_sse(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_stream_endpoint_emits_sources_tokens_and_done(app_module):
+    with TestClient(app_module.app) as client:
+        response = client.post("/api/query/stream", json={"query": "Explain batching"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(response.text)
+    assert [event for event, _ in events] == ["sources", "token", "token", "done"]
+    assert events[0][1] == {"sources": ["Mastering MCP - Lesson 2"]}
+    assert "".join(data["text"] for event, data in events if event == "token") == (
+        "Batching helps."
+    )
+    assert events[-1][1]["session_id"] == "session_stream"
+    assert app_module.rag_system.stream_calls == [
+        ("Explain batching", "session_stream")
+    ]
+
+
+def test_stream_endpoint_reports_timeout_as_error_event(app_module, monkeypatch):
+    async def slow_stream(_query, _session_id=None, deadline=None):
+        import asyncio
+
+        from request_timing import record_stage
+
+        record_stage("session_queue", 0.002)
+        await asyncio.sleep(1)
+        yield "token", {"text": "too late"}
+
+    monkeypatch.setattr(app_module.config, "QUERY_TIMEOUT_SECONDS", 0.01)
+    app_module.rag_system.astream_query = slow_stream
+
+    with TestClient(app_module.app) as client:
+        response = client.post(
+            "/api/query/stream", json={"query": "q", "session_id": "session_1"}
+        )
+
+    events = parse_sse(response.text)
+    assert [event for event, _ in events] == ["error", "done"]
+    assert "timed out" in events[0][1]["detail"]
+    assert events[1][1]["session_id"] == "session_1"
+    assert events[1][1]["timing"]["queue_wait_ms"] == 2.0
+
+
+def test_stream_endpoint_frees_its_slot_when_session_creation_fails(app_module):
+    def fail_create_session():
+        raise RuntimeError("session store unavailable")
+
+    app_module.rag_system.session_manager.create_session = fail_create_session
+
+    with TestClient(app_module.app, raise_server_exceptions=False) as client:
+        response = client.post("/api/query/stream", json={"query": "q"})
+
+    assert response.status_code == 500
+    assert app_module.admission.get_stats()["in_flight"] == 0
@@ -1,11 +1,18 @@
+import asyncio
 import sys
+import threading
 from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
 
 BACKEND_PATH = Path(__file__).resolve().parents[1]
 if str(BACKEND_PATH) not in sys.path:
     sys.path.insert(0, str(BACKEND_PATH))
 
+import metrics  # noqa: E402
 import rag_system  # noqa: E402
+from deadline import Deadline, DeadlineExceeded  # noqa: E402
 
 
 class StubDocumentProcessor:
@@ -14,21 +21,29 @@ class StubDocumentProcessor:
 
 
 class StubVectorStore:
-    def __init__(self, _chroma_path, _embedding_model, _max_results):
-        pass
+    def __init__(self, _chroma_path, _embedding_model, _max_results, **_kwargs):
+        self.index_version = 0
+
+    def get_existing_course_titles(self):
+        return []
+
+    def resolve_course_name(self, course_name):
+        return course_name
 
 
 class StubAIGenerator:
-    def __init__(self, _api_key, _model, _timeout_seconds, _max_retries):
+    def __init__(self, _api_key, _model, _timeout_seconds, _max_retries, **_kwargs):
         self.calls = []
+        self.sources = []
 
     def generate_response(self, **kwargs):
         self.calls.append(kwargs)
+        kwargs["tool_context"].add_sources(self.sources)
         return "Batching combines multiple operations into one request."
 
 
 class StubSessionManager:
-    def __init__(self, _max_history):
+    def __init__(self, _max_history, **_kwargs):
         self.exchanges = []
 
     def get_conversation_history(self, _session_id: str):
@@ -44,10 +59,56 @@ class StubConfig:
     CHROMA_PATH = "/tmp/chroma"
     EMBEDDING_MODEL = "fake-model"
     MAX_RESULTS = 5
+    SEARCH_MAX_DISTANCE = 0.0
+    SEARCH_ADAPTIVE_K = False
+    SEARCH_MIN_SCORE_GAP = 0.0
+    SEARCH_MIN_RESULTS = 1
+    HNSW_SPACE = "l2"
+    HNSW_M = 16
+    HNSW_CONSTRUCTION_EF = 100
+    HNSW_SEARCH_EF = 100
+    SPECULATIVE_RETRIEVAL_ENABLED = False
+    SPECULATIVE_MATCH_THRESHOLD = 0.6
+    SPECULATIVE_MAX_WORKERS = 2
+    ANSWER_CACHE_ENABLED = True
+    ANSWER_CACHE_MAX_ENTRIES = 16
+    ANSWER_CACHE_TTL_SECONDS = 60
+    ANSWER_CACHE_SIMILARITY_THRESHOLD = 0.0
     ANTHROPIC_API_KEY = "test-key"
     ANTHROPIC_MODEL = "test-model"
+    ANTHROPIC_MAX_TOKENS = 800
+    LLM_BACKEND = "anthropic"
+    MODEL_TIERING_ENABLED = False
+    FAST_MODEL = "test-fast-model"
+    FAST_MODEL_MAX_TOKENS = 400
+    MODEL_TIER_COMPLEXITY_THRESHOLD = 0.25
     ANTHROPIC_TIMEOUT_SECONDS = 10
     ANTHROPIC_MAX_RETRIES = 1
+    ANTHROPIC_MAX_CONNECTIONS = 10
+    ANTHROPIC_MAX_KEEPALIVE_CONNECTIONS = 5
+    LLM_CONCURRENCY_INITIAL = 8
+    LLM_CONCURRENCY_MAX = 16
+    LLM_LATENCY_TARGET_SECONDS = 20
+    LLM_BREAKER_FAILURE_RATE = 0.5
+    LLM_BREAKER_RESET_SECONDS = 30
+    LLM_RETRY_BUDGET_RATIO = 0.1
+    HEDGE_ENABLED = False
+    HEDGE_MIN_DELAY_SECONDS = 2
+    HEDGE_MAX_RATIO = 0.05
+    TOOL_MAX_WORKERS = 2
+    TOOL_TIMEOUT_SECONDS = 5
+    PROMPT_TOKEN_BUDGET = 6000
+    HISTORY_TOKEN_BUDGET = 1000
+    TOOL_RESULT_TOKEN_BUDGET = 1500
+    INTENT_ROUTER_ENABLED = True
+    SINGLE_FLIGHT_ENABLED = True
+    MAX_SESSIONS = 100
+    SESSION_TTL_SECONDS = 3600
+    SESSION_BACKEND = "memory"
+    SESSION_DB_PATH = ""
+    SESSION_FLUSH_INTERVAL_SECONDS = 0.05
+    SESSION_CACHE_SECONDS = 1
+    QUERY_MAX_WORKERS = 2
     MAX_HISTORY = 3
 
 
@@ -58,7 +119,7 @@ def test_query_handles_content_question_and_returns_sources(monkeypatch):
     monkeypatch.setattr(rag_system, "SessionManager", StubSessionManager)
 
     system = rag_system.RAGSystem(StubConfig())
-    system.tool_manager.get_last_sources = lambda: ["Mastering MCP - Lesson 2"]
+    system.ai_generator.sources = ["Mastering MCP - Lesson 2"]
 
     response, sources = system.query(
         "Give me details from lesson 2 of Mastering MCP", session_id="session-1"
@@ -75,6 +136,21 @@ def test_query_handles_content_question_and_returns_sources(monkeypatch):
     ]
 
 
+def test_model_tiering_uses_the_intent_router_for_course_mentions(monkeypatch):
+    monkeypatch.setattr(rag_system, "DocumentProcessor", StubDocumentProcessor)
+    monkeypatch.setattr(rag_system, "VectorStore", StubVectorStore)
+    monkeypatch.setattr(rag_system, "AIGenerator", StubAIGenerator)
+    monkeypatch.setattr(rag_system, "SessionManager", StubSessionManager)
+
+    config = StubConfig()
+    config.MODEL_TIERING_ENABLED = True
+    system = rag_system.RAGSystem(config)
+
+    router = system.ai_generator.model_router
+    assert router.course_reference_fn == system.intent_router.mentions_course
+    assert router.main_tier.max_tokens == config.ANTHROPIC_MAX_TOKENS
+
+
 def test_query_handles_content_query_pipeline_errors_without_raising(monkeypatch):
     monkeypatch.setattr(rag_system, "DocumentProcessor", StubDocumentProcessor)
     monkeypatch.setattr(rag_system, "VectorStore", StubVectorStore)
@@ -94,3 +170,401 @@ def test_query_handles_content_query_pipeline_errors_without_raising(monkeypatch
 
     assert "couldn't process that course-content request" in response
     assert sources == []
+
+
+def test_aquery_awaits_async_generator_and_records_exchange(monkeypatch):
+    monkeypatch.setattr(rag_system, "DocumentProcessor", StubDocumentProcessor)
+    monkeypatch.setattr(rag_system, "VectorStore", StubVectorStore)
+    monkeypatch.setattr(rag_system, "AIGenerator", StubAIGenerator)
+    monkeypatch.setattr(rag_system, "SessionManager", StubSessionManager)
+
+    system = rag_system.RAGSystem(StubConfig())
+
+    async def agenerate_response(**kwargs):
+        system.ai_generator.calls.append(kwargs)
+        kwargs["tool_context"].add_sources(["Mastering MCP - Lesson 2"])
+        return "Async answer."
+
+    system.ai_generator.agenerate_response = agenerate_response
+
+    response, sources = asyncio.run(
+        system.aquery("What is in lesson 2?", session_id="session-1")
+    )
+
+    assert response == "Async answer."
+    assert sources == ["Mastering MCP - Lesson 2"]
+    assert system.ai_generator.calls[0]["conversation_history"].startswith("user:")
+    assert system.session_manager.exchanges == [
+        ("session-1", "What is in lesson 2?", "Async answer.")
+    ]
+
+
+def test_astream_query_emits_sources_before_tokens_and_records_answer(monkeypatch):
+    monkeypatch.setattr(rag_system, "DocumentProcessor", StubDocumentProcessor)
+    monkeypatch.setattr(rag_system, "VectorStore", StubVectorStore)
+    monkeypatch.setattr(rag_system, "AIGenerator", StubAIGenerator)
+    monkeypatch.setattr(rag_system, "SessionManager", StubSessionManager)
+
+    system = rag_system.RAGSystem(StubConfig())
+
+    async def astream_response(**kwargs):
+        kwargs["tool_context"].add_sources(["Mastering MCP - Lesson 2"])
+        yield "tool_results", ["search_course_content"]
+        yield "text", "Batching "
+        yield "text", "helps."
+
+    system.ai_generator.astream_response = astream_response
+
+    async def collect():
+        return [
+            event async for event in system.astream_query("Explain batching", "s-1")
+        ]
+
+    events = asyncio.run(collect())
+
+    assert [event for event, _ in events] == ["sources", "token", "token", "done"]
+    assert events[0][1] == {"sources": ["Mastering MCP - Lesson 2"]}
+    done = events[-1][1]
+    assert done["session_id"] == "s-1"
+    assert done["timing"]["time_to_first_token_ms"] is not None
+    assert system.session_manager.exchanges == [
+        ("s-1", "Explain batching", "Batching helps.")
+    ]
+
+
+def test_history_free_queries_are_served_from_answer_cache(monkeypatch):
+    monkeypatch.setattr(rag_system, "DocumentProcessor", StubDocumentProcessor)
+    monkeypatch.setattr(rag_system, "VectorStore", StubVectorStore)
+    monkeypatch.setattr(rag_system, "AIGenerator", StubAIGenerator)
+    monkeypatch.setattr(rag_system, "SessionManager", StubSessionManager)
+
+    system = rag_system.RAGSystem(StubConfig())
+    system.session_manager.get_conversation_history = lambda _session_id: None
+    system.ai_generator.sources = ["Mastering MCP - Lesson 2"]
+
+    first = system.query("What is batching?", session_id="session-1")
+    second = system.query("what is batching", session_id="session-2")
+
+    assert first == second
+    assert len(system.ai_generator.calls) == 1
+    assert system.get_cache_stats()["exact_hits"] == 1
+
+    system.vector_store.index_version += 1
+    system.query("What is batching?", session_id="session-3")
+
+    assert len(system.ai_generator.calls) == 2
+
+
+def test_queries_are_counted_by_answer_mode_and_timed(monkeypatch):
+    monkeypatch.setattr(rag_system, "DocumentProcessor", StubDocumentProcessor)
+    monkeypatch.setattr(rag_system, "VectorStore", StubVectorStore)
+    monkeypatch.setattr(rag_system, "AIGenerator", StubAIGenerator)
+    monkeypatch.setattr(rag_system, "SessionManager", StubSessionManager)
+
+    system = rag_system.RAGSystem(StubConfig())
+    system.session_manager.get_conversation_history = lambda _session_id: None
+    generated = metrics.QUERIES.value(mode="generated")
+    cached = metrics.QUERIES.value(mode="cached")
+    timed = (metrics.QUERY_SECONDS.snapshot(outcome="ok") or (0, 0.0))[0]
+
+    system.query("What is batching?", session_id="session-1")
+    system.query("What is batching?", session_id="session-2")
+
+    assert metrics.QUERIES.value(mode="generated") == generated + 1
+    assert metrics.QUERIES.value(mode="cached") == cached + 1
+    assert metrics.QUERY_SECONDS.snapshot(outcome="ok")[0] == timed + 2
+
+
+def test_queries_with_history_bypass_answer_cache(monkeypatch):
+    monkeypatch.setattr(rag_system, "DocumentProcessor", StubDocumentProcessor)
+    monkeypatch.setattr(rag_system, "VectorStore", StubVectorStore)
+    monkeypatch.setattr(rag_system, "AIGenerator", StubAIGenerator)
+    monkeypatch.setattr(rag_system, "SessionManager", StubSessionManager)
+
+    system = rag_system.RAGSystem(StubConfig())
+
+    system.query("What is batching?", session_id="session-1")
+    system.query("What is batching?", session_id="session-1")
+
+    assert len(system.ai_generator.calls) == 2
+    assert system.get_cache_stats()["bypassed"] == 2
+
+
+def test_speculative_search_runs_on_raw_query_when_enabled(monkeypatch):
+    monkeypatch.setattr(rag_system, "DocumentProcessor", StubDocumentProcessor)
+    monkeypatch.setattr(rag_system, "VectorStore", StubVectorStore)
+    monkeypatch.setattr(rag_system, "AIGenerator", StubAIGenerator)
+    monkeypatch.setattr(rag_system, "SessionManager", StubSessionManager)
+
+    class SpeculativeConfig(StubConfig):
+        SPECULATIVE_RETRIEVAL_ENABLED = True
+
+    system = rag_system.RAGSystem(SpeculativeConfig())
+    searched = []
+    system.vector_store.search = lambda **kwargs: searched.append(kwargs)
+    tool_managers = []
+
+    def generate_response(**kwargs):
+        # Let the speculative search finish, as it would during an LLM call
+        kwargs["tool_manager"].speculation.future.result(timeout=5)
+        tool_managers.append(kwargs["tool_manager"])
+        return "answer"
+
+    system.ai_generator.generate_response = generate_response
+
+    system.query("What is batching?", session_id="session-1")
+
+    assert searched == [{"query": "What is batching?"}]
+    assert isinstance(tool_managers[0], rag_system.SpeculativeToolManager)
+    stats = system.get_speculation_stats()
+    assert stats["enabled"] is True
+    assert stats["started"] == 1
+    assert stats["unused"] == 1
+
+
+def test_outline_request_is_answered_without_the_model(monkeypatch):
+    monkeypatch.setattr(rag_system, "DocumentProcessor", StubDocumentProcessor)
+    monkeypatch.setattr(rag_system, "VectorStore", StubVectorStore)
+    monkeypatch.setattr(rag_system, "AIGenerator", StubAIGenerator)
+    monkeypatch.setattr(rag_system, "SessionManager", StubSessionManager)
+
+    monkeypatch.setattr(
+        StubVectorStore,
+        "get_existing_course_titles",
+        lambda _self: [
+            "MCP: Build Rich-Context AI Apps with Anthropic",
+            "Advanced Retrieval for AI with Chroma",
+        ],
+    )
+
+    system = rag_system.RAGSystem(StubConfig())
+    system.vector_store.get_course_outline = lambda title: {
+        "title": title,
+        "course_link": None,
+        "lessons": [{"lesson_number": 1, "lesson_title": "Introduction"}],
+    }
+
+    response, sources = system.query(
+        "Show me the outline of the MCP course", session_id="session-1"
+    )
+
+    assert response.startswith(
+        "Course Title: MCP: Build Rich-Context AI Apps with Anthropic"
+    )
+    assert "- Lesson 1: Introduction" in response
+    assert sources == []
+    assert system.ai_generator.calls == []
+    assert system.session_manager.exchanges[0][2] == response
+    assert system.get_router_stats()["routed"] == 1
+
+
+def test_async_outline_request_reads_the_outline_off_the_event_loop(monkeypatch):
+    monkeypatch.setattr(rag_system, "DocumentProcessor", StubDocumentProcessor)
+    monkeypatch.setattr(rag_system, "VectorStore", StubVectorStore)
+    monkeypatch.setattr(rag_system, "AIGenerator", StubAIGenerator)
+    monkeypatch.setattr(rag_system, "SessionManager", StubSessionManager)
+
+    monkeypatch.setattr(
+        StubVectorStore,
+        "get_existing_course_titles",
+        lambda _self: ["MCP: Build Rich-Context AI Apps with Anthropic"],
+    )
+
+    system = rag_system.RAGSystem(StubConfig())
+    reader_threads = []
+
+    def get_course_outline(title):
+        reader_threads.append(threading.current_thread().name)
+        return {"title": title, "course_link": None, "lessons": []}
+
+    system.vector_store.get_course_outline = get_course_outline
+
+    async def collect():
+        response, _sources = await system.aquery(
+            "Show me the outline of the MCP course", session_id="session-1"
+        )
+        events = [
+            event
+            async for event in system.astream_query(
+                "Show me the outline of the MCP course", session_id="session-2"
+            )
+        ]
+        return response, events, threading.current_thread().name
+
+    response, events, loop_thread = asyncio.run(collect())
+
+    assert response.startswith("Course Title: MCP")
+    assert events[-1][0] == "done"
+    assert len(reader_threads) == 2
+    assert loop_thread not in reader_threads
+    assert system.ai_generator.calls == []
+
+
+def test_identical_in_flight_aqueries_share_one_generation(monkeypatch):
+    monkeypatch.setattr(rag_system, "DocumentProcessor", StubDocumentProcessor)
+    monkeypatch.setattr(rag_system, "VectorStore", StubVectorStore)
+    monkeypatch.setattr(rag_system, "AIGenerator", StubAIGenerator)
+    monkeypatch.setattr(rag_system, "SessionManager", StubSessionManager)
+
+    class NoCacheConfig(StubConfig):
+        ANSWER_CACHE_ENABLED = False
+
+    system = rag_system.RAGSystem(NoCacheConfig())
+
+    async def agenerate_response(**kwargs):
+        system.ai_generator.calls.append(kwargs)
+        kwargs["tool_context"].add_sources(["Mastering MCP - Lesson 2"])
+        await asyncio.sleep(0.05)
+        return "Shared answer."
+
+    system.ai_generator.agenerate_response = agenerate_response
+
+    async def launch_day():
+        return await asyncio.gather(
+            system.aquery("What is MCP?"),
+            system.aquery("what is MCP"),
+            system.aquery("What is retrieval?"),
+        )
+
+    results = asyncio.run(launch_day())
+
+    assert results[0] == results[1] == ("Shared answer.", ["Mastering MCP - Lesson 2"])
+    assert len(system.ai_generator.calls) == 2
+    stats = system.get_coalescing_stats()
+    assert stats["leaders"] == 2
+    assert stats["coalesced"] == 1
+
+
+def test_concurrent_aqueries_in_one_session_see_each_others_history(monkeypatch):
+    monkeypatch.setattr(rag_system, "DocumentProcessor", StubDocumentProcessor)
+    monkeypatch.setattr(rag_system, "VectorStore", StubVectorStore)
+    monkeypatch.setattr(rag_system, "AIGenerator", StubAIGenerator)
+
+    class NoCacheConfig(StubConfig):
+        ANSWER_CACHE_ENABLED = False
+
+    system = rag_system.RAGSystem(NoCacheConfig())
+    session_id = system.session_manager.create_session()
+
+    async def agenerate_response(**kwargs):
+        system.ai_generator.calls.append(kwargs)
+        await asyncio.sleep(0.02)
+        return f"Answer {len(system.ai_generator.calls)}."
+
+    system.ai_generator.agenerate_response = agenerate_response
+
+    async def double_submit():
+        return await asyncio.gather(
+            system.aquery("What is MCP?", session_id),
+            system.aquery("And lesson 2?", session_id),
+        )
+
+    asyncio.run(double_submit())
+
+    histories = [call["conversation_history"] for call in system.ai_generator.calls]
+    assert histories[0] is None
+    assert histories[1] == "User: What is MCP?\nAssistant: Answer 1."
+    assert system.get_session_stats()["request_queue"]["queued"] == 1
+
+
+class DeadlineAIGenerator:
+    def __init__(self, _api_key, _model, _timeout_seconds, _max_retries, **_kwargs):
+        self.calls = []
+
+    def generate_response(self, **kwargs):
+        self.calls.append(kwargs)
+        kwargs["deadline"].check("LLM call")
+        return "answer"
+
+
+def test_query_threads_deadline_into_generation_and_records_in_time(monkeypatch):
+    monkeypatch.setattr(rag_system, "DocumentProcessor", StubDocumentProcessor)
+    monkeypatch.setattr(rag_system, "VectorStore", StubVectorStore)
+    monkeypatch.setattr(rag_system, "AIGenerator", DeadlineAIGenerator)
+    monkeypatch.setattr(rag_system, "SessionManager", StubSessionManager)
+
+    system = rag_system.RAGSystem(StubConfig())
+    deadline = Deadline(60.0)
+
+    response, _ = system.query(
+        "Explain batching", session_id="session-1", deadline=deadline
+    )
+
+    assert response == "answer"
+    assert system.ai_generator.calls[0]["deadline"] is deadline
+    assert system.ai_generator.calls[0]["tool_context"].deadline is deadline
+    assert system.session_manager.exchanges == [
+        ("session-1", "Explain batching", "answer")
+    ]
+
+
+def test_expired_query_raises_instead_of_recording_a_fallback(monkeypatch):
+    monkeypatch.setattr(rag_system, "DocumentProcessor", StubDocumentProcessor)
+    monkeypatch.setattr(rag_system, "VectorStore", StubVectorStore)
+    monkeypatch.setattr(rag_system, "AIGenerator", DeadlineAIGenerator)
+    monkeypatch.setattr(rag_system, "SessionManager", StubSessionManager)
+
+    system = rag_system.RAGSystem(StubConfig())
+    deadline = Deadline(60.0)
+    deadline.cancel()
+
+    with pytest.raises(DeadlineExceeded):
+        system.query("Explain batching", session_id="session-1", deadline=deadline)
+
+    assert system.session_manager.exchanges == []
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class BudgetSpendingMessagesAPI:
+    """Asks for a search, taking longer than the request has left"""
+
+    def __init__(self, clock):
+        self.clock = clock
+
+    def create(self, **_kwargs):
+        self.clock.now += 10
+        return SimpleNamespace(
+            stop_reason="tool_use",
+            content=[
+                SimpleNamespace(
+                    type="tool_use",
+                    name="search_course_content",
+                    input={"query": "batching"},
+                    id="tool_1",
+                )
+            ],
+        )
+
+
+class NoHistorySessionManager(StubSessionManager):
+    def get_conversation_history(self, _session_id: str):
+        return None
+
+
+def test_deadline_spent_by_an_llm_round_is_not_cached_or_recorded(monkeypatch):
+    monkeypatch.setattr(rag_system, "DocumentProcessor", StubDocumentProcessor)
+    monkeypatch.setattr(rag_system, "VectorStore", StubVectorStore)
+    monkeypatch.setattr(rag_system, "SessionManager", NoHistorySessionManager)
+
+    system = rag_system.RAGSystem(StubConfig())
+    clock = FakeClock()
+    system.ai_generator.client = SimpleNamespace(
+        messages=BudgetSpendingMessagesAPI(clock)
+    )
+
+    with pytest.raises(DeadlineExceeded):
+        system.query(
+            "Explain batching",
+            session_id="session-1",
+            deadline=Deadline(5.0, clock=clock),
+        )
+
+    assert system.answer_cache.get_stats()["entries"] == 0
+    assert system.session_manager.exchanges == []
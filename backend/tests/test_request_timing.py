@@ -0,0 +1,185 @@
+import asyncio
+import importlib
+import json
+import logging
+import logging.config
+import sys
+from pathlib import Path
+from types import ModuleType, SimpleNamespace
+
+import uvicorn.config
+from fastapi.testclient import TestClient
+
+BACKEND_PATH = Path(__file__).resolve().parents[1]
+if str(BACKEND_PATH) not in sys.path:
+    sys.path.insert(0, str(BACKEND_PATH))
+
+from ai_generator import AIGenerator  # noqa: E402
+from metrics import stage  # noqa: E402
+from request_timing import RequestTimings, collect_timings  # noqa: E402
+from search_tools import Tool, ToolManager  # noqa: E402
+
+
+def test_timings_sum_repeated_stages_and_render_server_timing():
+    timings = RequestTimings()
+    timings.add_stage("chroma_query", 0.010)
+    timings.add_stage("chroma_query", 0.005)
+    timings.add_llm_round("test-model", 0.8, input_tokens=120, output_tokens=40)
+    timings.add_tool("search_course_content", 0.02, "ok")
+
+    breakdown = timings.to_dict()
+    header = timings.server_timing()
+
+    assert breakdown["stages"] == {"chroma_query": 15.0}
+    assert breakdown["llm_rounds"][0]["input_tokens"] == 120
+    assert breakdown["tools"] == [
+        {"name": "search_course_content", "duration_ms": 20.0, "outcome": "ok"}
+    ]
+    assert header.startswith(
+        'chroma_query;dur=15.0, llm_1;dur=800.0;desc="test-model in=120 out=40", '
+        'tool_1;dur=20.0;desc="search_course_content", total;dur='
+    )
+
+
+def test_stages_outside_a_request_are_not_collected():
+    with stage("embed"):
+        pass
+
+    with collect_timings() as timings:
+        with stage("embed"):
+            pass
+
+    assert list(timings.to_dict()["stages"]) == ["embed"]
+
+
+class StubAsyncMessagesAPI:
+    def __init__(self, responses):
+        self.responses = list(responses)
+
+    async def create(self, **_kwargs):
+        return self.responses.pop(0)
+
+
+class SearchTool(Tool):
+    def get_tool_definition(self):
+        return {"name": "search_course_content"}
+
+    def execute(self, **_kwargs):
+        with stage("chroma_query"):
+            return "Batching combines requests."
+
+
+def build_response(stop_reason, content, input_tokens, output_tokens):
+    return SimpleNamespace(
+        stop_reason=stop_reason,
+        content=content,
+        model="test-model",
+        usage=SimpleNamespace(input_tokens=input_tokens, output_tokens=output_tokens),
+    )
+
+
+def test_generation_records_rounds_with_tokens_and_tools_from_worker_threads():
+    generator = AIGenerator("test-key", "test-model", 10, 0)
+    generator.async_client = SimpleNamespace(
+        messages=StubAsyncMessagesAPI(
+            [
+                build_response(
+                    "tool_use",
+                    [
+                        SimpleNamespace(
+                            type="tool_use",
+                            name="search_course_content",
+                            input={"query": "batching"},
+                            id="tool_1",
+                        )
+                    ],
+                    100,
+                    20,
+                ),
+                build_response(
+                    "end_turn", [SimpleNamespace(type="text", text="answer")], 180, 30
+                ),
+            ]
+        )
+    )
+    manager = ToolManager()
+    manager.register_tool(SearchTool())
+
+    async def run():
+        with collect_timings() as timings:
+            await generator.agenerate_response(
+                "What is batching?",
+                tools=manager.get_tool_definitions(),
+                tool_manager=manager,
+            )
+        return timings.to_dict()
+
+    breakdown = asyncio.run(run())
+
+    assert [
+        (llm_round["input_tokens"], llm_round["output_tokens"])
+        for llm_round in breakdown["llm_rounds"]
+    ] == [(100, 20), (180, 30)]
+    # The tool ran on the tool executor yet still reported to this request
+    assert [tool["name"] for tool in breakdown["tools"]] == ["search_course_content"]
+    assert "chroma_query" in breakdown["stages"]
+
+
+class StubRAGSystem:
+    def __init__(self, _config):
+        self.session_manager = SimpleNamespace(
+            create_session=lambda: "session_1", close=lambda: None
+        )
+        self.ai_generator = SimpleNamespace(aclose=self._aclose)
+
+    async def _aclose(self):
+        pass
+
+    def add_course_folder(self, _folder_path, clear_existing=False):
+        return 0, 0
+
+    def llm_capacity(self):
+        return 64
+
+    async def aquery(self, _query, _session_id=None, deadline=None):
+        with stage("embed"):
+            pass
+        return "answer", []
+
+
+def test_query_endpoint_returns_server_timing_and_logs_breakdown(monkeypatch, caplog):
+    fake_rag_module = ModuleType("rag_system")
+    fake_rag_module.RAGSystem = StubRAGSystem
+    monkeypatch.setitem(sys.modules, "rag_system", fake_rag_module)
+    monkeypatch.chdir(BACKEND_PATH)
+    sys.modules.pop("app", None)
+    try:
+        app_module = importlib.import_module("app")
+        # As started by run.sh: uvicorn's config leaves the root at WARNING
+        logging.config.dictConfig(uvicorn.config.LOGGING_CONFIG)
+        assert app_module.logger.isEnabledFor(logging.INFO)
+        assert app_module.logger.handlers
+        monkeypatch.setattr(app_module.config, "QUERY_TIMING_LOG_SAMPLE_RATE", 1.0)
+        with TestClient(app_module.app) as client:
+            caplog.set_level(logging.INFO, logger="app")
+            plain = client.post("/api/query", json={"query": "What is MCP?"})
+            detailed = client.post(
+                "/api/query", json={"query": "What is MCP?", "include_timings": True}
+            )
+    finally:
+        sys.modules.pop("app", None)
+
+    assert plain.status_code == 200
+    assert plain.json()["timings"] is None
+    assert "embed;dur=" in plain.headers["server-timing"]
+    assert "admission_queue;dur=" in plain.headers["server-timing"]
+    assert set(detailed.json()["timings"]["stages"]) == {"admission_queue", "embed"}
+
+    log_lines = [
+        json.loads(record.getMessage())
+        for record in caplog.records
+        if record.name == "app"
+    ]
+    assert [line["event"] for line in log_lines] == ["query_timings"] * 2
+    assert log_lines[0]["session_id"] == "session_1"
+    assert log_lines[0]["status"] == 200
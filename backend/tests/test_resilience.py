@@ -0,0 +1,185 @@
+import asyncio
+import importlib
+import sys
+from pathlib import Path
+from types import ModuleType, SimpleNamespace
+
+import anthropic
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+BACKEND_PATH = Path(__file__).resolve().parents[1]
+if str(BACKEND_PATH) not in sys.path:
+    sys.path.insert(0, str(BACKEND_PATH))
+
+from ai_generator import AIGenerator  # noqa: E402
+from resilience import (  # noqa: E402
+    AdaptiveConcurrencyLimiter,
+    CircuitBreaker,
+    CircuitOpenError,
+    ConcurrencyLimitExceeded,
+    LLMGuard,
+    RetryBudget,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def rate_limit_error():
+    request = httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+    response = httpx.Response(429, request=request, headers={"retry-after": "0"})
+    return anthropic.RateLimitError("rate limited", response=response, body=None)
+
+
+def bad_request_error():
+    request = httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+    response = httpx.Response(400, request=request)
+    return anthropic.BadRequestError("bad request", response=response, body=None)
+
+
+class FlakyMessagesAPI:
+    def __init__(self, failures):
+        self.failures = list(failures)
+        self.attempts = 0
+
+    async def create(self, **_kwargs):
+        self.attempts += 1
+        if self.failures:
+            raise self.failures.pop(0)
+        return SimpleNamespace(content=[SimpleNamespace(type="text", text="answer")])
+
+
+def test_limiter_grows_additively_and_halves_on_overload():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, latency_target_seconds=10)
+
+    for _ in range(4):
+        assert limiter.try_acquire()
+        limiter.release(0.1, overloaded=False)
+    assert limiter.limit == 4
+    for _ in range(4):
+        limiter.try_acquire()
+        limiter.release(0.1, overloaded=False)
+    assert limiter.limit == 5
+
+    limiter.try_acquire()
+    limiter.release(0.1, overloaded=True)
+    assert limiter.limit == 2
+
+    assert limiter.try_acquire() and limiter.try_acquire()
+    assert not limiter.try_acquire()
+    assert limiter.get_stats()["rejected"] == 1
+
+
+def test_breaker_opens_fails_fast_then_probes_and_closes():
+    clock = FakeClock()
+    breaker = CircuitBreaker(min_calls=4, window_size=4, reset_seconds=30, clock=clock)
+
+    for success in (True, False, False, True):
+        breaker.before_call()
+        breaker.record(success)
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError) as excinfo:
+        breaker.before_call()
+    assert excinfo.value.retry_after == 30
+
+    clock.now += 30
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record(success=True)
+
+    assert breaker.state == "closed"
+    assert breaker.get_stats()["opened"] == 1
+
+
+def test_retry_budget_limits_retries_to_a_share_of_requests():
+    clock = FakeClock()
+    budget = RetryBudget(
+        ratio=0.5, min_retries_per_second=0, max_balance=1, clock=clock
+    )
+
+    assert budget.try_withdraw()
+    assert not budget.try_withdraw()
+    budget.record_request()
+    budget.record_request()
+    assert budget.try_withdraw()
+    assert budget.get_stats() == {"balance": 0.0, "retries": 2, "exhausted": 1}
+
+
+def test_generator_retries_rate_limits_but_not_client_errors():
+    guard = LLMGuard(max_retries=2, base_delay_seconds=0)
+    generator = AIGenerator("test-key", "test-model", 10, 0, llm_guard=guard)
+    generator.async_client = SimpleNamespace(
+        messages=FlakyMessagesAPI([rate_limit_error(), rate_limit_error()])
+    )
+
+    assert asyncio.run(generator.agenerate_response(query="q")) == "answer"
+    assert generator.async_client.messages.attempts == 3
+
+    generator.async_client = SimpleNamespace(
+        messages=FlakyMessagesAPI([bad_request_error()])
+    )
+    with pytest.raises(anthropic.BadRequestError):
+        asyncio.run(generator.agenerate_response(query="q"))
+    assert generator.async_client.messages.attempts == 1
+
+    stats = generator.get_resilience_stats()
+    assert stats["retry_budget"]["retries"] == 2
+    assert stats["circuit_breaker"]["recent_failure_rate"] == 0.5
+
+
+def test_guard_rejects_when_no_slot_is_free():
+    guard = LLMGuard(limiter=AdaptiveConcurrencyLimiter(initial_limit=1))
+
+    with guard.slot():
+        with pytest.raises(ConcurrencyLimitExceeded):
+            guard.call(lambda: "never sent")
+
+    assert guard.call(lambda: "sent") == "sent"
+
+
+class StubRAGSystem:
+    def __init__(self, _config):
+        self.session_manager = SimpleNamespace(
+            create_session=lambda: "session_1", close=lambda: None
+        )
+        self.ai_generator = SimpleNamespace(aclose=self._aclose)
+
+    async def _aclose(self):
+        pass
+
+    def add_course_folder(self, _folder_path, clear_existing=False):
+        return 0, 0
+
+    def llm_capacity(self):
+        return 64
+
+    async def aquery(self, _query, _session_id=None, deadline=None):
+        raise CircuitOpenError("The AI provider is failing.", retry_after=12.5)
+
+
+def test_query_endpoint_answers_503_with_retry_after_when_breaker_is_open(
+    monkeypatch,
+):
+    fake_rag_module = ModuleType("rag_system")
+    fake_rag_module.RAGSystem = StubRAGSystem
+    monkeypatch.setitem(sys.modules, "rag_system", fake_rag_module)
+    monkeypatch.chdir(BACKEND_PATH)
+    sys.modules.pop("app", None)
+    try:
+        app_module = importlib.import_module("app")
+        with TestClient(app_module.app) as client:
+            response = client.post("/api/query", json={"query": "What is MCP?"})
+    finally:
+        sys.modules.pop("app", None)
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "13"
+    assert response.json()["detail"] == "The AI provider is failing."
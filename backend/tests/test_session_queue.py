@@ -0,0 +1,93 @@
+import asyncio
+import sys
+from pathlib import Path
+
+BACKEND_PATH = Path(__file__).resolve().parents[1]
+if str(BACKEND_PATH) not in sys.path:
+    sys.path.insert(0, str(BACKEND_PATH))
+
+from session_queue import SessionRequestQueue  # noqa: E402
+
+
+def test_same_session_requests_run_in_arrival_order():
+    queue = SessionRequestQueue()
+    events = []
+
+    async def request(name, delay):
+        async with queue.hold("session-1"):
+            events.append(f"{name} start")
+            await asyncio.sleep(delay)
+            events.append(f"{name} end")
+
+    async def run():
+        await asyncio.gather(request("first", 0.03), request("second", 0))
+
+    asyncio.run(run())
+
+    assert events == ["first start", "first end", "second start", "second end"]
+    stats = queue.get_stats()
+    assert stats["requests"] == 2
+    assert stats["queued"] == 1
+    assert stats["sessions"]["session-1"]["queued"] == 1
+    assert stats["sessions"]["session-1"]["max_wait_ms"] > 0
+    assert stats["active_sessions"] == 0
+
+
+def test_different_sessions_run_in_parallel():
+    queue = SessionRequestQueue()
+    running = []
+    peak = []
+
+    async def request(session_id):
+        async with queue.hold(session_id) as wait_seconds:
+            running.append(session_id)
+            peak.append(len(running))
+            await asyncio.sleep(0.02)
+            running.remove(session_id)
+            return wait_seconds
+
+    async def run():
+        return await asyncio.gather(*(request(f"s{i}") for i in range(5)))
+
+    waits = asyncio.run(run())
+
+    assert max(peak) == 5
+    assert queue.get_stats()["queued"] == 0
+    assert all(wait < 0.02 for wait in waits)
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    queue = SessionRequestQueue()
+
+    async def run():
+        release = asyncio.Event()
+
+        async def holder():
+            async with queue.hold("s"):
+                await release.wait()
+
+        first = asyncio.create_task(holder())
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(holder())
+        await asyncio.sleep(0)
+        assert queue.get_stats()["waiting"] == 1
+
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        release.set()
+        await first
+
+    asyncio.run(run())
+
+    assert queue.get_stats()["active_sessions"] == 0
+
+
+def test_requests_without_session_are_not_queued():
+    queue = SessionRequestQueue()
+
+    async def run():
+        async with queue.hold(None) as wait_seconds:
+            return wait_seconds
+
+    assert asyncio.run(run()) == 0.0
+    assert queue.get_stats()["requests"] == 0
@@ -0,0 +1,194 @@
+import sys
+from pathlib import Path
+
+BACKEND_PATH = Path(__file__).resolve().parents[1]
+if str(BACKEND_PATH) not in sys.path:
+    sys.path.insert(0, str(BACKEND_PATH))
+
+from session_manager import SessionManager  # noqa: E402
+from session_store import (  # noqa: E402
+    InMemorySessionStore,
+    SQLiteSessionStore,
+    WriteBehindSessionStore,
+    create_session_store,
+)
+
+
+class RecordingStore(InMemorySessionStore):
+    """In-memory store that records each batch and claims to be shared"""
+
+    shared = True
+
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def save_many(self, sessions):
+        self.batches.append(dict(sessions))
+        super().save_many(sessions)
+
+
+class FailingOnceStore(InMemorySessionStore):
+    def __init__(self):
+        super().__init__()
+        self.failed = False
+
+    def save_many(self, sessions):
+        if not self.failed:
+            self.failed = True
+            raise RuntimeError("database is locked")
+        super().save_many(sessions)
+
+
+def test_follow_up_on_another_worker_sees_history(tmp_path):
+    db_path = str(tmp_path / "sessions.db")
+    worker_a = SessionManager(store=SQLiteSessionStore(db_path))
+    worker_b = SessionManager(store=SQLiteSessionStore(db_path))
+
+    session_id = worker_a.create_session()
+    worker_a.add_exchange(session_id, "What is MCP?", "A protocol.")
+
+    assert worker_b.get_conversation_history(session_id) == (
+        "User: What is MCP?\nAssistant: A protocol."
+    )
+    assert worker_b.delete_session(session_id) is True
+    assert worker_a.store.load(session_id) is None
+    worker_a.close()
+    worker_b.close()
+
+
+def test_write_behind_batches_and_coalesces_writes():
+    inner = RecordingStore()
+    store = WriteBehindSessionStore(inner, flush_interval_seconds=60)
+    manager = SessionManager(store=store)
+
+    session_id = manager.create_session()
+    manager.add_exchange(session_id, "q1", "a1")
+    manager.add_exchange(session_id, "q2", "a2")
+
+    # Buffered writes are visible to reads before they are flushed
+    assert inner.batches == []
+    assert store.load(session_id)[-1] == ("assistant", "a2")
+
+    store.flush()
+
+    assert len(inner.batches) == 1
+    assert inner.batches[0][session_id][-1] == ("assistant", "a2")
+    stats = store.get_stats()["write_behind"]
+    assert stats["coalesced_writes"] == 3
+    assert stats["rows_flushed"] == 1
+    manager.close()
+
+
+def test_failed_flush_is_retried_without_losing_newer_writes():
+    inner = FailingOnceStore()
+    store = WriteBehindSessionStore(inner, flush_interval_seconds=60)
+
+    store.save("s", [("user", "old")])
+    store.flush()
+    store.save("s", [("user", "new")])
+    store.flush()
+
+    assert inner.load("s") == [("user", "new")]
+    assert store.get_stats()["write_behind"]["flush_errors"] == 1
+    store.close()
+
+
+def test_shared_store_is_reread_once_cache_entry_is_stale():
+    clock_now = [0.0]
+    store = RecordingStore()
+    manager = SessionManager(store=store, cache_seconds=1, clock=lambda: clock_now[0])
+    session_id = manager.create_session()
+    manager.add_exchange(session_id, "q1", "a1")
+
+    # Another worker appends to the same session
+    store.save(session_id, store.load(session_id) + [("user", "q2")])
+
+    assert manager.get_conversation_history(session_id).endswith("a1")
+    clock_now[0] = 2
+    assert manager.get_conversation_history(session_id).endswith("User: q2")
+
+
+def test_memory_backend_uses_no_store():
+    assert create_session_store("memory") is None
+
+
+def test_manager_without_a_store_drops_sessions_the_cache_evicts():
+    manager = SessionManager(max_sessions=1, num_shards=1)
+
+    first = manager.create_session()
+    manager.add_exchange(first, "q", "a")
+    manager.create_session()
+
+    assert manager.get_conversation_history(first) is None
+    assert manager.get_stats()["store"] is None
+
+
+def test_manager_writes_through_to_a_process_local_store():
+    store = InMemorySessionStore()
+    manager = SessionManager(store=store)
+
+    session_id = manager.create_session()
+    manager.add_exchange(session_id, "What is MCP?", "A protocol.")
+
+    assert store.load(session_id) == [
+        ("user", "What is MCP?"),
+        ("assistant", "A protocol."),
+    ]
+    assert manager.delete_session(session_id) is True
+    assert store.load(session_id) is None
+    assert manager.get_conversation_history(session_id) is None
+
+
+class HookStore(InMemorySessionStore):
+    """Runs a hook while a batch is being written, before it lands"""
+
+    def __init__(self):
+        super().__init__()
+        self.during_save = None
+
+    def save_many(self, sessions):
+        if self.during_save is not None:
+            hook, self.during_save = self.during_save, None
+            hook()
+        super().save_many(sessions)
+
+
+def test_in_flight_batch_stays_readable_and_deletes_stick():
+    inner = HookStore()
+    store = WriteBehindSessionStore(inner, flush_interval_seconds=60)
+    store.save("s", [("user", "q1")])
+    seen = []
+
+    def read_then_delete():
+        seen.append(store.load("s"))
+        store.delete("s")
+        seen.append(store.load("s"))
+
+    inner.during_save = read_then_delete
+    store.flush()
+
+    assert seen == [[("user", "q1")], None]
+    # The batch landed after the delete, and was deleted again
+    assert inner.load("s") is None
+    assert store.load("s") is None
+    store.close()
+
+
+def test_failed_flush_does_not_bring_back_a_deleted_session():
+    inner = HookStore()
+    store = WriteBehindSessionStore(inner, flush_interval_seconds=60)
+    store.save("s", [("user", "q1")])
+
+    def delete_then_fail():
+        store.delete("s")
+        raise RuntimeError("database is locked")
+
+    inner.during_save = delete_then_fail
+    store.flush()
+    store.flush()
+
+    assert store.load("s") is None
+    assert inner.load("s") is None
+    assert store.get_stats()["write_behind"]["pending"] == 0
+    store.close()
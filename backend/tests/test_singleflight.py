@@ -0,0 +1,82 @@
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+BACKEND_PATH = Path(__file__).resolve().parents[1]
+if str(BACKEND_PATH) not in sys.path:
+    sys.path.insert(0, str(BACKEND_PATH))
+
+from singleflight import SingleFlight  # noqa: E402
+
+
+def test_concurrent_threads_share_one_call():
+    group = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        release.wait(timeout=2)
+        return "answer"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(group.do("key", work)))
+        for _ in range(3)
+    ]
+    threads[0].start()
+    while group.get_stats()["in_flight"] == 0:
+        pass
+    for thread in threads[1:]:
+        thread.start()
+    while group.get_stats()["coalesced"] < 2:
+        pass
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+    assert sorted(results) == [("answer", False), ("answer", True), ("answer", True)]
+    stats = group.get_stats()
+    assert stats["leaders"] == 1
+    assert stats["max_callers"] == 3
+    assert stats["in_flight"] == 0
+
+
+def test_leader_exception_reaches_every_caller():
+    group = SingleFlight()
+
+    def fail():
+        raise RuntimeError("provider down")
+
+    with pytest.raises(RuntimeError):
+        group.do("key", fail)
+
+    assert group.get_stats()["in_flight"] == 0
+
+
+def test_async_callers_share_one_task_and_survive_a_cancelled_caller():
+    group = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    async def scenario():
+        first = asyncio.create_task(group.ado("key", work))
+        second = asyncio.create_task(group.ado("key", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second, first
+
+    result, cancelled = asyncio.run(scenario())
+
+    assert result == ("answer", True)
+    assert cancelled.cancelled()
+    assert calls == [1]
+    assert group.get_stats()["coalesced_ratio"] == 0.5
@@ -0,0 +1,126 @@
+import sys
+from concurrent.futures import Future
+from pathlib import Path
+
+BACKEND_PATH = Path(__file__).resolve().parents[1]
+if str(BACKEND_PATH) not in sys.path:
+    sys.path.insert(0, str(BACKEND_PATH))
+
+from request_timing import collect_timings  # noqa: E402
+from search_tools import CourseSearchTool, ToolManager  # noqa: E402
+from speculative_retrieval import (  # noqa: E402
+    SpeculationStats,
+    SpeculativeSearch,
+    SpeculativeToolManager,
+    finish_speculative_search,
+)
+from vector_store import SearchResults  # noqa: E402
+
+
+class StubVectorStore:
+    def __init__(self):
+        self.search_calls = []
+
+    def search(self, **kwargs):
+        self.search_calls.append(kwargs)
+        return SearchResults(
+            documents=["Live search result."],
+            metadata=[{"course_title": "Mastering MCP", "lesson_number": 1}],
+            distances=[0.3],
+        )
+
+    def get_lesson_link(self, _course_title, _lesson_number):
+        return None
+
+
+def prefetched_results():
+    return SearchResults(
+        documents=["Batching combines requests.", "Batching saves round trips."],
+        metadata=[
+            {"course_title": "Mastering MCP", "lesson_number": 5},
+            {"course_title": "Mastering MCP", "lesson_number": 5},
+        ],
+        distances=[0.2, 0.3],
+    )
+
+
+def build_speculation(user_query="What was covered about batching in lesson 5?"):
+    future = Future()
+    future.set_result(prefetched_results())
+    return SpeculativeSearch(user_query, future, match_threshold=0.6, wait_seconds=1)
+
+
+def build_tool_manager(speculation):
+    store = StubVectorStore()
+    tool_manager = ToolManager()
+    search_tool = CourseSearchTool(store)
+    tool_manager.register_tool(search_tool)
+    stats = SpeculationStats()
+    return (
+        SpeculativeToolManager(tool_manager, search_tool, speculation, stats),
+        store,
+        stats,
+    )
+
+
+def test_close_model_query_is_served_from_prefetched_results():
+    speculative_manager, store, stats = build_tool_manager(build_speculation())
+
+    with collect_timings() as timings:
+        result = speculative_manager.execute_tool(
+            "search_course_content", query="batching lesson 5"
+        )
+
+    assert "Batching combines requests." in result
+    assert [tool["outcome"] for tool in timings.to_dict()["tools"]] == ["prefetched"]
+    assert store.search_calls == []
+    assert speculative_manager.get_last_sources() == ["Mastering MCP - Lesson 5"]
+    assert stats.snapshot()["hits"] == 1
+
+
+def test_dissimilar_model_query_falls_back_to_live_search():
+    speculative_manager, store, stats = build_tool_manager(build_speculation())
+
+    result = speculative_manager.execute_tool(
+        "search_course_content", query="prompt engineering tips"
+    )
+
+    assert "Live search result." in result
+    assert len(store.search_calls) == 1
+    assert stats.snapshot() == {
+        "started": 0,
+        "hits": 0,
+        "misses": 1,
+        "unused": 0,
+        "hit_rate": 0.0,
+    }
+
+
+def test_filters_must_hold_for_every_prefetched_result():
+    speculation = build_speculation()
+    speculation.resolve_course_name = {
+        "mcp": "Mastering MCP",
+        "RAG": "Intro to RAG",
+    }.get
+
+    assert speculation.take_if_matches("batching", course_name="mcp", lesson_number=5)
+    assert speculation.take_if_matches("batching", lesson_number=4) is None
+    assert speculation.take_if_matches("batching", course_name="RAG") is None
+    assert speculation.take_if_matches("batching", course_name="unknown") is None
+
+
+def test_course_filter_needs_the_exact_resolved_title():
+    speculation = build_speculation()
+    # "MCP" is a substring of the hits' title, but resolves to another course
+    speculation.resolve_course_name = lambda _name: "Advanced MCP"
+
+    assert speculation.take_if_matches("batching", course_name="MCP") is None
+
+
+def test_unconsulted_speculation_is_counted_as_unused():
+    stats = SpeculationStats()
+    speculation = build_speculation()
+
+    finish_speculative_search(speculation, stats)
+
+    assert stats.snapshot()["unused"] == 1
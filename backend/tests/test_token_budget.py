@@ -0,0 +1,156 @@
+import copy
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+BACKEND_PATH = Path(__file__).resolve().parents[1]
+if str(BACKEND_PATH) not in sys.path:
+    sys.path.insert(0, str(BACKEND_PATH))
+
+from ai_generator import AIGenerator  # noqa: E402
+from session_manager import SessionManager  # noqa: E402
+from token_budget import TokenBudget, estimate_tokens  # noqa: E402
+
+
+class StubMessagesAPI:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def create(self, **kwargs):
+        self.calls.append(copy.deepcopy(kwargs))
+        return self.responses.pop(0)
+
+
+class StubToolManager:
+    def __init__(self, result: str):
+        self.result = result
+
+    def is_blocking_tool(self, _tool_name: str) -> bool:
+        return True
+
+    def execute_tool(self, _tool_name: str, **_kwargs):
+        return self.result
+
+
+def search_round():
+    return SimpleNamespace(
+        content=[
+            SimpleNamespace(
+                type="tool_use",
+                name="search_course_content",
+                input={"query": "batching"},
+                id="t_search",
+            )
+        ]
+    )
+
+
+def text_response(text: str):
+    return SimpleNamespace(content=[SimpleNamespace(type="text", text=text)])
+
+
+def test_history_keeps_newest_lines_within_budget():
+    budget = TokenBudget(history_budget=20)
+    history = "\n".join(f"User: question number {index}" for index in range(10))
+
+    fitted = budget.fit_history(history)
+
+    assert estimate_tokens(fitted) <= 20
+    assert fitted.endswith("User: question number 9")
+    assert "question number 0" not in fitted
+    assert budget.get_stats()["history_trims"] == 1
+
+
+def test_history_drops_multi_line_messages_whole():
+    budget = TokenBudget(history_budget=20)
+    messages = [
+        "User: what is batching?",
+        "Assistant: Batching groups work.\n- fewer calls\n- lower cost",
+        "User: and caching?",
+    ]
+
+    fitted = budget.fit_history("\n".join(messages), messages)
+
+    assert fitted == "User: and caching?"
+
+
+def test_session_manager_fits_history_on_message_boundaries():
+    budget = TokenBudget(history_budget=30)
+    manager = SessionManager(fit_history=budget.fit_history)
+    session_id = manager.create_session()
+    manager.add_exchange(session_id, "q1", "Line one of a long answer\n" + "x " * 40)
+    manager.add_exchange(session_id, "q2", "short\nanswer")
+
+    fitted = manager.get_conversation_history(session_id)
+
+    assert fitted == "User: q2\nAssistant: short\nanswer"
+    assert budget.get_stats()["history_trims"] == 1
+
+
+def test_tool_results_share_budget_by_size():
+    budget = TokenBudget(tool_result_budget=100)
+    results = [
+        {"type": "tool_result", "tool_use_id": "a", "content": "x" * 1400},
+        {"type": "tool_result", "tool_use_id": "b", "content": "y" * 350},
+    ]
+
+    fitted = budget.fit_tool_results(results)
+
+    assert [result["tool_use_id"] for result in fitted] == ["a", "b"]
+    assert sum(estimate_tokens(result["content"]) for result in fitted) <= 100
+    assert fitted[0]["content"].endswith("[truncated]")
+    assert results[0]["content"] == "x" * 1400
+
+
+def test_fit_messages_trims_oldest_tool_results_first():
+    budget = TokenBudget(prompt_budget=300)
+    messages = [
+        {"role": "user", "content": "question"},
+        {
+            "role": "user",
+            "content": [{"type": "tool_result", "content": "old " * 200}],
+        },
+        {
+            "role": "user",
+            "content": [{"type": "tool_result", "content": "new " * 100}],
+        },
+    ]
+
+    input_tokens = budget.fit_messages(messages, fixed_tokens=50)
+
+    assert input_tokens <= 300
+    assert messages[1]["content"][0]["content"].endswith("[truncated]")
+    assert messages[2]["content"][0]["content"] == "new " * 100
+
+
+def test_generator_trims_history_and_records_request_usage():
+    budget = TokenBudget(history_budget=10, tool_result_budget=50)
+    generator = AIGenerator("test-key", "test-model", 10, 0, token_budget=budget)
+    generator.client = SimpleNamespace(
+        messages=StubMessagesAPI([search_round(), text_response("answer")])
+    )
+    history = "User: first question\nAssistant: first answer\nUser: latest question"
+
+    response_text = generator.generate_response(
+        query="What is batching?",
+        conversation_history=history,
+        tools=[{"name": "search_course_content"}],
+        tool_manager=StubToolManager("chunk " * 500),
+    )
+
+    assert response_text == "answer"
+    calls = generator.client.messages.calls
+    first_user_turn = calls[0]["messages"][0]["content"][0]["text"]
+    assert "latest question" in first_user_turn
+    assert "first question" not in first_user_turn
+    tool_result = calls[1]["messages"][-1]["content"][0]["content"]
+    assert estimate_tokens(tool_result) <= 50
+
+    stats = budget.get_stats()
+    assert stats["requests"] == 1
+    assert stats["tool_result_trims"] == 1
+    assert stats["peak_call_input_tokens"]["max"] > 0
+    assert (
+        stats["request_input_tokens"]["max"] >= stats["peak_call_input_tokens"]["max"]
+    )
@@ -0,0 +1,69 @@
+import sys
+import threading
+from pathlib import Path
+
+BACKEND_PATH = Path(__file__).resolve().parents[1]
+if str(BACKEND_PATH) not in sys.path:
+    sys.path.insert(0, str(BACKEND_PATH))
+
+from models import Course, Lesson  # noqa: E402
+from vector_store import VectorStore  # noqa: E402
+
+
+class StubCatalogCollection:
+    def __init__(self, ids):
+        self.ids = list(ids)
+        self.get_calls = []
+
+    def get(self, **kwargs):
+        self.get_calls.append(kwargs)
+        return {"ids": list(self.ids), "metadatas": None, "documents": None}
+
+    def add(self, documents, metadatas, ids):
+        self.ids.extend(ids)
+
+
+def build_store_with_catalog(ids):
+    store = object.__new__(VectorStore)
+    store._catalog_lock = threading.Lock()
+    store._course_titles = None
+    store.index_version = 0
+    store.course_catalog = StubCatalogCollection(ids)
+    return store
+
+
+def test_catalog_reads_project_ids_only_and_load_once():
+    store = build_store_with_catalog(["Mastering MCP", "Build AI Chatbots with RAG"])
+
+    assert store.get_course_count() == 2
+    assert store.get_existing_course_titles() == [
+        "Mastering MCP",
+        "Build AI Chatbots with RAG",
+    ]
+    assert store.get_course_count() == 2
+    assert store.course_catalog.get_calls == [{"include": []}]
+
+
+def test_added_courses_update_cached_titles_without_reading_catalog():
+    store = build_store_with_catalog(["Mastering MCP"])
+    store.get_course_count()
+
+    store.add_course_metadata(
+        Course(
+            title="Build AI Chatbots with RAG",
+            lessons=[Lesson(lesson_number=1, title="Introduction")],
+        )
+    )
+
+    assert store.get_course_count() == 2
+    assert store.get_existing_course_titles()[-1] == "Build AI Chatbots with RAG"
+    assert len(store.course_catalog.get_calls) == 1
+
+
+def test_returned_titles_are_a_copy_of_the_cache():
+    store = build_store_with_catalog(["Mastering MCP"])
+
+    titles = store.get_existing_course_titles()
+    titles.append("Injected")
+
+    assert store.get_existing_course_titles() == ["Mastering MCP"]
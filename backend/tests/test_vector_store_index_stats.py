@@ -0,0 +1,72 @@
+import sys
+from pathlib import Path
+
+import chromadb
+from chromadb.config import Settings
+
+BACKEND_PATH = Path(__file__).resolve().parents[1]
+if str(BACKEND_PATH) not in sys.path:
+    sys.path.insert(0, str(BACKEND_PATH))
+
+from vector_store import VectorStore  # noqa: E402
+
+
+def build_store(chroma_path: Path, hnsw_settings):
+    store = object.__new__(VectorStore)
+    store.chroma_path = str(chroma_path)
+    store.hnsw_settings = hnsw_settings
+    store.client = chromadb.PersistentClient(
+        path=str(chroma_path), settings=Settings(anonymized_telemetry=False)
+    )
+    store.embedding_function = None
+    store.course_catalog = store._create_collection("course_catalog")
+    store.course_content = store._create_collection("course_content")
+    return store
+
+
+def test_collections_are_created_with_configured_hnsw_settings(tmp_path):
+    store = build_store(
+        tmp_path,
+        {"space": "cosine", "M": 32, "construction_ef": 200, "search_ef": 50},
+    )
+
+    hnsw = store.get_index_stats()["hnsw"]["course_content"]
+
+    assert hnsw["space"] == "cosine"
+    assert hnsw["max_neighbors"] == 32
+    assert hnsw["ef_construction"] == 200
+    assert hnsw["ef_search"] == 50
+
+
+def test_search_ef_is_updated_on_existing_collections(tmp_path):
+    build_store(tmp_path, {"space": "l2", "M": 16, "search_ef": 50})
+
+    reopened = build_store(tmp_path, {"space": "cosine", "M": 64, "search_ef": 120})
+    hnsw = reopened.get_index_stats()["hnsw"]["course_content"]
+
+    assert hnsw["ef_search"] == 120
+    assert hnsw["space"] == "l2"
+    assert hnsw["max_neighbors"] == 16
+
+
+def test_index_stats_report_chunks_per_course_and_sizes(tmp_path):
+    store = build_store(tmp_path, {"M": 16})
+    store.course_content.add(
+        ids=["mcp_0", "mcp_1", "rag_0"],
+        embeddings=[[0.1, 0.2, 0.3], [0.2, 0.1, 0.3], [0.3, 0.2, 0.1]],
+        metadatas=[
+            {"course_title": "Mastering MCP"},
+            {"course_title": "Mastering MCP"},
+            {"course_title": "Build AI Chatbots with RAG"},
+        ],
+    )
+
+    stats = store.get_index_stats()
+
+    assert stats["total_chunks"] == 3
+    assert stats["chunks_per_course"] == {
+        "Mastering MCP": 2,
+        "Build AI Chatbots with RAG": 1,
+    }
+    assert stats["disk_size_bytes"] > 0
+    assert stats["estimated_index_memory_bytes"] == 3 * (3 * 4 + 16 * 2 * 4)
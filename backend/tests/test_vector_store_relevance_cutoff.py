@@ -0,0 +1,154 @@
+import importlib
+import sys
+import threading
+from pathlib import Path
+from types import ModuleType, SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+BACKEND_PATH = Path(__file__).resolve().parents[1]
+if str(BACKEND_PATH) not in sys.path:
+    sys.path.insert(0, str(BACKEND_PATH))
+
+from vector_store import VectorStore  # noqa: E402
+
+
+class StubContentCollection:
+    def __init__(self, distances):
+        self.distances = distances
+        self.query_calls = []
+
+    def query(self, **kwargs):
+        self.query_calls.append(kwargs)
+        count = len(self.distances)
+        return {
+            "documents": [[f"chunk {index}" for index in range(count)]],
+            "metadatas": [
+                [{"course_title": "Mastering MCP", "lesson_number": index}]
+                for index in range(count)
+            ],
+            "distances": [self.distances],
+        }
+
+
+def build_store_with_stub_collection(
+    distances, max_distance=0.0, adaptive_k=False, min_score_gap=0.0, min_results=1
+):
+    store = object.__new__(VectorStore)
+    store.max_results = 5
+    store.max_distance = max_distance
+    store.adaptive_k = adaptive_k
+    store.min_score_gap = min_score_gap
+    store.min_results = min_results
+    store._stats_lock = threading.Lock()
+    store.search_stats = {
+        "searches": 0,
+        "results_returned": 0,
+        "results_trimmed": 0,
+        "chars_trimmed": 0,
+    }
+    store.embedding_function = lambda texts: [[0.0, 1.0] for _ in texts]
+    store.course_content = StubContentCollection(distances)
+    return store
+
+
+def test_search_drops_results_beyond_max_distance():
+    store = build_store_with_stub_collection(
+        [0.2, 0.4, 0.9, 1.7, 1.9], max_distance=1.6
+    )
+
+    results = store.search("What is MCP?")
+
+    assert results.distances == [0.2, 0.4, 0.9]
+    assert results.documents == ["chunk 0", "chunk 1", "chunk 2"]
+    assert results.trimmed == 2
+    assert store.course_content.query_calls[0]["n_results"] == 5
+
+
+def test_search_cuts_at_largest_distance_gap():
+    store = build_store_with_stub_collection(
+        [0.30, 0.35, 0.38, 0.95, 1.00], adaptive_k=True, min_score_gap=0.2
+    )
+
+    results = store.search("What is MCP?")
+
+    assert results.distances == [0.30, 0.35, 0.38]
+    assert results.trimmed == 2
+
+
+def test_search_keeps_all_results_when_largest_gap_is_small():
+    store = build_store_with_stub_collection(
+        [0.30, 0.35, 0.40, 0.45, 0.50], adaptive_k=True, min_score_gap=0.2
+    )
+
+    results = store.search("What is MCP?")
+
+    assert len(results.documents) == 5
+    assert results.trimmed == 0
+
+
+def test_adaptive_cut_respects_min_results():
+    store = build_store_with_stub_collection(
+        [0.10, 0.90, 0.95, 1.40], adaptive_k=True, min_results=2
+    )
+
+    results = store.search("What is MCP?")
+
+    assert results.distances == [0.10, 0.90, 0.95]
+    assert results.trimmed == 1
+
+
+def test_search_stats_report_trimmed_counts():
+    store = build_store_with_stub_collection(
+        [0.2, 0.4, 1.8, 1.9, 2.0], max_distance=1.6
+    )
+
+    store.search("first query")
+    store.search("second query")
+    stats = store.get_search_stats()
+
+    assert stats["searches"] == 2
+    assert stats["results_returned"] == 4
+    assert stats["results_trimmed"] == 6
+    assert stats["chars_trimmed"] == 6 * len("chunk 2")
+    assert stats["avg_trimmed_per_search"] == 3.0
+    # 42 characters at 3.5 per token
+    assert stats["est_tokens_trimmed"] == 12
+    assert stats["avg_est_tokens_trimmed_per_search"] == 6.0
+
+
+class StubRAGSystem:
+    def __init__(self, _config):
+        self.session_manager = SimpleNamespace(
+            create_session=lambda: "session_1", close=lambda: None
+        )
+        self.ai_generator = SimpleNamespace(aclose=self._aclose)
+
+    async def _aclose(self):
+        pass
+
+    def add_course_folder(self, _folder_path, clear_existing=False):
+        return 0, 0
+
+    def llm_capacity(self):
+        return 64
+
+    def get_search_stats(self):
+        return {"searches": 2, "results_trimmed": 6, "est_tokens_trimmed": 12}
+
+
+def test_search_stats_endpoint_reports_trimmed_counts(monkeypatch):
+    fake_rag_module = ModuleType("rag_system")
+    fake_rag_module.RAGSystem = StubRAGSystem
+    monkeypatch.setitem(sys.modules, "rag_system", fake_rag_module)
+    monkeypatch.chdir(BACKEND_PATH)
+    sys.modules.pop("app", None)
+    try:
+        app_module = importlib.import_module("app")
+        with TestClient(app_module.app) as client:
+            response = client.get("/api/search/stats")
+    finally:
+        sys.modules.pop("app", None)
+
+    assert response.status_code == 200
+    assert response.json()["est_tokens_trimmed"] == 12
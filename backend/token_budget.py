@@ -0,0 +1,216 @@
+import json
+import math
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+from percentiles import percentile
+
+# Claude tokenizes English prose at roughly 3.5 characters per token; this is
+# deliberately a cheap local estimate, not an exact count
+CHARS_PER_TOKEN = 3.5
+TRUNCATION_MARKER = "\n[truncated]"
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Estimate the token count of a piece of text"""
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def estimate_content_tokens(content: Any) -> int:
+    """Estimate tokens for message content (a string or a list of blocks)"""
+    if isinstance(content, str):
+        return estimate_tokens(content)
+
+    total = 0
+    for block in content or []:
+        if isinstance(block, dict):
+            total += estimate_content_tokens(block.get("text") or block.get("content"))
+        else:
+            total += estimate_tokens(getattr(block, "text", None))
+            block_input = getattr(block, "input", None)
+            if block_input:
+                total += estimate_tokens(json.dumps(block_input))
+    return total
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to fit max_tokens, keeping the beginning"""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    keep_chars = max(int(max_tokens * CHARS_PER_TOKEN) - len(TRUNCATION_MARKER), 0)
+    return text[:keep_chars] + TRUNCATION_MARKER
+
+
+@dataclass
+class RequestTokenUsage:
+    """Estimated input tokens of each LLM call made for one request"""
+
+    calls: List[int] = field(default_factory=list)
+
+    @property
+    def total(self) -> int:
+        return sum(self.calls)
+
+    @property
+    def peak(self) -> int:
+        return max(self.calls, default=0)
+
+
+class TokenBudget:
+    """Keeps prompt size bounded by trimming history and tool results"""
+
+    def __init__(
+        self,
+        prompt_budget: int = 6000,
+        history_budget: int = 1000,
+        tool_result_budget: int = 1500,
+        sample_size: int = 1000,
+    ):
+        self.prompt_budget = prompt_budget
+        self.history_budget = history_budget
+        self.tool_result_budget = tool_result_budget
+
+        self._lock = threading.Lock()
+        self._peak_samples = deque(maxlen=sample_size)
+        self._total_samples = deque(maxlen=sample_size)
+        self._counters = {
+            "requests": 0,
+            "history_trims": 0,
+            "tool_result_trims": 0,
+            "prompt_trims": 0,
+            "tokens_trimmed": 0,
+        }
+
+    def fit_history(
+        self, history: Optional[str], messages: Optional[Sequence[str]] = None
+    ) -> Optional[str]:
+        """
+        Drop the oldest history messages until the history fits its budget.
+
+        messages are the rendered messages history is joined from, oldest
+        first, so multi-line messages are kept or dropped whole; without
+        them each line counts as a message.
+        """
+        if not history or estimate_tokens(history) <= self.history_budget:
+            return history
+
+        kept: List[str] = []
+        used = 0
+        for message in reversed(messages or history.split("\n")):
+            message_tokens = estimate_tokens(message) + 1
+            if used + message_tokens > self.history_budget:
+                if not kept:
+                    # Even the newest message is too long; keep its tail
+                    keep_chars = int(self.history_budget * CHARS_PER_TOKEN)
+                    kept.append(message[-keep_chars:])
+                break
+            kept.append(message)
+            used += message_tokens
+
+        trimmed = "\n".join(reversed(kept))
+        self._count_trim("history_trims", history, trimmed)
+        return trimmed or None
+
+    def fit_tool_results(self, tool_results: List[Dict[str, Any]]) -> List[Dict]:
+        """Shrink one round's tool results to the per-round budget"""
+        sizes = [estimate_tokens(str(result["content"])) for result in tool_results]
+        total = sum(sizes)
+        if total <= self.tool_result_budget:
+            return tool_results
+
+        fitted = []
+        for result, size in zip(tool_results, sizes):
+            # Each result keeps a share of the budget proportional to its size
+            share = max(self.tool_result_budget * size // total, 1)
+            content = str(result["content"])
+            fitted_content = truncate_to_tokens(content, share)
+            self._count_trim("tool_result_trims", content, fitted_content)
+            fitted.append({**result, "content": fitted_content})
+        return fitted
+
+    def fit_messages(self, messages: List[Dict[str, Any]], fixed_tokens: int) -> int:
+        """
+        Trim tool results in place, oldest first, until the whole prompt fits.
+
+        Args:
+            messages: Conversation messages about to be sent
+            fixed_tokens: Tokens used by the system prompt and tool schemas
+
+        Returns:
+            Estimated input tokens of the prompt after trimming
+        """
+        total = fixed_tokens + sum(
+            estimate_content_tokens(message["content"]) for message in messages
+        )
+        excess = total - self.prompt_budget
+        if excess <= 0:
+            return total
+
+        for message in messages:
+            if excess <= 0 or not isinstance(message["content"], list):
+                continue
+            for block in message["content"]:
+                if excess <= 0:
+                    break
+                if not isinstance(block, dict) or block.get("type") != "tool_result":
+                    continue
+                content = str(block["content"])
+                size = estimate_tokens(content)
+                fitted_content = truncate_to_tokens(content, max(size - excess, 0))
+                excess -= size - estimate_tokens(fitted_content)
+                self._count_trim("prompt_trims", content, fitted_content)
+                block["content"] = fitted_content
+
+        return self.prompt_budget + max(excess, 0)
+
+    def start_request(self) -> RequestTokenUsage:
+        """Begin tracking the LLM calls of one request"""
+        return RequestTokenUsage()
+
+    def finish_request(self, usage: RequestTokenUsage):
+        """Record a finished request's input size"""
+        if not usage.calls:
+            return
+        with self._lock:
+            self._counters["requests"] += 1
+            self._peak_samples.append(usage.peak)
+            self._total_samples.append(usage.total)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Budgets, trim counters and percentiles of recent request input sizes"""
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._counters)
+            peaks = sorted(self._peak_samples)
+            totals = sorted(self._total_samples)
+
+        stats["budgets"] = {
+            "prompt": self.prompt_budget,
+            "history": self.history_budget,
+            "tool_results": self.tool_result_budget,
+        }
+        stats["peak_call_input_tokens"] = _percentiles(peaks)
+        stats["request_input_tokens"] = _percentiles(totals)
+        return stats
+
+    def _count_trim(self, counter: str, before: str, after: str):
+        trimmed = estimate_tokens(before) - estimate_tokens(after)
+        if trimmed <= 0:
+            return
+        with self._lock:
+            self._counters[counter] += 1
+            self._counters["tokens_trimmed"] += trimmed
+
+
+def _percentiles(sorted_samples: List[int]) -> Dict[str, int]:
+    if not sorted_samples:
+        return {"p50": 0, "p95": 0, "max": 0}
+
+    return {
+        "p50": percentile(sorted_samples, 0.5),
+        "p95": percentile(sorted_samples, 0.95),
+        "max": sorted_samples[-1],
+    }
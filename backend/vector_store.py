@@ -1,9 +1,16 @@
+import math
+import os
+import threading
+from collections import Counter
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional
 
 import chromadb
 from chromadb.config import Settings
+from deadline import Deadline
+from metrics import stage
 from models import Course, CourseChunk
+from token_budget import CHARS_PER_TOKEN
 
 
 @dataclass
@@ -14,6 +21,7 @@ class SearchResults:
     metadata: List[Dict[str, Any]]
     distances: List[float]
     error: Optional[str] = None
+    trimmed: int = 0  # Results dropped by the relevance cutoff
 
     @classmethod
     def from_chroma(cls, chroma_results: Dict) -> "SearchResults":
@@ -39,12 +47,61 @@ class SearchResults:
         """Check if results are empty"""
         return len(self.documents) == 0
 
+    def truncate(self, keep: int) -> "SearchResults":
+        """Keep the first ``keep`` results and count the rest as trimmed"""
+        dropped = max(len(self.documents) - keep, 0)
+        return SearchResults(
+            documents=self.documents[:keep],
+            metadata=self.metadata[:keep],
+            distances=self.distances[:keep],
+            error=self.error,
+            trimmed=self.trimmed + dropped,
+        )
+
 
 class VectorStore:
     """Vector storage using ChromaDB for course content and metadata"""
 
-    def __init__(self, chroma_path: str, embedding_model: str, max_results: int = 5):
+    DEADLINE_SKIPPED = "Search skipped: request deadline exceeded"
+
+    def __init__(
+        self,
+        chroma_path: str,
+        embedding_model: str,
+        max_results: int = 5,
+        max_distance: float = 0.0,
+        adaptive_k: bool = False,
+        min_score_gap: float = 0.0,
+        min_results: int = 1,
+        hnsw_settings: Optional[Dict[str, Any]] = None,
+    ):
+        self.chroma_path = chroma_path
         self.max_results = max_results
+        # HNSW parameters (space, M, construction_ef, search_ef); None keeps
+        # Chroma's defaults
+        self.hnsw_settings = hnsw_settings or {}
+        # Relevance cutoff settings (max_distance <= 0 disables the threshold)
+        self.max_distance = max_distance
+        self.adaptive_k = adaptive_k
+        self.min_score_gap = min_score_gap
+        self.min_results = max(min_results, 1)
+
+        # Cumulative counters for measuring what the cutoff saves
+        self._stats_lock = threading.Lock()
+        self.search_stats = {
+            "searches": 0,
+            "results_returned": 0,
+            "results_trimmed": 0,
+            "chars_trimmed": 0,
+        }
+
+        # Catalog titles maintained on write so counts and title listings never
+        # have to read the catalog; loaded lazily with an ids-only projection
+        self._catalog_lock = threading.Lock()
+        self._course_titles: Optional[List[str]] = None
+
+        # Bumped on every write so caches of derived answers can invalidate
+        self.index_version = 0
         # Initialize ChromaDB client
         self.client = chromadb.PersistentClient(
             path=chroma_path, settings=Settings(anonymized_telemetry=False)
@@ -66,17 +123,60 @@ class VectorStore:
         )  # Actual course material
 
     def _create_collection(self, name: str):
-        """Create or get a ChromaDB collection"""
-        return self.client.get_or_create_collection(
-            name=name, embedding_function=self.embedding_function
+        """Create or get a ChromaDB collection with the configured HNSW index"""
+        hnsw_configuration = self._hnsw_configuration()
+        if not hnsw_configuration:
+            return self.client.get_or_create_collection(
+                name=name, embedding_function=self.embedding_function
+            )
+
+        collection = self.client.get_or_create_collection(
+            name=name,
+            configuration={"hnsw": hnsw_configuration},
+            embedding_function=self.embedding_function,
         )
 
+        # Existing collections keep their build-time parameters, but search ef
+        # can be changed in place to trade recall for latency
+        search_ef = hnsw_configuration.get("ef_search")
+        current_ef = self._collection_hnsw_settings(collection).get("ef_search")
+        if search_ef is not None and current_ef not in (None, search_ef):
+            try:
+                collection.modify(configuration={"hnsw": {"ef_search": search_ef}})
+            except Exception as e:
+                print(f"Error updating search ef for {name}: {e}")
+
+        return collection
+
+    def _hnsw_configuration(self) -> Dict[str, Any]:
+        """Translate HNSW settings into Chroma's collection configuration"""
+        key_map = {
+            "space": "space",
+            "M": "max_neighbors",
+            "construction_ef": "ef_construction",
+            "search_ef": "ef_search",
+        }
+        return {
+            key_map[key]: value
+            for key, value in self.hnsw_settings.items()
+            if key in key_map and value is not None
+        }
+
+    def _collection_hnsw_settings(self, collection) -> Dict[str, Any]:
+        """Read the HNSW settings a collection is actually using"""
+        try:
+            configuration = collection.configuration_json or {}
+            return dict(configuration.get("hnsw") or {})
+        except Exception:
+            return {}
+
     def search(
         self,
         query: str,
         course_name: Optional[str] = None,
         lesson_number: Optional[int] = None,
         limit: Optional[int] = None,
+        deadline: Optional[Deadline] = None,
     ) -> SearchResults:
         """
         Main search interface that handles course resolution and content search.
@@ -86,6 +186,9 @@ class VectorStore:
             course_name: Optional course name/title to filter by
             lesson_number: Optional lesson number to filter by
             limit: Maximum results to return
+            deadline: Optional request deadline, checked before each stage;
+                a stage can't be interrupted once started, so once it has
+                passed the remaining embedding and Chroma work is skipped
 
         Returns:
             SearchResults object with documents and metadata
@@ -93,7 +196,10 @@ class VectorStore:
         # Step 1: Resolve course name if provided
         course_title = None
         if course_name:
-            course_title = self._resolve_course_name(course_name)
+            if deadline is not None and deadline.expired:
+                return SearchResults.empty(self.DEADLINE_SKIPPED)
+            with stage("course_resolution"):
+                course_title = self.resolve_course_name(course_name)
             if not course_title:
                 return SearchResults.empty(f"No course found matching '{course_name}'")
 
@@ -104,17 +210,90 @@ class VectorStore:
         # Use provided limit or fall back to configured max_results
         search_limit = limit if limit is not None else self.max_results
 
+        if deadline is not None and deadline.expired:
+            return SearchResults.empty(self.DEADLINE_SKIPPED)
         try:
-            results = self.course_content.query(
-                query_texts=[query], n_results=search_limit, where=filter_dict
-            )
-            return SearchResults.from_chroma(results)
+            # Embedded here rather than by Chroma so the two are timed apart
+            with stage("embed"):
+                query_embeddings = self.embedding_function([query])
+            if deadline is not None and deadline.expired:
+                return SearchResults.empty(self.DEADLINE_SKIPPED)
+            with stage("chroma_query"):
+                results = self.course_content.query(
+                    query_embeddings=query_embeddings,
+                    n_results=search_limit,
+                    where=filter_dict,
+                )
+            search_results = SearchResults.from_chroma(results)
         except Exception as e:
             return SearchResults.empty(f"Search error: {str(e)}")
 
-    def _resolve_course_name(self, course_name: str) -> Optional[str]:
+        # Step 4: Drop weak matches before they reach the LLM
+        trimmed_results = self._apply_relevance_cutoff(search_results)
+        self._record_search(search_results, trimmed_results)
+        return trimmed_results
+
+    def _apply_relevance_cutoff(self, results: SearchResults) -> SearchResults:
+        """Apply the distance threshold and adaptive top-k to ranked results"""
+        distances = results.distances
+        if not distances:
+            return results
+
+        # Results arrive sorted by ascending distance, so a threshold is a prefix
+        keep = len(distances)
+        if self.max_distance > 0:
+            keep = sum(1 for distance in distances if distance <= self.max_distance)
+
+        # Cut at the largest gap between neighbours, never below min_results
+        if self.adaptive_k and keep > self.min_results:
+            best_gap = 0.0
+            cut_at = keep
+            for index in range(self.min_results - 1, keep - 1):
+                gap = distances[index + 1] - distances[index]
+                if gap > best_gap:
+                    best_gap = gap
+                    cut_at = index + 1
+            if best_gap >= self.min_score_gap:
+                keep = cut_at
+
+        if keep == len(distances):
+            return results
+        return results.truncate(keep)
+
+    def _record_search(self, original: SearchResults, trimmed: SearchResults):
+        """Update cumulative cutoff counters for a completed search"""
+        kept = len(trimmed.documents)
+        chars_trimmed = sum(len(doc) for doc in original.documents[kept:])
+        with self._stats_lock:
+            self.search_stats["searches"] += 1
+            self.search_stats["results_returned"] += kept
+            self.search_stats["results_trimmed"] += trimmed.trimmed
+            self.search_stats["chars_trimmed"] += chars_trimmed
+
+    def get_search_stats(self) -> Dict[str, Any]:
+        """Get cumulative relevance-cutoff counters and the tokens they saved"""
+        with self._stats_lock:
+            stats = dict(self.search_stats)
+        searches = stats["searches"]
+        stats["avg_trimmed_per_search"] = (
+            stats["results_trimmed"] / searches if searches else 0.0
+        )
+        # Trimmed chunks never reach the prompt, so these are input tokens saved
+        stats["est_tokens_trimmed"] = math.ceil(
+            stats["chars_trimmed"] / CHARS_PER_TOKEN
+        )
+        stats["avg_est_tokens_trimmed_per_search"] = (
+            round(stats["est_tokens_trimmed"] / searches, 1) if searches else 0.0
+        )
+        return stats
+
+    def resolve_course_name(self, course_name: str) -> Optional[str]:
         """Use vector search to find best matching course by name"""
         try:
+            # Exact titles (as passed by the intent router) skip the embedding
+            if course_name in self._cached_course_titles():
+                return course_name
+
             results = self.course_catalog.query(query_texts=[course_name], n_results=1)
 
             if results["documents"][0] and results["metadatas"][0]:
@@ -178,6 +357,8 @@ class VectorStore:
             ],
             ids=[course.title],
         )
+        self._remember_course_title(course.title)
+        self._bump_index_version()
 
     def add_course_content(self, chunks: List[CourseChunk]):
         """Add course content chunks to the vector store"""
@@ -200,6 +381,7 @@ class VectorStore:
         ]
 
         self.course_content.add(documents=documents, metadatas=metadatas, ids=ids)
+        self._bump_index_version()
 
     def clear_all_data(self):
         """Clear all data from both collections"""
@@ -211,15 +393,38 @@ class VectorStore:
             self.course_content = self._create_collection("course_content")
         except Exception as e:
             print(f"Error clearing data: {e}")
+        finally:
+            # Force the next read to reload titles from the (new) catalog
+            with self._catalog_lock:
+                self._course_titles = None
+            self._bump_index_version()
+
+    def _bump_index_version(self):
+        """Mark the indexed data as changed"""
+        with self._catalog_lock:
+            self.index_version += 1
+
+    def _cached_course_titles(self) -> List[str]:
+        """Return the cached title list, loading ids only on first use"""
+        with self._catalog_lock:
+            if self._course_titles is None:
+                results = self.course_catalog.get(include=[])
+                self._course_titles = list(results.get("ids") or [])
+            return self._course_titles
+
+    def _remember_course_title(self, course_title: str):
+        """Record a newly written course title in the cache"""
+        with self._catalog_lock:
+            if self._course_titles is None:
+                # Not loaded yet; the first read will pick the title up
+                return
+            if course_title not in self._course_titles:
+                self._course_titles = [*self._course_titles, course_title]
 
     def get_existing_course_titles(self) -> List[str]:
         """Get all existing course titles from the vector store"""
         try:
-            # Get all documents from the catalog
-            results = self.course_catalog.get()
-            if results and "ids" in results:
-                return results["ids"]
-            return []
+            return list(self._cached_course_titles())
         except Exception as e:
             print(f"Error getting existing course titles: {e}")
             return []
@@ -227,10 +432,7 @@ class VectorStore:
     def get_course_count(self) -> int:
         """Get the total number of courses in the vector store"""
         try:
-            results = self.course_catalog.get()
-            if results and "ids" in results:
-                return len(results["ids"])
-            return 0
+            return len(self._cached_course_titles())
         except Exception as e:
             print(f"Error getting course count: {e}")
             return 0
@@ -240,8 +442,8 @@ class VectorStore:
         import json
 
         try:
-            results = self.course_catalog.get()
-            if results and "metadatas" in results:
+            results = self.course_catalog.get(include=["metadatas"])
+            if results and results.get("metadatas"):
                 # Parse lessons JSON for each course
                 parsed_metadata = []
                 for metadata in results["metadatas"]:
@@ -258,11 +460,93 @@ class VectorStore:
             print(f"Error getting courses metadata: {e}")
             return []
 
+    def get_index_stats(self) -> Dict[str, Any]:
+        """Get chunk counts, storage size and HNSW settings for the index"""
+        chunks_per_course: Counter = Counter()
+        total_chunks = 0
+        try:
+            total_chunks = self.course_content.count()
+            batch_size = 1000
+            for offset in range(0, total_chunks, batch_size):
+                batch = self.course_content.get(
+                    include=["metadatas"], limit=batch_size, offset=offset
+                )
+                for metadata in batch.get("metadatas") or []:
+                    chunks_per_course[metadata.get("course_title", "unknown")] += 1
+        except Exception as e:
+            print(f"Error counting course chunks: {e}")
+
+        hnsw = {
+            "course_catalog": self._collection_hnsw_settings(self.course_catalog),
+            "course_content": self._collection_hnsw_settings(self.course_content),
+        }
+
+        return {
+            "total_chunks": total_chunks,
+            "chunks_per_course": dict(chunks_per_course),
+            "disk_size_bytes": self._directory_size(self.chroma_path),
+            "estimated_index_memory_bytes": self._estimate_index_memory(
+                total_chunks, hnsw["course_content"]
+            ),
+            "process_rss_bytes": self._process_rss_bytes(),
+            "hnsw": hnsw,
+        }
+
+    def _estimate_index_memory(
+        self, vector_count: int, hnsw_settings: Dict[str, Any]
+    ) -> int:
+        """Estimate HNSW memory: float32 vectors plus two layers of links"""
+        if not vector_count:
+            return 0
+
+        dimensions = 0
+        try:
+            sample = self.course_content.get(limit=1, include=["embeddings"])
+            embeddings = sample.get("embeddings")
+            if embeddings is not None and len(embeddings):
+                dimensions = len(embeddings[0])
+        except Exception as e:
+            print(f"Error sampling embedding dimensions: {e}")
+
+        max_neighbors = hnsw_settings.get("max_neighbors", 16)
+        bytes_per_vector = dimensions * 4 + max_neighbors * 2 * 4
+        return vector_count * bytes_per_vector
+
+    @staticmethod
+    def _directory_size(path: str) -> int:
+        """Total size in bytes of all files below path"""
+        total = 0
+        for root, _dirs, files in os.walk(path):
+            for file_name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, file_name))
+                except OSError:
+                    continue
+        return total
+
+    @staticmethod
+    def _process_rss_bytes() -> Optional[int]:
+        """Resident set size of this process, where the platform exposes it"""
+        try:
+            with open("/proc/self/statm") as statm:
+                resident_pages = int(statm.read().split()[1])
+            return resident_pages * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            pass
+
+        try:
+            import resource
+
+            # ru_maxrss is the peak RSS, in kilobytes on Linux
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        except (ImportError, OSError):
+            return None
+
     def get_course_link(self, course_title: str) -> Optional[str]:
         """Get course link for a given course title"""
         try:
             # Get course by ID (title is the ID)
-            results = self.course_catalog.get(ids=[course_title])
+            results = self.course_catalog.get(ids=[course_title], include=["metadatas"])
             if results and "metadatas" in results and results["metadatas"]:
                 metadata = results["metadatas"][0]
                 return metadata.get("course_link")
@@ -276,11 +560,13 @@ class VectorStore:
         import json
 
         try:
-            resolved_title = self._resolve_course_name(course_name)
+            resolved_title = self.resolve_course_name(course_name)
             if not resolved_title:
                 return None
 
-            results = self.course_catalog.get(ids=[resolved_title])
+            results = self.course_catalog.get(
+                ids=[resolved_title], include=["metadatas"]
+            )
             if not results or "metadatas" not in results or not results["metadatas"]:
                 return None
 
@@ -314,7 +600,7 @@ class VectorStore:
 
         try:
             # Get course by ID (title is the ID)
-            results = self.course_catalog.get(ids=[course_title])
+            results = self.course_catalog.get(ids=[course_title], include=["metadatas"])
             if results and "metadatas" in results and results["metadatas"]:
                 metadata = results["metadatas"][0]
                 lessons_json = metadata.get("lessons_json")
@@ -48,8 +48,7 @@ def test_system_prompt_includes_outline_tool_instructions():
 
 
 def test_outline_tool_result_is_returned_without_link_rewrite():
-    generator = object.__new__(AIGenerator)
-    generator.base_params = {"model": "test-model", "temperature": 0, "max_tokens": 800}
+    generator = AIGenerator("test-key", "test-model", 10, 0)
     generator.client = StubAnthropicClient(
         [
             build_tool_use_response(
@@ -14,17 +14,20 @@ class StubDocumentProcessor:
 
 
 class StubVectorStore:
-    def __init__(self, _chroma_path, _embedding_model, _max_results):
+    def __init__(self, _chroma_path, _embedding_model, _max_results, **_kwargs):
         pass
 
+    def get_existing_course_titles(self):
+        return []
+
 
 class StubAIGenerator:
-    def __init__(self, _api_key, _model, _timeout_seconds, _max_retries):
+    def __init__(self, _api_key, _model, _timeout_seconds, _max_retries, **_kwargs):
         pass
 
 
 class StubSessionManager:
-    def __init__(self, _max_history):
+    def __init__(self, _max_history, **_kwargs):
         pass
 
 
@@ -34,10 +37,56 @@ class StubConfig:
     CHROMA_PATH = "/tmp/chroma"
     EMBEDDING_MODEL = "fake-model"
     MAX_RESULTS = 5
+    SEARCH_MAX_DISTANCE = 0.0
+    SEARCH_ADAPTIVE_K = False
+    SEARCH_MIN_SCORE_GAP = 0.0
+    SEARCH_MIN_RESULTS = 1
+    HNSW_SPACE = "l2"
+    HNSW_M = 16
+    HNSW_CONSTRUCTION_EF = 100
+    HNSW_SEARCH_EF = 100
+    SPECULATIVE_RETRIEVAL_ENABLED = False
+    SPECULATIVE_MATCH_THRESHOLD = 0.6
+    SPECULATIVE_MAX_WORKERS = 2
+    ANSWER_CACHE_ENABLED = False
+    ANSWER_CACHE_MAX_ENTRIES = 16
+    ANSWER_CACHE_TTL_SECONDS = 60
+    ANSWER_CACHE_SIMILARITY_THRESHOLD = 0.0
     ANTHROPIC_API_KEY = "test-key"
     ANTHROPIC_MODEL = "test-model"
+    ANTHROPIC_MAX_TOKENS = 800
+    LLM_BACKEND = "anthropic"
+    MODEL_TIERING_ENABLED = False
+    FAST_MODEL = "test-fast-model"
+    FAST_MODEL_MAX_TOKENS = 400
+    MODEL_TIER_COMPLEXITY_THRESHOLD = 0.25
     ANTHROPIC_TIMEOUT_SECONDS = 10
     ANTHROPIC_MAX_RETRIES = 1
+    ANTHROPIC_MAX_CONNECTIONS = 10
+    ANTHROPIC_MAX_KEEPALIVE_CONNECTIONS = 5
+    LLM_CONCURRENCY_INITIAL = 8
+    LLM_CONCURRENCY_MAX = 16
+    LLM_LATENCY_TARGET_SECONDS = 20
+    LLM_BREAKER_FAILURE_RATE = 0.5
+    LLM_BREAKER_RESET_SECONDS = 30
+    LLM_RETRY_BUDGET_RATIO = 0.1
+    HEDGE_ENABLED = False
+    HEDGE_MIN_DELAY_SECONDS = 2
+    HEDGE_MAX_RATIO = 0.05
+    TOOL_MAX_WORKERS = 2
+    TOOL_TIMEOUT_SECONDS = 5
+    PROMPT_TOKEN_BUDGET = 6000
+    HISTORY_TOKEN_BUDGET = 1000
+    TOOL_RESULT_TOKEN_BUDGET = 1500
+    INTENT_ROUTER_ENABLED = True
+    SINGLE_FLIGHT_ENABLED = True
+    MAX_SESSIONS = 100
+    SESSION_TTL_SECONDS = 3600
+    SESSION_BACKEND = "memory"
+    SESSION_DB_PATH = ""
+    SESSION_FLUSH_INTERVAL_SECONDS = 0.05
+    SESSION_CACHE_SECONDS = 1
+    QUERY_MAX_WORKERS = 2
     MAX_HISTORY = 10
 
 
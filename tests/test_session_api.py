@@ -25,20 +25,35 @@ class StubSessionManager:
     def delete_session(self, session_id):
         return self.sessions.pop(session_id, None) is not None
 
+    def close(self):
+        pass
+
+
+class StubAIGenerator:
+    async def aclose(self):
+        pass
+
 
 class StubRAGSystem:
     def __init__(self, _config):
         self.session_manager = StubSessionManager()
+        self.ai_generator = StubAIGenerator()
 
     def add_course_folder(self, _folder_path, clear_existing=False):
         return 0, 0
 
+    def llm_capacity(self):
+        return 64
+
     def get_course_analytics(self):
         return {"total_courses": 0, "course_titles": []}
 
     def query(self, _query, _session_id=None):
         return "", []
 
+    async def aquery(self, _query, _session_id=None, deadline=None):
+        return "", []
+
 
 @pytest.fixture
 def api_client(monkeypatch):
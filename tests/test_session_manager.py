@@ -1,11 +1,12 @@
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 BACKEND_PATH = Path(__file__).resolve().parents[1] / "backend"
 if str(BACKEND_PATH) not in sys.path:
     sys.path.insert(0, str(BACKEND_PATH))
 
-from session_manager import SessionManager  # noqa: E402
+from session_manager import HistoryBuffer, Message, SessionManager  # noqa: E402
 
 
 def test_delete_session_removes_existing_session():
@@ -31,3 +32,96 @@ def test_delete_session_returns_false_for_unknown_session():
     deleted = manager.delete_session("session_does_not_exist")
 
     assert deleted is False
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_idle_sessions_expire_after_ttl():
+    clock = FakeClock()
+    manager = SessionManager(ttl_seconds=60, clock=clock)
+    idle = manager.create_session()
+    active = manager.create_session()
+
+    clock.now = 50
+    manager.add_exchange(active, "question", "answer")
+    clock.now = 70
+
+    assert manager.get_conversation_history(idle) is None
+    assert manager.get_conversation_history(active) is not None
+    manager.evict_expired()
+    assert idle not in manager.sessions
+    assert manager.get_stats()["evicted_ttl"] == 1
+
+
+def test_least_recently_used_session_is_evicted_at_capacity():
+    clock = FakeClock()
+    manager = SessionManager(max_sessions=2, num_shards=1, clock=clock)
+    first = manager.create_session()
+    second = manager.create_session()
+
+    clock.now = 1
+    manager.add_exchange(first, "question", "answer")
+    third = manager.create_session()
+
+    assert set(manager.sessions) == {first, third}
+    assert second not in manager.sessions
+    stats = manager.get_stats()
+    assert stats["evicted_capacity"] == 1
+    assert stats["live_sessions"] == 2
+
+
+def test_stats_report_the_per_shard_session_cap():
+    stats = SessionManager(max_sessions=100, num_shards=16).get_stats()
+
+    assert stats["max_sessions_per_shard"] == 7
+    assert stats["max_sessions"] == 112
+    assert stats["eviction"] == "per-shard LRU"
+
+
+def test_concurrent_session_creation_yields_unique_ids():
+    manager = SessionManager()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        session_ids = list(executor.map(lambda _: manager.create_session(), range(400)))
+
+    assert len(set(session_ids)) == 400
+    assert manager.get_stats()["live_sessions"] == 400
+
+
+def test_session_ids_are_unique_across_managers():
+    first = SessionManager().create_session()
+    second = SessionManager().create_session()
+
+    assert first != second
+
+
+def test_history_buffer_keeps_text_in_sync_with_ring_contents():
+    buffer = HistoryBuffer(capacity=3)
+
+    for i in range(7):
+        buffer.append(
+            Message(role="user" if i % 2 == 0 else "assistant", content=f"m{i}\nx")
+        )
+        expected = "\n".join(msg.rendered for msg in buffer.messages())
+        assert buffer.text == expected
+
+    assert [msg.content for msg in buffer.messages()] == ["m4\nx", "m5\nx", "m6\nx"]
+    assert buffer.text.startswith("User: m4")
+
+
+def test_history_read_returns_the_maintained_string():
+    manager = SessionManager(max_history=1)
+    session_id = manager.create_session()
+    manager.add_exchange(session_id, "q1", "a1")
+    manager.add_exchange(session_id, "q2", "a2")
+
+    history = manager.get_conversation_history(session_id)
+
+    assert history == "User: q2\nAssistant: a2"
+    assert manager.get_conversation_history(session_id) is history